@@ -0,0 +1,187 @@
+"""C-PLAYER command line.
+
+    cplayer                  open the TUI (attached to the daemon if one is running)
+    cplayer tui --daemon     start the daemon if needed and attach, so music outlives the TUI
+    cplayer daemon           run the player daemon in the foreground
+    cplayer play QUERY|URL   queue what it finds in the daemon and play the first track
+    cplayer search QUERY     print matching tracks, without a daemon
+    cplayer next | prev | pause | stop | status | quit
+    cplayer volume up|down
+    cplayer radio on|off     keep playing related tracks when the queue runs out
+    cplayer shuffle on|off   play the queue in random order, each track once per round
+    cplayer repeat off|all|one
+
+--json prints machine-readable output for scripts and status bars.
+
+Everything the TUI needs (Textual, pyfiglet, ytmusicapi) is imported only
+by the commands that use it, so control commands start in milliseconds;
+bench/bench_import.py keeps them within budget.
+"""
+import argparse
+import json
+import sys
+
+from app.client import REQUEST_TIMEOUT, connect, daemon_running
+from app.controller.ipc import MpvError
+
+
+def _clock(seconds):
+    seconds = int(seconds or 0)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def describe(status):
+    """One line summary of a daemon status"""
+    track = status.get('track')
+    if not track:
+        return "Stopped"
+    state = "Paused" if status.get('pause') else "Playing" if status.get('running') else "Stopped"
+    position = f"{_clock(status.get('time-pos'))} / {_clock(status.get('duration'))}"
+    place = f"[{status['queue-index'] + 1}/{status['queue-length']}]" if status.get('queue-index', -1) >= 0 else ""
+    modes = " ".join(filter(None, (
+        "shuffle" if status.get('shuffle') else "",
+        f"repeat {status['repeat']}" if status.get('repeat', "off") != "off" else "",
+        "radio" if status.get('radio') else "",
+    )))
+    return f"{state}: {track['title']} - {track.get('artist', '')}  {position}  vol {status.get('volume')}%  {place}  {modes}".rstrip()
+
+
+def _track_line(track):
+    return f"{track.get('videoId', '')}  {track['title']} - {track.get('artist', '')}"
+
+
+def run_search(args):
+    from app.services.audio_cache import audio_cache
+
+    query = " ".join(args.query)
+    if audio_cache.offline:
+        from app.services.library import library
+        tracks = [t for t in library.find_tracks(query) if audio_cache.has(t.get('videoId'))]
+    else:
+        from app.services.ytmusic import search_tracks
+        tracks = search_tracks(query)
+    tracks = tracks[:args.limit]
+    if args.json:
+        print(json.dumps(tracks))
+    else:
+        for track in tracks:
+            print(_track_line(track))
+    if not tracks:
+        sys.exit(1)
+
+
+def run_tui(args):
+    from app.main import CPlayer
+
+    attach = not args.local and (args.daemon or daemon_running(args.instance))
+    CPlayer(attach=attach, start_daemon=args.daemon, instance=args.instance).run()
+
+
+def run_daemon(args):
+    from app.daemon import serve
+
+    try:
+        serve(args.instance)
+    except RuntimeError as e:
+        sys.exit(f"cplayer: {e}")
+
+
+def run_control(args):
+    # Only play may need to bring the daemon up; the rest report it is not running
+    ipc = connect(args.instance, start=args.command == "play")
+    if ipc is None and args.command == "status":
+        # Status bars poll this; not running is an answer, not an error
+        print(json.dumps({"daemon": False}) if args.json else "Not running")
+        return
+    if ipc is None:
+        sys.exit("cplayer: no player daemon is running (start one with `cplayer daemon` or `cplayer play`)")
+    try:
+        if args.command == "play":
+            result = ipc.command("play_query", " ".join(args.query)).result(REQUEST_TIMEOUT)
+            track = result['track']
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"Playing: {track['title']} - {track.get('artist', '')}  ({result['count']} queued)")
+            return
+        if args.command == "volume":
+            command = ["volume", 5 if args.direction == "up" else -5]
+        elif args.command == "radio":
+            command = ["set_radio", args.state == "on"]
+        elif args.command == "shuffle":
+            command = ["set_shuffle", args.state == "on"]
+        elif args.command == "repeat":
+            command = ["set_repeat", args.mode]
+        else:
+            command = {
+                "next": ["next"],
+                "prev": ["previous"],
+                "pause": ["pause"],
+                "stop": ["stop"],
+                "quit": ["quit"],
+            }.get(args.command)
+        if command is not None:
+            result = ipc.command(*command).result(REQUEST_TIMEOUT)
+            # The set_* commands answer with the new state, so False is not a failure there
+            if result is False and args.command not in ("radio", "shuffle"):
+                sys.exit(f"cplayer: {args.command} failed")
+            if args.command in ("quit", "stop"):
+                return
+        status = ipc.command("status").result(REQUEST_TIMEOUT)
+        print(json.dumps(status) if args.json else describe(status))
+    except MpvError as e:
+        sys.exit(f"cplayer: {e}")
+    finally:
+        ipc.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cplayer", description="Terminal YouTube Music player")
+    parser.add_argument("--instance", help="Name of an independent player (default: $CPLAYER_INSTANCE or 'default')")
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    commands = parser.add_subparsers(dest="command")
+
+    tui = commands.add_parser("tui", help="Open the TUI (default)")
+    tui.add_argument("--daemon", action="store_true", help="Start the daemon if needed and attach to it")
+    tui.add_argument("--local", action="store_true", help="Play inside the TUI even if a daemon is running")
+
+    commands.add_parser("daemon", help="Run the player daemon in the foreground")
+    play = commands.add_parser("play", parents=[output], help="Play a search query, watch URL or playlist URL")
+    play.add_argument("query", nargs="+")
+    search = commands.add_parser("search", parents=[output], help="Print the tracks a query finds")
+    search.add_argument("query", nargs="+")
+    search.add_argument("--limit", type=int, default=20)
+    for name, text in [
+        ("next", "Skip to the next track"),
+        ("prev", "Go back to the previous track"),
+        ("pause", "Toggle pause"),
+        ("stop", "Stop playback"),
+        ("status", "Show what is playing"),
+        ("quit", "Stop the daemon"),
+    ]:
+        commands.add_parser(name, parents=[output], help=text)
+    volume = commands.add_parser("volume", parents=[output], help="Change the volume by 5%%")
+    volume.add_argument("direction", choices=["up", "down"])
+    radio = commands.add_parser("radio", parents=[output], help="Keep playing related tracks when the queue runs out")
+    radio.add_argument("state", choices=["on", "off"])
+    shuffle = commands.add_parser("shuffle", parents=[output], help="Play the queue in random order")
+    shuffle.add_argument("state", choices=["on", "off"])
+    repeat = commands.add_parser("repeat", parents=[output], help="Repeat nothing, the whole queue or one track")
+    repeat.add_argument("mode", choices=["off", "all", "one"])
+
+    args = parser.parse_args(argv)
+    if args.command in (None, "tui"):
+        args.daemon = getattr(args, "daemon", False)
+        args.local = getattr(args, "local", False)
+        run_tui(args)
+    elif args.command == "daemon":
+        run_daemon(args)
+    elif args.command == "search":
+        run_search(args)
+    else:
+        run_control(args)
+
+
+if __name__ == "__main__":
+    main()
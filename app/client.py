@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+from app.controller.ipc import MpvIPC
+from app.controller.sockets import INSTANCE, control_socket, is_listening, runtime_dir
+
+CONNECT_TIMEOUT = 1.0
+START_TIMEOUT = 15.0  # First start imports ytmusicapi and opens the library
+REQUEST_TIMEOUT = 60.0  # Long enough for a search plus resolving a track with yt-dlp
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+
+def daemon_running(instance=None):
+    return is_listening(control_socket(instance))
+
+
+def start_daemon(instance=None):
+    """Start a detached daemon and wait until it accepts connections"""
+    import subprocess  # Only needed here; keeps control commands lean
+
+    path = control_socket(instance)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PACKAGE_ROOT), env.get("PYTHONPATH")]))
+    args = [sys.executable, "-m", "app", "daemon"]
+    if instance:
+        args += ["--instance", instance]
+    log_path = runtime_dir() / f"{instance or INSTANCE}.log"
+    with open(log_path, "ab") as log:
+        proc = subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            env=env,
+            start_new_session=True,  # Outlives the terminal that started it
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if is_listening(path):
+            return True
+        if proc.poll() is not None:
+            return False
+        time.sleep(0.05)
+    return False
+
+
+def connect(instance=None, start=False, on_property=None, on_event=None):
+    """Open a control connection to the daemon, optionally starting it first.
+
+    Returns a connected MpvIPC, or None if no daemon could be reached.
+    """
+    path = control_socket(instance)
+    if not is_listening(path):
+        if not start or not start_daemon(instance):
+            return None
+    ipc = MpvIPC(on_property=on_property, on_event=on_event)
+    ipc.open(path, timeout=CONNECT_TIMEOUT)
+    if not ipc.wait_connected(CONNECT_TIMEOUT):
+        ipc.close()
+        return None
+    return ipc
@@ -0,0 +1,191 @@
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future
+
+from app.services.tracing import tracer
+
+
+class MpvError(Exception):
+    """An mpv command failed or could not be sent"""
+
+
+class MpvIPC:
+    """JSON IPC client for one mpv process.
+
+    Messages are line-framed, so events split across reads are reassembled
+    before parsing. Commands carry a request_id and return a Future that the
+    single reader thread resolves when mpv answers. Property changes and
+    events are delivered to the callbacks on that reader thread, so they
+    must be quick and must not call close().
+    """
+
+    def __init__(self, on_property=None, on_event=None, on_connect=None):
+        self.on_property = on_property
+        self.on_event = on_event
+        self.on_connect = on_connect
+        self.path = None
+        self.sock = None
+        self.connected = threading.Event()
+        self._closed = threading.Event()
+        self._thread = None
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._observe_ids = itertools.count(1)
+
+    def open(self, path, timeout=4.0):
+        """Start the reader thread, which waits for the socket and connects"""
+        self.path = path
+        self._thread = threading.Thread(
+            target=self._run, args=(timeout,), name="cplayer-mpv-ipc", daemon=True
+        )
+        self._thread.start()
+
+    def wait_connected(self, timeout=4.0):
+        return self.connected.wait(timeout)
+
+    def close(self):
+        """Disconnect, stop the reader thread and fail outstanding requests"""
+        self._closed.set()
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        self._thread = None
+
+    @property
+    def closed(self):
+        return self._closed.is_set()
+
+    def _run(self, timeout):
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        sock = None
+        try:
+            while not self._closed.is_set():
+                if os.path.exists(self.path):
+                    sock = socket.socket(socket.AF_UNIX)
+                    try:
+                        sock.connect(self.path)
+                        break
+                    except OSError:
+                        sock.close()
+                        sock = None
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.05)
+            if sock is None:
+                tracer.record("ipc.connect", time.perf_counter() - started, error=True)
+                return
+
+            # Mostly time spent waiting for mpv to create its socket
+            tracer.record("ipc.connect", time.perf_counter() - started)
+            self.sock = sock
+            if self._closed.is_set():
+                # close() ran before it could see the socket
+                return
+            self.connected.set()
+            if self.on_connect:
+                self.on_connect()
+            self._read_loop(sock)
+        except Exception:
+            pass
+        finally:
+            self.connected.clear()
+            self.sock = None
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+            self._fail_pending(MpvError("mpv connection closed"))
+
+    def _read_loop(self, sock):
+        buffer = b""
+        while not self._closed.is_set():
+            data = sock.recv(65536)
+            if not data:
+                # Connection closed by peer
+                return
+            buffer += data
+            while True:
+                newline = buffer.find(b"\n")
+                if newline < 0:
+                    break
+                line, buffer = buffer[:newline], buffer[newline + 1:]
+                if line.strip():
+                    self._dispatch(line)
+
+    def _dispatch(self, line):
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            return
+        if "request_id" in msg and "event" not in msg:
+            with self._pending_lock:
+                future = self._pending.pop(msg["request_id"], None)
+            if future is None:
+                return
+            if msg.get("error") == "success":
+                future.set_result(msg.get("data"))
+            else:
+                future.set_exception(MpvError(msg.get("error")))
+            return
+        try:
+            if msg.get("event") == "property-change":
+                if self.on_property:
+                    self.on_property(msg.get("name"), msg.get("data"))
+            elif msg.get("event") and self.on_event:
+                self.on_event(msg["event"], msg)
+        except Exception:
+            # A failing callback must not take the reader down
+            pass
+
+    def _fail_pending(self, error):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def command(self, *args):
+        """Send a command; the returned Future resolves to mpv's data field"""
+        future = Future()
+        request_id = next(self._request_ids)
+        sock = self.sock
+        if sock is None or self._closed.is_set():
+            future.set_exception(MpvError("mpv is not connected"))
+            return future
+        with self._pending_lock:
+            self._pending[request_id] = future
+        payload = (json.dumps({"command": list(args), "request_id": request_id}) + "\n").encode()
+        try:
+            with self._send_lock:
+                sock.sendall(payload)
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            future.set_exception(MpvError(str(e)))
+        return future
+
+    def get_property(self, name):
+        return self.command("get_property", name)
+
+    def set_property(self, name, value):
+        return self.command("set_property", name, value)
+
+    def observe_property(self, name):
+        """Subscribe to changes of name, delivered through on_property"""
+        observe_id = next(self._observe_ids)
+        self.command("observe_property", observe_id, name)
+        return observe_id
@@ -1,90 +1,272 @@
-import subprocess, socket, json, os, threading, time, signal
-from app.services.resolver import resolve_audio
+import subprocess, os, threading, time, signal
+from collections import deque
+from app.controller.ipc import MpvIPC
+from app.controller.sockets import mpv_socket
+from app.services.resolver import resolve_audio, invalidate_audio, is_resolved, cached_stream_url
+from app.services.audio_cache import audio_cache
+from app.services.tracing import span, tracer
 
-SOCKET = "/tmp/cplayer.sock"
+SOCKET_TIMEOUT = 4.0  # Seconds to wait for mpv to create its IPC socket
+
+# "spawn" starts a new mpv per track, "persistent" keeps one mpv for the whole session
+PLAYER_MODE = os.environ.get("CPLAYER_MPV_MODE", "spawn")
+
+MPV_ARGS = ["--no-video", "--quiet"]
+PERSISTENT_MPV_ARGS = ["--idle=yes", "--gapless-audio=weak", "--prefetch-playlist=yes"]
 
 class Player:
-    def __init__(self, on_end):
+    def __init__(self, on_end, mode=PLAYER_MODE, on_change=None, socket_path=None):
         self.proc = None
-        self.sock = None
+        # One socket per process, so concurrent players never share an mpv
+        self.socket_path = socket_path or mpv_socket()
+        self.ipc = None
+        self.track = None
         self.on_end = on_end
+        # Called with a property name ("time-pos", "pause", "running", "track", ...) when it changes
+        self.on_change = on_change
+        self.mode = mode
         self.running = False
+        self.paused = False
         self.time_pos = 0
         self.duration = 1
         self.volume = 100  # Default volume
 
+        # Measurements for comparing playback modes
+        self.spawn_count = 0
+        self.ttfa_history = deque(maxlen=50)  # Seconds from play() to first audio
+        self.first_audio_count = 0  # Plays that reached first audio, including ones not kept in ttfa_history
+        self._play_started = None  # Set when mpv is told to start the track
+        self._play_requested = None  # Set when play() is called, before resolving
+
+        # Persistent mode: videoIds mirrored from mpv's internal playlist
+        self._playlist = []
+        self._playlist_pos = -1
+        self._auto_advanced = None
+        self._playlist_lock = threading.RLock()
+
     def play(self, track):
+        self._play_requested = time.monotonic()
+        if self.mode == "persistent":
+            return self._play_persistent(track)
+
         self.stop()
         url = resolve_audio(track["videoId"])
 
         if not url:
             return False
+        self.track = track
+        self._notify("track")
+
+        self._mark_play_start()
+        self._spawn([url])
+        self._open_ipc()
+        audio_cache.fetch(track["videoId"], url)
+        return True
 
-        if os.path.exists(SOCKET):
-            os.remove(SOCKET)
+    def _spawn(self, args):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
 
-        self.proc = subprocess.Popen(
-            ["mpv", url, "--no-video", "--quiet", f"--input-ipc-server={SOCKET}"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            preexec_fn=os.setsid,
-        )
+        with span("mpv.spawn", mode=self.mode):
+            self.proc = subprocess.Popen(
+                ["mpv", *args, *MPV_ARGS, f"--input-ipc-server={self.socket_path}"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                preexec_fn=os.setsid,
+            )
+        self.spawn_count += 1
+        self._set_running(True)
+
+    def _play_persistent(self, track):
+        video_id = track["videoId"]
+        with self._playlist_lock:
+            if self._auto_advanced == video_id:
+                # mpv already moved on to this track without a gap
+                self._auto_advanced = None
+                self.track = track
+                self._notify("track")
+                audio_cache.fetch(video_id, cached_stream_url(video_id))
+                return True
+            self._auto_advanced = None
 
-        self.running = True
-        threading.Thread(target=self._ipc_loop, daemon=True).start()
+            if not self._ensure_mpv():
+                return False
+
+            pos = self._playlist_pos
+            if pos + 1 < len(self._playlist) and self._playlist[pos + 1] == video_id:
+                self._mark_play_start()
+                self._send(["playlist-next", "force"])
+                self._playlist_pos = pos + 1
+            elif pos > 0 and self._playlist[pos - 1] == video_id:
+                self._mark_play_start()
+                self._send(["playlist-prev", "force"])
+                self._playlist_pos = pos - 1
+            else:
+                url = resolve_audio(video_id)
+                if not url:
+                    return False
+                self._mark_play_start()
+                # "replace" also clears mpv's playlist
+                self._send(["loadfile", url, "replace"])
+                self._playlist = [video_id]
+                self._playlist_pos = 0
+
+        self.track = track
+        self._notify("track")
+        self._set_running(True)
+        self._send(["set_property", "pause", False])
+        # Keep a local copy for repeat plays and offline mode
+        audio_cache.fetch(video_id, cached_stream_url(video_id))
         return True
 
-    def _ipc_loop(self):
-        for _ in range(40):
-            if os.path.exists(SOCKET):
-                break
-            time.sleep(0.1)
+    def preload(self, track):
+        """Queue the upcoming track inside mpv so it follows without a gap.
 
-        try:
-            self.sock = socket.socket(socket.AF_UNIX)
-            self.sock.connect(SOCKET)
-
-            self._send(["observe_property", 1, "time-pos"])
-            self._send(["observe_property", 2, "duration"])
-            self._send(["observe_property", 3, "volume"])
-
-            while self.running:
-                data = self.sock.recv(4096)
-                if not data:
-                    # Connection closed by peer
-                    break
-                for line in data.splitlines():
-                    msg = json.loads(line.decode())
-                    if msg.get("name") == "time-pos":
-                        self.time_pos = msg.get("data") or 0
-                    elif msg.get("name") == "duration":
-                        self.duration = msg.get("data") or 1
-                    elif msg.get("name") == "volume":
-                        self.volume = int(msg.get("data") or 100)
-                    elif msg.get("event") == "end-file":
-                        self.on_end()
-        except Exception:
-            pass
-        finally:
-            # Clean up socket on exit
-            try:
-                if self.sock:
-                    self.sock.close()
-                    self.sock = None
-            except:
-                pass
+        Only already-resolved tracks are appended, so this never blocks on
+        yt-dlp. Passing None, or a track not resolved yet, drops anything
+        queued after the current track, so mpv never moves on to a track
+        that is no longer next; the queue preloads again once it resolves.
+        """
+        if self.mode != "persistent" or not self.sock:
+            return
+        if track is not None and not is_resolved(track["videoId"]):
+            track = None
+        with self._playlist_lock:
+            pos = self._playlist_pos
+            if pos < 0:
+                return
+
+            # Keep one previous entry for playlist-prev and trim the rest
+            while pos > 1:
+                self._send(["playlist-remove", 0])
+                self._playlist.pop(0)
+                pos -= 1
+            self._playlist_pos = pos
+
+            upcoming = self._playlist[pos + 1:]
+            if track is not None and upcoming == [track["videoId"]]:
+                return
+            for i in reversed(range(pos + 1, len(self._playlist))):
+                self._send(["playlist-remove", i])
+                self._playlist.pop(i)
+
+            if track is not None:
+                self._send(["loadfile", resolve_audio(track["videoId"]), "append"])
+                self._playlist.append(track["videoId"])
+
+    def _ensure_mpv(self):
+        """Start the session-wide idle mpv and connect to it if needed"""
+        if self.proc and self.proc.poll() is None and self.sock:
+            return True
+        self.stop()
+        with self._playlist_lock:
+            self._playlist = []
+            self._playlist_pos = -1
+        self._spawn(PERSISTENT_MPV_ARGS)
+        self._open_ipc()
+        return self.ipc.wait_connected(SOCKET_TIMEOUT)
+
+    def _mark_play_start(self):
+        self._play_started = time.monotonic()
+
+    @property
+    def last_ttfa(self):
+        return self.ttfa_history[-1] if self.ttfa_history else None
+
+    def stats(self):
+        """Return process-spawn and time-to-first-audio measurements"""
+        ttfa = sorted(self.ttfa_history)
+        return {
+            'mode': self.mode,
+            'spawn_count': self.spawn_count,
+            'last_ttfa': self.last_ttfa,
+            'median_ttfa': ttfa[len(ttfa) // 2] if ttfa else None,
+        }
+
+    def _open_ipc(self):
+        """Attach a fresh IPC client to the mpv that was just spawned"""
+        self.ipc = MpvIPC(
+            on_property=self._on_property,
+            on_event=self._on_event,
+            on_connect=self._on_connect,
+        )
+        self.ipc.open(self.socket_path, timeout=SOCKET_TIMEOUT)
+
+    def _on_connect(self):
+        self.ipc.observe_property("time-pos")
+        self.ipc.observe_property("duration")
+        self.ipc.observe_property("volume")
+        self.ipc.observe_property("pause")
+        if self.mode == "persistent":
+            self.ipc.observe_property("playlist-pos")
+
+    def _on_property(self, name, value):
+        if name == "time-pos":
+            self.time_pos = value or 0
+        elif name == "duration":
+            self.duration = value or 1
+        elif name == "volume":
+            self.volume = int(value or 100)
+        elif name == "pause":
+            self.paused = bool(value)
+        elif name == "playlist-pos":
+            if value is not None and value >= 0:
+                with self._playlist_lock:
+                    self._playlist_pos = value
+            return
+        self._notify(name)
+
+    def _notify(self, name):
+        if self.on_change:
+            self.on_change(name)
+
+    def _set_running(self, running):
+        if running != self.running:
+            self.running = running
+            self._notify("running")
+
+    def _on_event(self, event, msg):
+        if event == "playback-restart":
+            if self._play_started is not None:
+                now = time.monotonic()
+                ttfa = now - self._play_started
+                self.ttfa_history.append(ttfa)
+                self.first_audio_count += 1
+                self._play_started = None
+                video_id = self.track["videoId"] if self.track else None
+                # first_audio starts once mpv has the URL; play also covers resolving it
+                tracer.record("first_audio", ttfa, mode=self.mode, video_id=video_id)
+                if self._play_requested is not None:
+                    tracer.record("play", now - self._play_requested, mode=self.mode, video_id=video_id)
+                    self._play_requested = None
+        elif event == "end-file":
+            self._on_end_file(msg.get("reason"))
+
+    def _on_end_file(self, reason):
+        if reason == "error" and self.track:
+            # The cached stream URL may have gone stale
+            invalidate_audio(self.track["videoId"])
+        if self.mode != "persistent":
+            self.on_end()
+            return
+        if reason not in ("eof", "error"):
+            # Replaced or skipped by us; the next file is already loading
+            return
+        with self._playlist_lock:
+            pos = self._playlist_pos
+            if reason == "eof" and pos + 1 < len(self._playlist):
+                self._auto_advanced = self._playlist[pos + 1]
+                self._playlist_pos = pos + 1
+            else:
+                self._set_running(False)
+        self.time_pos = 0
+        self._notify("time-pos")
+        self.on_end()
 
     def _send(self, cmd):
-        if self.sock:
-            try:
-                self.sock.sendall((json.dumps({"command": cmd}) + "\n").encode())
-            except (OSError, BrokenPipeError):
-                # Socket is disconnected, close it and set to None
-                try:
-                    self.sock.close()
-                except:
-                    pass
-                self.sock = None
+        if self.ipc is not None:
+            return self.ipc.command(*cmd)
+        return None
 
     def toggle_pause(self):
         self._send(["cycle", "pause"])
@@ -95,16 +277,41 @@ class Player:
     def volume_down(self):
         self._send(["add", "volume", -5])
 
+    def read_volume(self, timeout=1.0):
+        """Ask mpv for its volume, which reflects every volume change sent before"""
+        if self.ipc is not None:
+            try:
+                self.volume = int(self.ipc.get_property("volume").result(timeout=timeout))
+            except Exception:
+                pass
+        return self.volume
+
+    @property
+    def sock(self):
+        """The connected IPC socket, or None"""
+        return self.ipc.sock if self.ipc is not None else None
+
     def stop(self):
-        self.running = False
-        try:
-            if self.sock:
-                self.sock.close()
-        except:
-            pass
+        self._set_running(False)
+        if self.ipc is not None:
+            self.ipc.close()
+            self.ipc = None
         try:
             if self.proc:
                 os.killpg(os.getpgid(self.proc.pid), signal.SIGTERM)
+                # Reap it so long sessions do not pile up zombie processes
+                self.proc.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(os.getpgid(self.proc.pid), signal.SIGKILL)
+                self.proc.wait(timeout=1.0)
+            except:
+                pass
         except:
             pass
         self.proc = None
+        try:
+            # The per-process socket would otherwise outlive a killed mpv
+            os.remove(self.socket_path)
+        except OSError:
+            pass
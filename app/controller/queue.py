@@ -1,34 +1,399 @@
+import math
+import os
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.controller.tracktree import TrackTree
+from app.services.resolver import resolve_audio, is_resolved
+from app.services.history_manager import add_to_history
+
+PREFETCH_DEPTH = int(os.environ.get("CPLAYER_PREFETCH", "3"))
+PREFETCH_WORKERS = 2
+REPEAT_MODES = ("off", "all", "one")
+SHUFFLE_HISTORY = 500  # Shuffled plays previous() can step back through
+
 class Queue:
-    def __init__(self, player):
+    """The play queue: what plays now, what follows, and in which order.
+
+    Tracks are kept as compact Track objects in a TrackTree, so finding a
+    track by videoId, inserting, removing and moving cost O(log n) however
+    long the queue is. Shuffle draws from a bag of the tracks not yet
+    played this round (O(1) per draw, no repeats until the bag is empty);
+    the draws for the next few tracks are made ahead of time, so prefetch
+    resolves the tracks that will actually play. Repeat is "off", "all"
+    (wrap around, or refill the shuffle bag) or "one" (replay the current
+    track when it ends; skipping still moves on).
+    """
+
+    def __init__(self, player, prefetch_depth=PREFETCH_DEPTH, radio=None):
         self.player = player
-        self.tracks = []
-        self.index = -1
         self.current_track = None
+        self.prefetch_depth = prefetch_depth
+        self.radio = radio  # Optional Radio that appends related tracks near the end
+        self.generation = 0  # Bumped by load(), so late radio tracks for an old queue are dropped
+        self.dry = False  # The last track ended with nothing after it
+        self.shuffle = False
+        self.repeat = "off"
+        self._order = TrackTree()
+        self._current = None  # Node of the current track, if it is in the queue
+        self._bag = []  # Shuffle: nodes not played yet this round
+        self._ahead = deque()  # Shuffle: nodes that play next, nearest first
+        self._played = deque(maxlen=SHUFFLE_HISTORY)  # Shuffle: nodes played before the current one
+        self._next_track = None  # What plays after the current track, worked out on the owner's thread
+        self._prefetch = {}  # videoId -> Future resolving its stream URL
+        self._prefetch_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=PREFETCH_WORKERS, thread_name_prefix="cplayer-prefetch"
+        )
+
+    def __len__(self):
+        return len(self._order)
+
+    @property
+    def tracks(self):
+        """Every track in queue order; O(n), for showing or saving the queue"""
+        return list(self._order)
+
+    @property
+    def index(self):
+        """Position of the current track, -1 if none"""
+        return self._order.rank(self._current) if self._current is not None else -1
+
+    def position(self, video_id):
+        """Position of the first entry for video_id, -1 if it is not queued"""
+        node = self._order.find(video_id)
+        return self._order.rank(node) if node is not None else -1
 
     def load(self, tracks):
-        self.tracks = tracks
-        self.index = -1
+        self._order = TrackTree(tracks)
+        self._current = None
         self.current_track = None
+        self.generation += 1
+        self.dry = False
+        self._reset_shuffle()
+        self._cancel_prefetch()
+        self.player.preload(None)
+        self._schedule_prefetch()
+
+    def extend(self, tracks):
+        """Append tracks, e.g. further pages of a playlist that is still loading"""
+        self._to_bag(self._order.insert(len(self._order), tracks))
+        self._schedule_prefetch()
+        if self.dry:
+            # Playback stopped at the old end; carry on with the new tracks
+            self.next()
+        else:
+            self._preload_next()
+
+    def insert(self, position, tracks):
+        """Insert tracks before position"""
+        self._to_bag(self._order.insert(position, tracks))
+        self._upcoming_changed()
+
+    def play_next(self, position):
+        """Move the track at position to play right after the current one, shuffled or not"""
+        node = self._order.node_at(position)
+        if node is None or node is self._current:
+            return False
+        current = self.index
+        # Positions are counted without the moved track
+        self._order.move(node, current + (position > current) if current >= 0 else 0)
+        if self.shuffle:
+            self._from_bag(node)
+            if node in self._ahead:
+                self._ahead.remove(node)
+            self._ahead.appendleft(node)
+        self._upcoming_changed()
+        return True
+
+    def remove(self, position):
+        """Remove the track at position; the current track cannot be removed"""
+        node = self._order.node_at(position)
+        if node is None or node is self._current:
+            return False
+        self._order.remove(node)
+        self._from_bag(node)
+        if node in self._ahead:
+            self._ahead.remove(node)
+        # previous() skips removed tracks left in the shuffle history
+        self._upcoming_changed()
+        return True
+
+    def move(self, position, to):
+        """Move the track at position so that it ends up at position to"""
+        node = self._order.node_at(position)
+        if node is None:
+            return False
+        self._order.move(node, to)
+        self._upcoming_changed()
+        return True
+
+    def set_shuffle(self, enabled):
+        if bool(enabled) != self.shuffle:
+            self.shuffle = bool(enabled)
+            self._reset_shuffle()
+            self._upcoming_changed()
+        return self.shuffle
+
+    def set_repeat(self, mode):
+        if mode not in REPEAT_MODES:
+            raise ValueError(f"repeat must be one of {', '.join(REPEAT_MODES)}")
+        self.repeat = mode
+        self._upcoming_changed()
+        return self.repeat
+
+    def add_radio(self, tracks, generation):
+        """Append radio tracks unless they were fetched for a queue since replaced"""
+        if generation != self.generation:
+            return False
+        self.extend(tracks)
+        return True
+
+    def set_radio(self, enabled):
+        if self.radio is None:
+            return False
+        self.radio.set_enabled(enabled)
+        self.top_up()
+        return self.radio.enabled
+
+    def top_up(self):
+        """Have the radio fetch more tracks if the queue is close to its end"""
+        if self.radio is not None:
+            self.radio.top_up(self)
+
+    def remaining(self):
+        """How many more tracks play by themselves before the queue runs out"""
+        if self.repeat != "off":
+            return math.inf
+        if self.shuffle:
+            return len(self._bag) + len(self._ahead)
+        return len(self._order) - 1 - self.index
+
+    def advance(self):
+        """Play the next track after one ended; at the end, the queue is marked dry"""
+        if self.repeat == "one" and self._current is not None:
+            return self._play(self._current.track)
+        upcoming = self._upcoming_nodes(1, wrap=self.repeat == "all")
+        if upcoming:
+            return self._play_node(upcoming[0])
+        self.dry = True
+        self.top_up()
+        return False
 
     def play_single(self, track):
-        # Find the track index in the queue
-        for i, t in enumerate(self.tracks):
-            if t.get('videoId') == track.get('videoId'):
-                self.index = i
-                break
-        self.current_track = track
-        return self.player.play(track)
+        node = self._order.find(track.get('videoId'))
+        if node is not None:
+            return self._play_node(node)
+        return self._play(track)
 
     def next(self):
-        if not self.tracks:
+        if not self._order:
             return False
-        self.index = (self.index + 1) % len(self.tracks)
-        self.current_track = self.tracks[self.index]
-        return self.player.play(self.tracks[self.index])
+        # Skipping wraps around at the end whatever the repeat mode
+        return self._play_node(self._upcoming_nodes(1, wrap=True)[0])
 
     def previous(self):
-        if not self.tracks:
+        if not self._order:
             return False
-        self.index = (self.index - 1) % len(self.tracks)
-        self.current_track = self.tracks[self.index]
-        return self.player.play(self.tracks[self.index])
+        if self.shuffle:
+            while self._played:
+                node = self._played.pop()
+                if node.size:
+                    # Stepping forward again returns to the track we left
+                    if self._current is not None:
+                        self._ahead.appendleft(self._current)
+                    self._current = node
+                    self._from_bag(node)
+                    return self._play(node.track)
+        node = self._order.predecessor(self._current) if self._current is not None else None
+        return self._play_node(node or self._order.last())
+
+    def _play_node(self, node):
+        if self.shuffle:
+            if self._current is not None and self._current is not node:
+                self._played.append(self._current)
+            self._from_bag(node)
+            if self._ahead and self._ahead[0] is node:
+                self._ahead.popleft()
+            elif node in self._ahead:
+                self._ahead.remove(node)
+        self._current = node
+        return self._play(node.track)
+
+    def _play(self, track):
+        self.current_track = track
+        self.dry = False
+        with self._prefetch_lock:
+            future = self._prefetch.get(track.get('videoId'))
+        # Reprioritize first so the upcoming window is not stuck behind stale work
+        self._schedule_prefetch()
+        if future is not None and not future.cancelled():
+            # Already being resolved in the background; wait instead of resolving twice
+            try:
+                future.result()
+            except Exception:
+                pass
+        success = self.player.play(track)
+        if success:
+            self._preload_next()
+            add_to_history(track)
+            self.top_up()
+        return success
+
+    # Shuffle bag
+
+    def _reset_shuffle(self):
+        for node in self._bag:
+            node.bag = -1
+        self._bag = []
+        self._ahead.clear()
+        self._played.clear()
+        if self.shuffle:
+            self._to_bag(node for node in self._order.nodes() if node is not self._current)
+
+    def _to_bag(self, nodes):
+        if not self.shuffle:
+            return
+        bag = self._bag
+        for node in nodes:
+            node.bag = len(bag)
+            bag.append(node)
+
+    def _from_bag(self, node):
+        """Take node out of the bag in O(1) by moving the last node into its slot"""
+        if node.bag < 0:
+            return
+        last = self._bag.pop()
+        if last is not node:
+            self._bag[node.bag] = last
+            last.bag = node.bag
+        node.bag = -1
+
+    def _draw(self, wrap):
+        if not self._bag and wrap:
+            # A new round: every track but the ones already lined up
+            lined_up = set(map(id, self._ahead))
+            self._to_bag(
+                node for node in self._order.nodes()
+                if node is not self._current and id(node) not in lined_up
+            )
+        if not self._bag:
+            return None
+        node = self._bag[random.randrange(len(self._bag))]
+        self._from_bag(node)
+        return node
+
+    def _upcoming_nodes(self, count, wrap):
+        """Nodes that play next, nearest first"""
+        if self.shuffle:
+            while len(self._ahead) < count:
+                node = self._draw(wrap)
+                if node is None:
+                    break
+                self._ahead.append(node)
+            if not self._ahead and wrap and self._current is not None:
+                return [self._current]  # The only track in the queue
+            return list(self._ahead)[:count]
+        nodes = []
+        node = self._current
+        while len(nodes) < count:
+            node = self._order.successor(node) if node is not None else self._order.first()
+            if node is None:
+                if not wrap:
+                    break
+                node = self._order.first()
+            if nodes and node is nodes[0] or node is None:
+                break  # Wrapped all the way round
+            nodes.append(node)
+        return nodes
+
+    # Prefetching
+
+    def _upcoming_changed(self):
+        self._schedule_prefetch()
+        self._preload_next()
+        self.top_up()
+
+    def _preload_next(self):
+        """Hand the next track to the player early so it can start gaplessly.
+
+        Also runs on a prefetch thread once the next track is resolved, so it
+        only reads _next_track; working out the order draws from the shuffle
+        bag and walks the tree, which only the owner's thread may do.
+        """
+        track = self._next_track
+        if track is not None and not is_resolved(track.get('videoId')):
+            # Trim what mpv had queued; the prefetch callback appends this once resolved
+            track = None
+        self.player.preload(track)
+
+    def set_prefetch_depth(self, depth):
+        """Change how many upcoming tracks are resolved ahead of time"""
+        self.prefetch_depth = max(0, int(depth))
+        self._schedule_prefetch()
+
+    def upcoming(self, count=None):
+        """Tracks that should be resolved ahead of playback, nearest first"""
+        count = self.prefetch_depth if count is None else count
+        if count <= 0:
+            return []
+        return [node.track for node in self._upcoming_nodes(count, wrap=self.repeat == "all")]
+
+    def _schedule_prefetch(self):
+        upcoming = self.upcoming()
+        if self.repeat == "one" and self.current_track is not None:
+            self._next_track = self.current_track
+        else:
+            self._next_track = upcoming[0] if upcoming else None
+        wanted = [t['videoId'] for t in upcoming if t.get('videoId')]
+        with self._prefetch_lock:
+            # Drop queued work that fell out of the window; running jobs finish into the cache
+            for video_id, future in list(self._prefetch.items()):
+                if video_id not in wanted and (future.cancel() or future.done()):
+                    del self._prefetch[video_id]
+            for video_id in wanted:
+                future = self._prefetch.get(video_id)
+                if future is not None and not future.cancelled():
+                    continue
+                if is_resolved(video_id):
+                    continue
+                future = self._executor.submit(resolve_audio, video_id)
+                if video_id == wanted[0]:
+                    future.add_done_callback(lambda f: self._preload_next())
+                self._prefetch[video_id] = future
+
+    def _cancel_prefetch(self):
+        with self._prefetch_lock:
+            for future in self._prefetch.values():
+                future.cancel()
+            self._prefetch.clear()
+
+    def prefetched(self):
+        """Report the prefetch state of each upcoming track"""
+        with self._prefetch_lock:
+            futures = dict(self._prefetch)
+        status = []
+        for track in self.upcoming():
+            video_id = track.get('videoId')
+            future = futures.get(video_id)
+            if is_resolved(video_id):
+                state = "ready"
+            elif future is None:
+                state = "pending"
+            elif future.running():
+                state = "resolving"
+            elif future.done():
+                state = "failed"
+            else:
+                state = "queued"
+            status.append({'videoId': video_id, 'title': track.get('title'), 'state': state})
+        return status
+
+    def shutdown(self):
+        """Stop background prefetching"""
+        self._cancel_prefetch()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.radio is not None:
+            self.radio.shutdown()
@@ -0,0 +1,128 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.audio_cache import audio_cache
+from app.services.history_manager import get_recent_tracks
+from app.services.search_index import normalize
+from app.services.tracing import span
+from app.services.ytmusic import get_radio_tracks
+
+RADIO_ENABLED = os.environ.get("CPLAYER_RADIO", "0") == "1"
+RADIO_AHEAD = int(os.environ.get("CPLAYER_RADIO_AHEAD", "3"))  # Tracks left when more are fetched
+RADIO_BATCH = 10  # Tracks appended per top-up
+RADIO_SEEDS = 5  # Recent plays tried as seeds after the end of the queue
+HISTORY_WINDOW = 200  # Recent plays that radio tracks must not repeat
+
+
+def _song_key(track):
+    """The same song uploaded twice has different videoIds but the same name"""
+    return normalize(track.get('title', '')), normalize(track.get('artist', ''))
+
+
+class Radio:
+    """Keeps a queue from running dry with tracks related to what was played.
+
+    top_up() is called whenever a track starts. Once only a few tracks are
+    left it fetches YouTube Music's radio for a seed on a worker thread:
+    the last track of the queue first, then recent plays from history.
+    Tracks already in the queue or played recently, by videoId or by title
+    and artist, are dropped. The rest go to on_tracks(tracks, generation)
+    on the worker thread; the owner hands them to Queue.add_radio() on its
+    own thread, where the queue's prefetcher resolves them like any other
+    upcoming track.
+    """
+
+    def __init__(self, on_tracks, enabled=RADIO_ENABLED, ahead=RADIO_AHEAD, batch=RADIO_BATCH):
+        self.on_tracks = on_tracks
+        self.enabled = enabled
+        self.ahead = ahead
+        self.batch = batch
+        self.fetches = 0
+        self.added = 0
+        self.duplicates = 0
+        self.empty = 0
+        self._used_seeds = set()  # Seeds already asked, so each top-up brings new tracks
+        self._generation = None
+        self._pending = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cplayer-radio")
+
+    @property
+    def pending(self):
+        """Whether a top-up is being fetched"""
+        with self._lock:
+            return self._pending is not None and not self._pending.done()
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+
+    def top_up(self, queue):
+        """Start fetching more tracks if the queue is close to its end"""
+        if not self.enabled or audio_cache.offline or not len(queue):
+            # Offline, radio tracks could be neither fetched nor played
+            return False
+        if queue.remaining() > self.ahead:
+            return False
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return False
+            if queue.generation != self._generation:
+                # A new queue: its seeds have not been asked yet
+                self._generation = queue.generation
+                self._used_seeds = set()
+            # Snapshot on the owner's thread; the worker must not read a changing queue
+            tracks = queue.tracks
+            seeds = [t for t in reversed(tracks) if t.get('videoId')][:RADIO_SEEDS]
+            self._pending = self._executor.submit(self._fetch, seeds, tracks, queue.generation)
+        return True
+
+    def _fetch(self, seeds, queued, generation):
+        seen = {t.get('videoId') for t in queued}
+        keys = {_song_key(t) for t in queued}
+        with span("radio.fetch"):
+            recent = get_recent_tracks(HISTORY_WINDOW)
+            seen.update(t.get('videoId') for t in recent)
+            keys.update(_song_key(t) for t in recent)
+            fresh = []
+            for seed in seeds + recent[:RADIO_SEEDS]:
+                video_id = seed.get('videoId')
+                if len(fresh) >= self.batch:
+                    break
+                if audio_cache.offline:
+                    break
+                if not video_id or video_id in self._used_seeds:
+                    continue
+                self._used_seeds.add(video_id)
+                with self._lock:
+                    self.fetches += 1
+                for track in get_radio_tracks(video_id):
+                    key = _song_key(track)
+                    if track['videoId'] in seen or key in keys:
+                        with self._lock:
+                            self.duplicates += 1
+                        continue
+                    seen.add(track['videoId'])
+                    keys.add(key)
+                    fresh.append(track)
+        fresh = fresh[:self.batch]
+        with self._lock:
+            self.added += len(fresh)
+            self.empty += not fresh
+        if fresh:
+            self.on_tracks(fresh, generation)
+        return fresh
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pending': self._pending is not None and not self._pending.done(),
+                'fetches': self.fetches,
+                'added': self.added,
+                'duplicates': self.duplicates,
+                'empty': self.empty,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
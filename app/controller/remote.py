@@ -0,0 +1,310 @@
+import itertools
+import os
+from concurrent.futures import TimeoutError
+
+from app.client import REQUEST_TIMEOUT, connect
+from app.controller.ipc import MpvError
+
+# Mirrored from the daemon; see app.daemon.PROPERTIES
+OBSERVED = ("time-pos", "duration", "volume", "pause", "running", "track", "queue-index", "queue-version")
+
+
+class RemotePlayer:
+    """Player stand-in for a TUI attached to the player daemon.
+
+    Commands are forwarded over the control socket and the attributes the
+    UI reads (time_pos, track, paused, ...) mirror the daemon's property
+    events, so the UI code is the same as for an in-process Player.
+    stop() only detaches: the daemon keeps playing after the TUI exits.
+    """
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+        self.ipc = None
+        self.queue = None
+        self.mode = "daemon"
+        self.track = None
+        self.running = False
+        self.paused = False
+        self.time_pos = 0
+        self.duration = 1
+        self.volume = 100
+        self.spawn_count = 0
+        self.first_audio_count = 0
+
+    def connect(self, instance=None, start=False):
+        self.ipc = connect(instance, start, on_property=self._on_property)
+        if self.ipc is None:
+            return False
+        for name in OBSERVED:
+            self.ipc.observe_property(name)
+        return True
+
+    def _on_property(self, name, value):
+        if name == "time-pos":
+            self.time_pos = value or 0
+        elif name == "duration":
+            self.duration = value or 1
+        elif name == "volume":
+            self.volume = int(value or 100)
+        elif name == "pause":
+            self.paused = bool(value)
+        elif name == "running":
+            self.running = bool(value)
+        elif name == "track":
+            self.track = value
+        elif self.queue is not None:
+            self.queue._on_property(name, value)
+            return
+        self._notify(name)
+
+    def _notify(self, name):
+        if self.on_change:
+            self.on_change(name)
+
+    def call(self, *args, timeout=REQUEST_TIMEOUT):
+        """Run a daemon command and wait for its result; None if it failed"""
+        if self.ipc is None:
+            return None
+        try:
+            return self.ipc.command(*args).result(timeout=timeout)
+        except (MpvError, TimeoutError):
+            return None
+
+    def call_async(self, *args):
+        if self.ipc is not None:
+            return self.ipc.command(*args)
+        return None
+
+    def toggle_pause(self):
+        self.call_async("pause")
+
+    def volume_up(self):
+        self.call_async("volume", 5)
+
+    def volume_down(self):
+        self.call_async("volume", -5)
+
+    def preload(self, track):
+        # The daemon's own queue preloads
+        pass
+
+    def stats(self):
+        return (self.call("stats") or {}).get('player', {'mode': self.mode})
+
+    def stop(self):
+        """Detach from the daemon, leaving it playing"""
+        if self.ipc is not None:
+            self.ipc.close()
+            self.ipc = None
+
+
+class RemoteQueue:
+    """Queue stand-in that keeps a local copy of the daemon's queue.
+
+    Each load, extend or edit is tagged with a version token. When the
+    daemon reports a version this client did not send, e.g. after
+    `cplayer play` from another terminal, the new contents are fetched and
+    "queue" is reported through the player's on_change.
+
+    Commands are sent without waiting, since the daemon may take seconds
+    to resolve a track and the UI thread must not block on it. Edits are
+    applied to the local copy straight away; a failed one brings the
+    daemon's queue back. Replies go to on_reply(command, result), with
+    result None if the command failed, on whichever thread they arrive.
+    """
+
+    def __init__(self, player, on_reply=None):
+        self.player = player
+        self.on_reply = on_reply
+        player.queue = self
+        self.tracks = []
+        self.index = -1
+        self.current_track = None
+        self.prefetch_depth = 0
+        self.shuffle = False
+        self.repeat = "off"
+        self.radio_enabled = False
+        self.version = None
+        self._prefetched = []
+        self._versions = itertools.count(1)
+        # The one synchronous call: the UI starts from the daemon's queue
+        status = player.call("get_queue", timeout=5.0)
+        if status:
+            self._apply(status)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def _new_version(self):
+        self.version = f"{os.getpid()}-{next(self._versions)}"
+        return self.version
+
+    def _apply(self, status):
+        self.tracks = status['tracks']
+        self.version = status['version']
+        self.prefetch_depth = status['prefetch_depth']
+        self.shuffle = status.get('shuffle', False)
+        self.repeat = status.get('repeat', "off")
+        self.radio_enabled = status.get('radio', False)
+        self._set_index(status['index'])
+
+    def _set_index(self, index):
+        self.index = index
+        tracks = self.tracks
+        self.current_track = tracks[index] if 0 <= index < len(tracks) else None
+
+    def _on_property(self, name, value):
+        if name == "queue-index":
+            self._set_index(value)
+            self.player._notify("queue-index")
+        elif name == "queue-version" and value != self.version:
+            # Changed by another client; this runs on the reader thread, so do not wait here
+            self._refetch()
+
+    def _refetch(self):
+        future = self.player.call_async("get_queue")
+        if future is not None:
+            future.add_done_callback(self._on_queue)
+
+    def _on_queue(self, future):
+        try:
+            status = future.result()
+        except MpvError:
+            return
+        self._apply(status)
+        self.player._notify("queue")
+
+    def _send(self, *command, on_result=None):
+        """Send a command without waiting; False if not connected"""
+        future = self.player.call_async(*command)
+        if future is None:
+            return False
+
+        def done(future):
+            try:
+                result = future.result()
+            except MpvError:
+                result = None
+            if on_result is not None:
+                on_result(result)
+            if self.on_reply is not None:
+                self.on_reply(command[0], result)
+
+        future.add_done_callback(done)
+        return True
+
+    def load(self, tracks):
+        self.tracks = list(tracks)
+        self._set_index(-1)
+        self._send("load", self.tracks, self._new_version())
+
+    def extend(self, tracks):
+        self.tracks = self.tracks + list(tracks)
+        self._send("extend", list(tracks), self._new_version())
+
+    def _edit(self, *command):
+        """Send an edit already made to the local copy; if it fails, take the daemon's queue back"""
+        def on_result(result):
+            if not result:
+                self._refetch()
+
+        return self._send(*command, self._new_version(), on_result=on_result)
+
+    def _move_local(self, position, to):
+        tracks = self.tracks = list(self.tracks)
+        tracks.insert(to, tracks.pop(position))
+        index = self.index
+        if index == position:
+            index = to
+        elif index >= 0:
+            index -= position < index
+            index += to <= index
+        self._set_index(index)
+
+    def play_next(self, position):
+        if not 0 <= position < len(self.tracks) or position == self.index:
+            return False
+        index = self.index
+        self._move_local(position, index + (position > index) if index >= 0 else 0)
+        return self._edit("play_next", position)
+
+    def remove(self, position):
+        if not 0 <= position < len(self.tracks) or position == self.index:
+            return False
+        self.tracks = self.tracks[:position] + self.tracks[position + 1:]
+        self._set_index(self.index - (position < self.index))
+        return self._edit("remove", position)
+
+    def move(self, position, to):
+        if not 0 <= position < len(self.tracks):
+            return False
+        to = max(0, min(to, len(self.tracks) - 1))
+        self._move_local(position, to)
+        return self._edit("move", position, to)
+
+    def set_shuffle(self, enabled):
+        previous, self.shuffle = self.shuffle, bool(enabled)
+
+        def on_result(result):
+            self.shuffle = previous if result is None else bool(result)
+
+        self._send("set_shuffle", self.shuffle, on_result=on_result)
+        return self.shuffle
+
+    def set_repeat(self, mode):
+        previous, self.repeat = self.repeat, mode
+
+        def on_result(result):
+            self.repeat = result or previous
+
+        self._send("set_repeat", mode, on_result=on_result)
+        return self.repeat
+
+    def set_radio(self, enabled):
+        previous, self.radio_enabled = self.radio_enabled, bool(enabled)
+
+        def on_result(result):
+            self.radio_enabled = previous if result is None else bool(result)
+
+        self._send("set_radio", self.radio_enabled, on_result=on_result)
+        return self.radio_enabled
+
+    def upcoming(self, count):
+        """The next tracks in queue order; the daemon's shuffle order is not mirrored"""
+        if self.shuffle:
+            return []
+        return self.tracks[self.index + 1:self.index + 1 + count]
+
+    # Playback commands report only whether they were sent; on_reply hears if they failed
+
+    def play_single(self, track):
+        return self._send("play_track", track)
+
+    def next(self):
+        return self._send("next")
+
+    def previous(self):
+        return self._send("previous")
+
+    def set_prefetch_depth(self, depth):
+        self.prefetch_depth = max(0, int(depth))
+
+        def on_result(result):
+            if result is not None:
+                self.prefetch_depth = result
+
+        self._send("set_prefetch_depth", self.prefetch_depth, on_result=on_result)
+
+    def prefetched(self):
+        """The last prefetch states the daemon reported; a fresh report follows through on_reply"""
+        def on_result(result):
+            if result is not None:
+                self._prefetched = result
+
+        self._send("prefetched", on_result=on_result)
+        return self._prefetched
+
+    def shutdown(self):
+        # Prefetching belongs to the daemon and carries on without us
+        pass
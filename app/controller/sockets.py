@@ -0,0 +1,47 @@
+import os
+import socket
+import tempfile
+from pathlib import Path
+
+# Lets several independent players run side by side, e.g. CPLAYER_INSTANCE=work
+INSTANCE = os.environ.get("CPLAYER_INSTANCE", "default")
+
+
+def runtime_dir():
+    """Private per-user directory for cplayer's sockets.
+
+    $XDG_RUNTIME_DIR/cplayer when the session provides one, otherwise
+    a cplayer-<uid> directory in the system temp dir.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        path = Path(base) / "cplayer"
+    else:
+        path = Path(tempfile.gettempdir()) / f"cplayer-{os.getuid()}"
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if path.stat().st_uid != os.getuid():
+        # Someone else created it first in a shared /tmp
+        raise PermissionError(f"{path} is not owned by the current user")
+    return path
+
+
+def control_socket(instance=None):
+    """Socket the player daemon of an instance listens on"""
+    return str(runtime_dir() / f"{instance or INSTANCE}.sock")
+
+
+def mpv_socket():
+    """IPC socket for the mpv driven by this process"""
+    return str(runtime_dir() / f"mpv-{os.getpid()}.sock")
+
+
+def is_listening(path):
+    """Whether something accepts connections on the Unix socket at path"""
+    probe = socket.socket(socket.AF_UNIX)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
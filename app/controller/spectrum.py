@@ -0,0 +1,257 @@
+import shutil
+import subprocess
+import threading
+import time
+
+from app.services.audio_cache import audio_cache
+from app.services.resolver import resolve_audio
+
+np = None  # Imported on first use so start-up does not pay for it
+
+SAMPLE_RATE = 22050
+FRAME_RATE = 20  # Spectrum frames per second
+HOP_SAMPLES = SAMPLE_RATE // FRAME_RATE
+HOP_SECONDS = HOP_SAMPLES / SAMPLE_RATE
+FFT_SIZE = 2048
+BAR_COUNT = 22
+MIN_FREQ = 40
+MAX_FREQ = 10000
+FLOOR_DB = -60.0  # Levels at or below this render as empty bars
+DECAY = 0.82  # Per-frame fall-off of a bar once the signal drops
+DRIFT_LIMIT = 1.5  # Seconds the tap may lag or lead mpv before it re-seeks
+DRIFT_CHECK_EVERY = FRAME_RATE * 2  # Frames between drift checks
+CACHE_POLL = 0.25  # Seconds between checks on a download the tap waits for
+
+
+def _load_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+_available = None  # Set once probe() has run
+
+
+def probe():
+    """Whether a PCM tap can run: needs ffmpeg on PATH and NumPy.
+
+    Searching PATH and importing NumPy take a while, so this runs once, off
+    the UI thread; available() then only reads the answer.
+    """
+    global _available
+    if _available is None:
+        _available = shutil.which("ffmpeg") is not None and _load_numpy()
+    return _available
+
+
+def available():
+    """The answer of probe(), or None while it has not run"""
+    return _available
+
+
+class SpectrumAnalyzer:
+    """Windowed FFT over the newest samples, folded into log-spaced bars"""
+
+    def __init__(self, bars=BAR_COUNT, size=FFT_SIZE, rate=SAMPLE_RATE):
+        self.size = size
+        self.samples = np.zeros(size, dtype=np.float32)  # Bounded ring of recent PCM
+        self.window = np.hanning(size).astype(np.float32)
+        self.scale = 2.0 / self.window.sum()  # Full-scale sine -> 0 dB
+        self.levels = np.zeros(bars, dtype=np.float32)
+
+        freqs = np.fft.rfftfreq(size, 1.0 / rate)
+        edges = np.searchsorted(freqs, np.geomspace(MIN_FREQ, MAX_FREQ, bars + 1))
+        # Low bars are narrower than one FFT bin; give every bar at least one
+        edges = np.maximum.accumulate(np.maximum(edges, edges[0] + np.arange(bars + 1)))
+        self.first_bin = edges[0]
+        self.last_bin = edges[-1]
+        self.bar_starts = edges[:-1] - edges[0]
+
+    def push(self, pcm):
+        """Append signed 16-bit mono PCM bytes, keeping only the newest size samples"""
+        new = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        n = len(new)
+        if n >= self.size:
+            self.samples[:] = new[-self.size:]
+        elif n:
+            self.samples[:-n] = self.samples[n:]
+            self.samples[-n:] = new
+
+    def analyze(self):
+        """Update and return the smoothed bar levels in 0..1"""
+        spectrum = np.abs(np.fft.rfft(self.samples * self.window))
+        peaks = np.maximum.reduceat(spectrum[self.first_bin:self.last_bin], self.bar_starts)
+        db = 20.0 * np.log10(peaks * self.scale + 1e-9)
+        target = np.clip((db - FLOOR_DB) / -FLOOR_DB, 0.0, 1.0)
+        # Rise at once, fall off gradually
+        np.maximum(target, self.levels * DECAY, out=self.levels)
+        return self.levels
+
+    def reset(self):
+        self.samples[:] = 0
+        self.levels[:] = 0
+
+
+class SpectrumTap:
+    """Decodes the playing audio a second time with ffmpeg to read its PCM.
+
+    mpv has no way to hand its decoded audio to another process, so the tap
+    runs ffmpeg from the player's position, reads its output at real-time
+    speed, analyzes the samples on its own thread and publishes bar levels.
+    It decodes the audio cache's copy of the track when there is one, and
+    waits for a download in progress rather than fetching the stream a
+    second time. While paused the reader stops and ffmpeg blocks on the
+    full pipe, so resuming needs no new process. If the tap drifts away
+    from mpv it seeks again. levels() is None whenever no tap is running.
+    """
+
+    def __init__(self, position=None):
+        self.position = position  # Callable returning mpv's time-pos
+        self.video_id = None
+        self._levels = None
+        self._stop = None
+        self._thread = None
+        self._proc = None
+        self._playing = threading.Event()
+        self._lock = threading.Lock()
+
+    def levels(self):
+        return self._levels
+
+    def follow(self, video_id):
+        """Tap video_id from the current position; resumes it if it is already tapped"""
+        self._playing.set()
+        if video_id == self.video_id and self._thread is not None and self._thread.is_alive():
+            return
+        self.stop()
+        if available() is False:
+            return
+        self.video_id = video_id
+        self._stop = stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(video_id, stop), name="cplayer-spectrum", daemon=True
+        )
+        self._thread.start()
+
+    def pause(self):
+        """Hold the tap where it is until follow() is called for the same track"""
+        self._playing.clear()
+
+    def stop(self):
+        self.video_id = None
+        self._levels = None
+        with self._lock:
+            if self._stop is not None:
+                self._stop.set()
+                self._stop = None
+            self._thread = None
+            self._kill()
+        # Wake a paused reader so it sees the stop
+        self._playing.set()
+
+    def _kill(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=1.0)
+            except Exception:
+                pass
+            self._proc = None
+
+    def _spawn(self, url, start, stop):
+        with self._lock:
+            if stop.is_set():
+                return None
+            self._proc = subprocess.Popen(
+                [
+                    "ffmpeg", "-nostdin", "-loglevel", "quiet",
+                    "-ss", f"{start:.2f}", "-i", url,
+                    "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-",
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            return self._proc
+
+    def _current_position(self):
+        try:
+            return float(self.position()) if self.position else 0.0
+        except Exception:
+            return 0.0
+
+    def _source(self, video_id, stop):
+        """The cached file for video_id, else its stream URL.
+
+        A track that is still being downloaded into the audio cache is
+        waited for, so the stream is not fetched a second time.
+        """
+        while audio_cache.downloading(video_id):
+            if stop.wait(CACHE_POLL):
+                return None
+        return resolve_audio(video_id)
+
+    def _run(self, video_id, stop):
+        if not probe():
+            return
+        url = self._source(video_id, stop)
+        if not url:
+            return
+        analyzer = SpectrumAnalyzer()
+        hop_bytes = HOP_SAMPLES * 2
+        start = self._current_position()
+
+        while not stop.is_set():
+            proc = self._spawn(url, start, stop)
+            if proc is None:
+                break
+            analyzer.reset()
+            frames = 0
+            resync = False
+            due = time.monotonic()
+            while not stop.is_set():
+                if not self._playing.is_set():
+                    # Paused: ffmpeg blocks once the pipe is full
+                    self._playing.wait()
+                    due = time.monotonic()
+                    continue
+                pcm = proc.stdout.read(hop_bytes)
+                if not pcm:
+                    break
+                analyzer.push(pcm)
+                levels = analyzer.analyze().tolist()
+                if stop.is_set():
+                    break
+                self._levels = levels
+                frames += 1
+                # Keep to real time; ffmpeg decodes as fast as the pipe allows
+                due += HOP_SECONDS
+                delay = due - time.monotonic()
+                if delay > 0 and stop.wait(delay):
+                    break
+                if frames % DRIFT_CHECK_EVERY == 0:
+                    tapped = start + frames * HOP_SAMPLES / SAMPLE_RATE
+                    position = self._current_position()
+                    if abs(tapped - position) > DRIFT_LIMIT:
+                        start, resync = position, True
+                        break
+                    if url.startswith("http") and audio_cache.has(video_id):
+                        # The download finished: carry on from the local copy
+                        url = resolve_audio(video_id) or url
+                        start, resync = tapped, True
+                        break
+            with self._lock:
+                if self._proc is proc:
+                    self._kill()
+            proc.stdout.close()
+            if not resync:
+                break
+
+        if self._stop is stop:
+            # The stream ended on its own
+            self._levels = None
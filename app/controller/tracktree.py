@@ -0,0 +1,231 @@
+import random
+
+from app.track import Track
+
+
+class Node:
+    """A track's place in a TrackTree; stays valid while the track moves around"""
+
+    __slots__ = ("track", "left", "right", "parent", "size", "bag")
+
+    def __init__(self, track):
+        self.track = track
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.size = 1  # Nodes in this subtree; 0 once removed from the tree
+        self.bag = -1  # Slot in the queue's shuffle bag, -1 when not in it
+
+
+def _resize(node):
+    node.size = 1 + (node.left.size if node.left else 0) + (node.right.size if node.right else 0)
+
+
+def _split(node, count):
+    """Split off the first count nodes: (first, rest)"""
+    if node is None:
+        return None, None
+    left_size = node.left.size if node.left else 0
+    if count <= left_size:
+        first, rest = _split(node.left, count)
+        node.left = rest
+        if rest is not None:
+            rest.parent = node
+        _resize(node)
+        return first, node
+    first, rest = _split(node.right, count - left_size - 1)
+    node.right = first
+    if first is not None:
+        first.parent = node
+    _resize(node)
+    return node, rest
+
+
+def _merge(a, b):
+    """Join two trees, every node of a before every node of b"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    # The root comes from a or b in proportion to their sizes, which keeps
+    # the tree balanced without storing a priority per node
+    if random.random() * (a.size + b.size) < a.size:
+        a.right = _merge(a.right, b)
+        a.right.parent = a
+        _resize(a)
+        return a
+    b.left = _merge(a, b.left)
+    b.left.parent = b
+    _resize(b)
+    return b
+
+
+def _build(nodes, lo, hi):
+    """A balanced tree over nodes[lo:hi] in O(n)"""
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = nodes[mid]
+    node.left = _build(nodes, lo, mid)
+    node.right = _build(nodes, mid + 1, hi)
+    for child in (node.left, node.right):
+        if child is not None:
+            child.parent = node
+    node.size = hi - lo
+    return node
+
+
+class TrackTree:
+    """Tracks in queue order, with positions found and changed in O(log n).
+
+    A randomized binary search tree ordered by position, where each node
+    counts its subtree and merges pick their root at random, weighted by
+    subtree size, so it stays balanced like a treap. Inserting or
+    removing anywhere is a split and a merge, a node's position is summed
+    on the way up to the root, and the node at a position is found on the
+    way down. Nodes also stay the handle for a track while tracks before
+    it come and go, and a videoId index finds them in O(1).
+    """
+
+    def __init__(self, tracks=()):
+        self.root = None
+        self._by_id = {}  # videoId -> node, or a list of nodes if the videoId repeats
+        if tracks:
+            self.insert(0, tracks)
+
+    def __len__(self):
+        return self.root.size if self.root is not None else 0
+
+    def __iter__(self):
+        for node in self.nodes():
+            yield node.track
+
+    def nodes(self):
+        """Every node in order"""
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    def _index(self, node):
+        video_id = node.track.videoId
+        known = self._by_id.get(video_id)
+        if known is None:
+            self._by_id[video_id] = node
+        elif type(known) is list:
+            known.append(node)
+        else:
+            self._by_id[video_id] = [known, node]
+
+    def _unindex(self, node):
+        video_id = node.track.videoId
+        known = self._by_id.get(video_id)
+        if known is node:
+            del self._by_id[video_id]
+        elif type(known) is list:
+            known.remove(node)
+            if len(known) == 1:
+                self._by_id[video_id] = known[0]
+
+    def find(self, video_id):
+        """The first node playing video_id, or None"""
+        known = self._by_id.get(video_id)
+        if type(known) is list:
+            return min(known, key=self.rank)
+        return known
+
+    def node_at(self, position):
+        """The node at position, or None if out of range"""
+        if not 0 <= position < len(self):
+            return None
+        node = self.root
+        while True:
+            left_size = node.left.size if node.left else 0
+            if position < left_size:
+                node = node.left
+            elif position == left_size:
+                return node
+            else:
+                position -= left_size + 1
+                node = node.right
+
+    def rank(self, node):
+        """Position of node"""
+        position = node.left.size if node.left else 0
+        while node.parent is not None:
+            parent = node.parent
+            if node is parent.right:
+                position += (parent.left.size if parent.left else 0) + 1
+            node = parent
+        return position
+
+    def first(self):
+        node = self.root
+        while node is not None and node.left is not None:
+            node = node.left
+        return node
+
+    def last(self):
+        node = self.root
+        while node is not None and node.right is not None:
+            node = node.right
+        return node
+
+    def successor(self, node):
+        if node.right is not None:
+            node = node.right
+            while node.left is not None:
+                node = node.left
+            return node
+        while node.parent is not None and node is node.parent.right:
+            node = node.parent
+        return node.parent
+
+    def predecessor(self, node):
+        if node.left is not None:
+            node = node.left
+            while node.right is not None:
+                node = node.right
+            return node
+        while node.parent is not None and node is node.parent.left:
+            node = node.parent
+        return node.parent
+
+    def insert(self, position, tracks):
+        """Insert tracks before position; returns their nodes"""
+        nodes = [Node(Track.of(t)) for t in tracks]
+        if not nodes:
+            return nodes
+        for node in nodes:
+            self._index(node)
+        self._attach(max(0, min(position, len(self))), _build(nodes, 0, len(nodes)))
+        return nodes
+
+    def _attach(self, position, subtree):
+        before, after = _split(self.root, position)
+        self.root = _merge(_merge(before, subtree), after)
+        self.root.parent = None
+
+    def _detach(self, node):
+        before, rest = _split(self.root, self.rank(node))
+        _, after = _split(rest, 1)
+        self.root = _merge(before, after)
+        if self.root is not None:
+            self.root.parent = None
+        node.left = node.right = node.parent = None
+
+    def remove(self, node):
+        self._detach(node)
+        self._unindex(node)
+        node.size = 0
+
+    def move(self, node, position):
+        """Move node to position (counted without it)"""
+        self._detach(node)
+        node.size = 1
+        self._attach(max(0, min(position, len(self))), node)
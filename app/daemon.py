@@ -0,0 +1,404 @@
+import json
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.controller.player import Player
+from app.controller.queue import Queue
+from app.controller.radio import Radio
+from app.controller.sockets import control_socket, is_listening
+from app.services.audio_cache import audio_cache
+from app.services.library import library
+from app.services.resolver import cache_stats
+from app.services.tracing import tracer
+from app.services.ytmusic import search_tracks, get_watch_song, get_playlist_songs
+from app.services.ytmusic_client import ytmusic_client
+
+# Properties clients can observe; values are pushed as mpv-style property-change events
+PROPERTIES = ("time-pos", "duration", "volume", "pause", "running", "track", "queue-index", "queue-version")
+
+
+class _Client:
+    """One connected TUI or CLI and the properties it observes"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.observed = set()
+        self._send_lock = threading.Lock()
+
+    def send(self, msg):
+        payload = msg if isinstance(msg, bytes) else (json.dumps(msg) + "\n").encode()
+        try:
+            with self._send_lock:
+                self.sock.sendall(payload)
+        except OSError:
+            pass
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class PlayerDaemon:
+    """Owns the player, queue, caches and prefetcher outside of any terminal.
+
+    Clients talk to it over a Unix socket with the same line-delimited JSON
+    as mpv's IPC: {"command": [...], "request_id": n} is answered with
+    {"request_id": n, "error": "success", "data": ...}, and observed
+    properties arrive as property-change events. That lets the TUI and the
+    CLI reuse MpvIPC as their client.
+
+    Commands run one at a time on a single control thread, which plays the
+    part the UI thread plays for an in-process Player, so the player and
+    queue are never driven from two threads at once.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or control_socket()
+        self.player = Player(self._on_track_end, on_change=self._on_change)
+        self.queue = Queue(self.player, radio=Radio(self._on_radio_tracks))
+        # Token of the current queue contents; lets clients notice changes made by others
+        self.queue_version = "daemon-0"
+        self._loads = 0
+        self._control = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cplayer-control")
+        self._clients = set()
+        self._clients_lock = threading.Lock()
+        self._server = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Bind the control socket and start accepting clients"""
+        if is_listening(self.path):
+            raise RuntimeError(f"a player daemon is already listening on {self.path}")
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        server = socket.socket(socket.AF_UNIX)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        server.listen()
+        self._server = server
+        threading.Thread(target=self._accept_loop, name="cplayer-daemon", daemon=True).start()
+        return self
+
+    def wait(self):
+        self._stopped.wait()
+
+    def stop(self):
+        """Stop playback, disconnect every client and remove the socket"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.close()
+        try:
+            self._control.submit(self._teardown).result(timeout=5.0)
+        except Exception:
+            pass
+        self._control.shutdown(wait=False, cancel_futures=True)
+
+    def _teardown(self):
+        self.queue.shutdown()
+        audio_cache.shutdown()
+        self.player.stop()
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            client = _Client(conn)
+            with self._clients_lock:
+                self._clients.add(client)
+            threading.Thread(
+                target=self._serve_client, args=(client,), name="cplayer-daemon-client", daemon=True
+            ).start()
+
+    def _serve_client(self, client):
+        buffer = b""
+        try:
+            while True:
+                data = client.sock.recv(65536)
+                if not data:
+                    return
+                buffer += data
+                while True:
+                    newline = buffer.find(b"\n")
+                    if newline < 0:
+                        break
+                    line, buffer = buffer[:newline], buffer[newline + 1:]
+                    if line.strip():
+                        self._handle(client, line)
+        except OSError:
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients.discard(client)
+            client.sock.close()
+
+    def _handle(self, client, line):
+        try:
+            msg = json.loads(line)
+            args = list(msg["command"])
+            request_id = msg.get("request_id")
+        except (ValueError, KeyError, TypeError):
+            return
+
+        def reply(future):
+            try:
+                response = {"request_id": request_id, "error": "success", "data": future.result()}
+            except Exception as e:
+                response = {"request_id": request_id, "error": str(e) or type(e).__name__}
+            client.send(response)
+
+        if args and args[0] == "observe_property" and len(args) == 3:
+            # Answered here rather than on the control thread, like mpv, with the current value
+            name = args[2]
+            if name not in PROPERTIES:
+                client.send({"request_id": request_id, "error": "property not found"})
+                return
+            client.observed.add(name)
+            client.send({"request_id": request_id, "error": "success", "data": None})
+            client.send({"event": "property-change", "name": name, "data": self._property(name)})
+            return
+
+        if args == ["quit"]:
+            # Answered first, since stop() closes this connection and waits for the control thread
+            client.send({"request_id": request_id, "error": "success", "data": True})
+            threading.Thread(target=self.stop, name="cplayer-daemon-stop").start()
+            return
+
+        try:
+            future = self._control.submit(self._execute, args)
+        except RuntimeError:
+            # Shutting down
+            client.send({"request_id": request_id, "error": "daemon is stopping"})
+            return
+        # Long commands like play do not hold up this client's other requests
+        future.add_done_callback(reply)
+
+    def _execute(self, args):
+        if not args:
+            raise ValueError("empty command")
+        handler = getattr(self, "_cmd_" + str(args[0]).replace("-", "_"), None)
+        if handler is None:
+            raise ValueError(f"unknown command {args[0]}")
+        return handler(*args[1:])
+
+    def _property(self, name):
+        player = self.player
+        values = {
+            "time-pos": lambda: player.time_pos,
+            "duration": lambda: player.duration,
+            "volume": lambda: player.volume,
+            "pause": lambda: player.paused,
+            "running": lambda: player.running,
+            "track": lambda: dict(player.track) if player.track else None,
+            "queue-index": lambda: self.queue.index,
+            "queue-version": lambda: self.queue_version,
+        }
+        if name not in values:
+            raise ValueError("property not found")
+        return values[name]()
+
+    def _broadcast(self, *names):
+        with self._clients_lock:
+            clients = list(self._clients)
+        for name in names:
+            watching = [c for c in clients if name in c.observed]
+            if not watching:
+                continue
+            payload = (json.dumps({"event": "property-change", "name": name, "data": self._property(name)}) + "\n").encode()
+            for client in watching:
+                client.send(payload)
+
+    def _on_change(self, name):
+        if name == "track":
+            # The queue moves its index just before it starts the track
+            self._broadcast("queue-index", "track")
+        else:
+            self._broadcast(name)
+
+    def _on_track_end(self):
+        # Called on mpv's IPC thread, which must not wait on yt-dlp
+        try:
+            self._control.submit(self._advance)
+        except RuntimeError:
+            pass
+
+    def _advance(self):
+        """Autoplay the next track; the daemon does this whether or not a TUI is attached"""
+        self.queue.advance()
+
+    def _on_radio_tracks(self, tracks, generation):
+        # Called on the radio's thread; the queue belongs to the control thread
+        try:
+            self._control.submit(self._add_radio, tracks, generation)
+        except RuntimeError:
+            pass
+
+    def _add_radio(self, tracks, generation):
+        if self.queue.add_radio(tracks, generation):
+            self._queue_changed(None)
+
+    def _queue_changed(self, version):
+        if version is None:
+            self._loads += 1
+            version = f"daemon-{self._loads}"
+        self.queue_version = str(version)
+        self._broadcast("queue-index", "queue-version")
+        return self.queue_version
+
+    # Commands
+
+    def _cmd_get_property(self, name):
+        return self._property(name)
+
+    def _cmd_status(self):
+        return {
+            **{name: self._property(name) for name in PROPERTIES},
+            "queue-length": len(self.queue),
+            "mode": self.player.mode,
+            "offline": audio_cache.offline,
+            "radio": self.queue.radio.enabled,
+            "shuffle": self.queue.shuffle,
+            "repeat": self.queue.repeat,
+        }
+
+    def _cmd_get_queue(self):
+        return {
+            "version": self.queue_version,
+            "index": self.queue.index,
+            "prefetch_depth": self.queue.prefetch_depth,
+            "shuffle": self.queue.shuffle,
+            "repeat": self.queue.repeat,
+            "radio": self.queue.radio.enabled,
+            "tracks": [dict(t) for t in self.queue.tracks],
+        }
+
+    def _cmd_load(self, tracks, version=None):
+        self.queue.load(tracks)
+        return self._queue_changed(version)
+
+    def _cmd_extend(self, tracks, version=None):
+        self.queue.extend(tracks)
+        return self._queue_changed(version)
+
+    def _cmd_play_next(self, position, version=None):
+        if not self.queue.play_next(position):
+            return False
+        return self._queue_changed(version)
+
+    def _cmd_remove(self, position, version=None):
+        if not self.queue.remove(position):
+            return False
+        return self._queue_changed(version)
+
+    def _cmd_move(self, position, to, version=None):
+        if not self.queue.move(position, to):
+            return False
+        return self._queue_changed(version)
+
+    def _cmd_play_track(self, track):
+        return self.queue.play_single(track)
+
+    def _find_tracks(self, query):
+        """Tracks for a search query, a watch URL or a playlist URL"""
+        if audio_cache.offline:
+            return [t for t in library.find_tracks(query) if audio_cache.has(t.get('videoId'))]
+        if "list=" in query or "playlist" in query:
+            return get_playlist_songs(query)
+        if "watch?v=" in query or "youtu.be/" in query:
+            song = get_watch_song(query)
+            return [song] if song else []
+        return search_tracks(query)
+
+    def _cmd_play_query(self, query):
+        """Queue what query finds and play the first track"""
+        tracks = self._find_tracks(query)
+        if not tracks:
+            raise ValueError("no results found")
+        self._cmd_load(tracks)
+        if not self.queue.next():
+            raise ValueError("failed to load track")
+        return {"track": dict(self.queue.current_track), "count": len(tracks)}
+
+    def _cmd_next(self):
+        return self.queue.next()
+
+    def _cmd_previous(self):
+        return self.queue.previous()
+
+    def _cmd_pause(self):
+        self.player.toggle_pause()
+        return True
+
+    def _cmd_volume(self, step):
+        if step > 0:
+            self.player.volume_up()
+        elif step < 0:
+            self.player.volume_down()
+        # The observed volume still holds the old value until mpv reports the change
+        return self.player.read_volume()
+
+    def _cmd_stop(self):
+        self.player.stop()
+        return True
+
+    def _cmd_set_prefetch_depth(self, depth):
+        self.queue.set_prefetch_depth(depth)
+        return self.queue.prefetch_depth
+
+    def _cmd_prefetched(self):
+        return self.queue.prefetched()
+
+    def _cmd_set_radio(self, enabled):
+        return self.queue.set_radio(enabled)
+
+    def _cmd_set_shuffle(self, enabled):
+        return self.queue.set_shuffle(enabled)
+
+    def _cmd_set_repeat(self, mode):
+        return self.queue.set_repeat(mode)
+
+    def _cmd_set_offline(self, offline):
+        audio_cache.set_offline(offline)
+        return audio_cache.offline
+
+    def _cmd_stats(self):
+        return {
+            'summary': tracer.summary(),
+            'player': self.player.stats(),
+            'url_cache': cache_stats(),
+            'audio_cache': audio_cache.stats(),
+            'ytmusic': ytmusic_client.stats(),
+            'radio': self.queue.radio.stats(),
+        }
+
+
+def serve(instance=None):
+    """Run a daemon in the foreground until it is told to quit or signalled"""
+    daemon = PlayerDaemon(control_socket(instance)).start()
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    signal.signal(signal.SIGINT, lambda *_: daemon.stop())
+    # Keep playing when the terminal that started it goes away
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    daemon.wait()
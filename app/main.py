@@ -1,19 +1,69 @@
+import time
+
 from textual.app import App, ComposeResult
-from textual.widgets import Header, Footer, Input, ListView, ListItem, Label, ProgressBar
+from textual.widgets import Header, Footer, Input, Label, ProgressBar
 from textual.containers import Horizontal, Vertical
-from textual import events
+from textual import events, work
+from textual.message import Message
+from textual.worker import get_current_worker
 
 from app.ui.banner import Banner
 from app.ui.visualizer import Visualizer
 from app.ui.panels import MetadataPanel, format_time
+from app.ui.tracklist import TrackList
+from app.ui.suggestions import Suggestions
+from app.ui.scheduler import FrameScheduler
 from app.controller.player import Player
-from app.controller.queue import Queue
-from app.services.ytmusic import search_tracks, get_random_songs, get_playlist_songs, get_watch_song
+from app.controller.queue import Queue, REPEAT_MODES
+from app.controller.radio import Radio
+from app.controller.remote import RemotePlayer, RemoteQueue
+from app.services.ytmusic import (
+    search_tracks, get_random_songs, iter_playlist_pages, get_watch_song, load_trending_snapshot
+)
 from app.services.playlist_manager import save_playlist, load_playlist, list_playlists
-from app.services.history_manager import add_to_history, get_recent_tracks
+from app.services.history_manager import get_recent_tracks
+from app.services.audio_cache import audio_cache
+from app.services.art_cache import art_cache, available as art_available
+from app.services.library import library
+from app.services.search_index import search_index
+from app.services.suggestions import SUGGEST_DEBOUNCE, suggestion_cache
+from app.services.resolver import cache_stats
+from app.services.tracing import tracer
+from app.services.ytmusic_client import ytmusic_client
+
+
+ART_PREFETCH = 3  # Upcoming tracks whose album art is loaded ahead
+# Status shown when a command sent to the daemon fails
+DAEMON_FAILURES = {
+    "play_track": "Failed to load track",
+    "next": "No next track",
+    "previous": "No previous track",
+    "play_next": "Queue changed elsewhere",
+    "remove": "Queue changed elsewhere",
+    "move": "Queue changed elsewhere",
+}
 
 
 class CPlayer(App):
+    class TrackEnded(Message):
+        """mpv finished a file; posted from the player's IPC thread"""
+
+    class DaemonReply(Message):
+        """A daemon command sent by the attached queue finished; result is None if it failed"""
+
+        def __init__(self, command, result):
+            super().__init__()
+            self.command = command
+            self.result = result
+
+    class RadioTracks(Message):
+        """Related tracks for the end of the queue; posted from the radio's thread"""
+
+        def __init__(self, tracks, generation):
+            super().__init__()
+            self.tracks = tracks
+            self.generation = generation
+
     CSS = """
     Screen { 
         background: #0d0d0d; 
@@ -33,30 +83,26 @@ class CPlayer(App):
         border: solid #818cf8;
     }
     
-    ListView { 
+    TrackList { 
         border: solid #6366f1; 
         padding: 1;
         height: 1fr;
         background: #16162a;
     }
     
-    ListView:focus {
+    TrackList:focus {
         border: solid #818cf8;
     }
     
-    ListItem:hover {
+    TrackList > .tracklist--cursor {
         background: #1e1e3f;
     }
     
-    ListItem.--playing {
+    TrackList > .tracklist--playing {
         background: #2d2d5f;
         color: #fbbf24;
     }
     
-    ListItem.--playing:hover {
-        background: #3a3a7f;
-    }
-    
     .main-container {
         height: 1fr;
     }
@@ -198,13 +244,21 @@ class CPlayer(App):
     }
     """
 
+    def __init__(self, attach=False, start_daemon=False, instance=None):
+        super().__init__()
+        # With attach, playback is left to the player daemon and this is only a client
+        self.attach = attach or start_daemon
+        self.start_daemon = start_daemon
+        self.instance = instance
+
     def compose(self) -> ComposeResult:
         yield Header()
         yield Banner()
         yield Input(placeholder="Search YouTube Music… (Commands: :save <name>, :load <name>, :playlists, :history)")
+        yield Suggestions(id="suggestions")
 
         with Horizontal(classes="main-container"):
-            yield ListView(id="results")
+            yield TrackList(id="results")
             yield Vertical(classes="spacer")
 
             with Vertical(classes="side-panels"):
@@ -220,21 +274,64 @@ class CPlayer(App):
         yield Footer()
 
     def on_mount(self):
-        self.player = Player(self.on_track_end)
-        self.queue = Queue(self.player)
+        # Player state changes arrive from the IPC thread and are repainted
+        # at most once per frame; nothing runs while playback is idle
+        self.frames = FrameScheduler()
+        self.frames.start()
+        self.frames.register("time-pos", self.update_progress)
+        self.frames.register("duration", self.update_progress)
+        self.frames.register("volume", self.update_volume)
+        self.frames.register("pause", self.update_playback_state)
+        self.frames.register("running", self.update_playback_state)
+        self.frames.register("track", self.update_playback_state)
+        self.frames.register("track", self.show_now_playing)
+        self.frames.register("queue-index", self.highlight_current_track)
+        self.frames.register("queue", self.show_daemon_queue)
+
+        self.attached = False
+        if self.attach:
+            player = RemotePlayer(on_change=self.frames.mark)
+            if player.connect(self.instance, start=self.start_daemon):
+                self.player = player
+                # post_message is thread-safe; replies arrive on the IPC reader thread
+                self.queue = RemoteQueue(
+                    player, on_reply=lambda command, result: self.post_message(self.DaemonReply(command, result))
+                )
+                self.attached = True
+        if not self.attached:
+            # post_message is thread-safe, so autoplay runs on the UI thread
+            self.player = Player(lambda: self.post_message(self.TrackEnded()), on_change=self.frames.mark)
+            radio = Radio(lambda tracks, generation: self.post_message(self.RadioTracks(tracks, generation)))
+            self.queue = Queue(self.player, radio=radio)
         self.visualizer.attach_player(self.player)
-        self.set_interval(0.3, self.update_progress)
+        self.progress_bar = self.query_one("#progress", ProgressBar)
+        self.time_label = self.query_one("#time_label", Label)
+        self.volume_label = self.query_one("#volume-display", Label)
+        self._shown_progress = None
+        self._shown_volume = None
+        # Give the bar a total so it does not run its indeterminate animation
+        self.update_progress()
         self.volume_display_timer = None
         self.search_history = []
+        self.results_generation = 0  # Bumped whenever the list is given new results
         self.history_index = -1
+        self.suggest_timer = None
         self.current_icon = "○"  # Default icon
+        self.interactive_at = None  # perf_counter() of the first rendered frame
         
         # Initialize integrated status display
         self.update_status("Ready")
-        self.update_volume_display(100)
+        self.update_volume_display(self.player.volume)
         
-        # Load random songs on startup
-        self.load_random_songs()
+        if self.attached and len(self.queue):
+            # Pick up where the daemon is instead of replacing its queue
+            self.show_daemon_queue()
+            self.show_now_playing()
+        else:
+            # Load random songs on startup
+            self.load_random_songs()
+        self.build_search_index()
+        self.call_after_refresh(self._mark_interactive)
     
     def update_status(self, main_message, secondary_message="", icon=None):
         """Update the integrated status display in metadata panel"""
@@ -249,8 +346,16 @@ class CPlayer(App):
     
     def update_volume_display(self, volume):
         """Update volume display in metadata panel"""
-        volume_display = self.query_one("#metadata_panel").query_one("#volume-display", Label)
-        volume_display.update(f"[dim]Volume: {volume}%[/dim]")
+        if volume == self._shown_volume:
+            return
+        self._shown_volume = volume
+        self.volume_label.update(f"[dim]Volume: {volume}%[/dim]")
+
+    def update_volume(self):
+        self.update_volume_display(self.player.volume)
+
+    def update_playback_state(self):
+        self.visualizer.set_active(self.player.running and not self.player.paused)
     
     def show_volume_temporarily(self):
         """Show volume indicator temporarily in metadata panel"""
@@ -259,36 +364,249 @@ class CPlayer(App):
         self.volume_display_timer = self.set_timer(2.0, lambda: self.update_volume_display(self.player.volume))
     
     def load_random_songs(self):
-        """Load random/trending songs into the list on startup"""
-        lv = self.query_one("#results", ListView)
-        
-        self.update_status("Loading trending songs...", "Please wait...")
-        
+        """Show the cached trending list at once, then refresh it in the background"""
+        if audio_cache.offline:
+            self.show_offline_tracks()
+            return
+        tracks = load_trending_snapshot()
+        if tracks:
+            self._new_results()
+            self.queue.load(tracks)
+            self.show_tracks(tracks)
+            self.update_status(f"Ready - {len(tracks)} songs", "Refreshing trending...")
+        else:
+            self.update_status("Loading trending songs...", "Please wait...")
+        self.refresh_trending(bool(tracks))
+
+    @work(thread=True, exclusive=True, group="tracks", exit_on_error=False)
+    def refresh_trending(self, have_snapshot):
+        """Fetch live charts; a search started meanwhile cancels this worker"""
+        worker = get_current_worker()
         tracks = get_random_songs()
         if tracks:
+            self.call_from_thread(self._apply_trending, worker, tracks)
+        elif not have_snapshot:
+            self.call_from_thread(self._apply_results, worker, None, ("Ready", "Failed to load trending songs"))
+
+    def _apply_trending(self, worker, tracks):
+        if worker.is_cancelled or self.queue.index != -1:
+            # The user already searched or started playing from the snapshot
+            return
+        self._apply_results(worker, tracks, (f"Ready - {len(tracks)} songs", f"Volume: {self.player.volume}%"))
+
+    def playable(self, tracks):
+        """In offline mode, keep only the tracks that are in the audio cache"""
+        if not audio_cache.offline:
+            return tracks
+        return [t for t in tracks if audio_cache.has(t.get('videoId'))]
+
+    def offline_tracks(self):
+        """Cached tracks, most recently played first"""
+        seen = set()
+        tracks = []
+        for track in get_recent_tracks(1000) + library.all_tracks():
+            video_id = track.get('videoId')
+            if video_id not in seen and audio_cache.has(video_id):
+                seen.add(video_id)
+                tracks.append(track)
+        return tracks
+
+    def show_offline_tracks(self):
+        tracks = self.offline_tracks()
+        if tracks:
+            self._new_results()
             self.queue.load(tracks)
-            for t in tracks:
-                item = ListItem(Label(f"{t['title']} — {t['artist']}"))
-                item.track = t
-                lv.append(item)
-            self.update_status(f"Ready - {len(tracks)} songs", f"Volume: {self.player.volume}%")
+            self.show_tracks(tracks)
+        self.update_status(f"Offline - {len(tracks)} cached songs", f"Volume: {self.player.volume}%")
+
+    def pipeline_stats(self):
+        if self.attached:
+            # Playback happens in the daemon, so its measurements are the ones that matter
+            stats = self.player.call("stats") or {}
         else:
-            self.update_status("Ready", "Failed to load trending songs")
+            stats = {
+                'summary': tracer.summary(),
+                'player': self.player.stats(),
+                'url_cache': cache_stats(),
+                'audio_cache': audio_cache.stats(),
+                'ytmusic': ytmusic_client.stats(),
+                'radio': self.queue.radio.stats(),
+            }
+        if self.attached:
+            # Searches and suggestions still go out from this process
+            stats['ytmusic_tui'] = ytmusic_client.stats()
+        stats['frames'] = self.frames.stats()
+        stats['art_cache'] = art_cache.stats()
+        stats['suggestions'] = suggestion_cache.stats()
+        return stats
+
+    @work(thread=True, exclusive=True, group="stats", exit_on_error=False)
+    def report_stats(self, args):
+        """Gather the stats off the UI thread, since attached they come from the daemon"""
+        pipeline = self.pipeline_stats()
+        if args and args[0] == "dump":
+            try:
+                status = ("Stats saved", str(tracer.dump(*args[1:2], extra=pipeline)))
+            except Exception:
+                status = ("Error", "Failed to save stats")
+            self.call_from_thread(self.update_status, *status)
+        else:
+            self.call_from_thread(self.show_stats, pipeline)
+
+    def show_stats(self, pipeline):
+        """Show latency percentiles of each pipeline stage"""
+        summary = pipeline.get('summary')
+        if not summary:
+            self.update_status("Stats", "Nothing measured yet")
+            return
+        order = ["play", "resolve", "mpv.spawn", "ipc.connect", "first_audio"]
+        stages = [s for s in order if s in summary] + sorted(s for s in summary if s not in order)
+        lines = [f"{'stage':<18}{'n':>4}{'p50':>7}{'p90':>7}{'max':>7} ms"]
+        for stage in stages:
+            stats = summary[stage]
+            lines.append(
+                f"{stage:<18}{stats['count']:>4}{stats['p50_ms']:>7.0f}"
+                f"{stats['p90_ms']:>7.0f}{stats['max_ms']:>7.0f}"
+            )
+        url_cache = pipeline.get('url_cache', {})
+        spawns = pipeline.get('player', {}).get('spawn_count', 0)
+        lines.append(f"URL cache hit rate {url_cache.get('hit_rate', 0):.0%}, mpv spawns {spawns}")
+        suggest = pipeline.get('suggestions', {})
+        if suggest.get('keystrokes'):
+            lines.append(
+                f"Suggestions: {suggest['requests']} requests for {suggest['keystrokes']} keystrokes "
+                f"({suggest['requests_per_keystroke']:.2f} each)"
+            )
+        radio = pipeline.get('radio', {})
+        if radio.get('fetches'):
+            lines.append(
+                f"Radio: {radio['added']} tracks added from {radio['fetches']} seeds, "
+                f"{radio['duplicates']} repeats skipped"
+            )
+        api = pipeline.get('ytmusic', {})
+        if api.get('calls'):
+            lines.append(
+                f"YouTube Music: {api['calls']} calls, {api['connections']} connections "
+                f"(reuse {api['reuse_rate']:.0%}), {api['retries']} retries"
+            )
+        self.notify("\n".join(lines), title="Playback latency", timeout=15, markup=False)
+        self.update_status("Stats", f"{sum(s['count'] for s in summary.values())} spans")
+
+    @work(thread=True, exclusive=True, group="index", exit_on_error=False)
+    def build_search_index(self):
+        """Index the local library for jump-to; typing before it is ready finds nothing"""
+        if not search_index.built:
+            search_index.build()
+            self.call_from_thread(self.update_suggestions)
+
+    def typed_query(self):
+        """The search box text, or "" for commands and URLs"""
+        query = self.query_one(Input).value.strip()
+        if query.startswith(":") or "watch?v=" in query or "youtu.be/" in query or "list=" in query:
+            return ""
+        return query
+
+    def update_suggestions(self):
+        """Show jump-to matches for what is typed in the search box"""
+        query = self.typed_query()
+        tracks = self.playable(search_index.search(query, limit=6)) if query else []
+        self.query_one(Suggestions).show_tracks(tracks)
+
+    def suggest_queries(self):
+        """Show suggested queries, from the cache at once or after a pause in typing"""
+        if self.suggest_timer is not None:
+            self.suggest_timer.stop()
+            self.suggest_timer = None
+        query = self.typed_query()
+        suggestions = self.query_one(Suggestions)
+        if len(query) < 2 or audio_cache.offline:
+            self.workers.cancel_group(self, "suggest")
+            suggestions.show_queries([])
+            return
+        suggestion_cache.note_keystroke()
+        cached, complete = suggestion_cache.lookup(query)
+        if cached is not None:
+            suggestions.show_queries(cached)
+        if complete:
+            self.workers.cancel_group(self, "suggest")
+            return
+        self.suggest_timer = self.set_timer(SUGGEST_DEBOUNCE, lambda: self.fetch_suggestions(query))
+
+    @work(thread=True, exclusive=True, group="suggest", exit_on_error=False)
+    def fetch_suggestions(self, query):
+        """Request suggestions; a newer request cancels this one's result"""
+        worker = get_current_worker()
+        suggestions = suggestion_cache.fetch(query)
+        self.call_from_thread(self._apply_suggestions, worker, query, suggestions)
+
+    def _apply_suggestions(self, worker, query, suggestions):
+        if worker.is_cancelled or query != self.typed_query():
+            # Still cached, so going back to this query needs no request
+            suggestion_cache.note_superseded()
+            return
+        self.query_one(Suggestions).show_queries(suggestions)
+
+    def clear_suggestions(self):
+        if self.suggest_timer is not None:
+            self.suggest_timer.stop()
+            self.suggest_timer = None
+        self.workers.cancel_group(self, "suggest")
+        self.query_one(Suggestions).clear()
+
+    def on_input_changed(self, event):
+        # An index lookup takes well under a frame, so this runs on every keystroke;
+        # network suggestions are debounced and never block typing
+        self.update_suggestions()
+        self.suggest_queries()
+
+    def on_suggestions_chosen(self, event):
+        """Play a jump-to match, queueing the other matches around it"""
+        self.workers.cancel_group(self, "tracks")
+        self.clear_suggestions()
+        self._new_results()
+        self.queue.load(event.tracks)
+        self.show_tracks(event.tracks)
+        self.query_one("#results", TrackList).focus()
+        if not self.queue.play_single(event.tracks[event.index]):
+            self.update_status("Error", "Failed to load track")
+
+    def on_suggestions_query_chosen(self, event):
+        """Search for a suggested query as if it had been typed"""
+        search_input = self.query_one(Input)
+        with self.prevent(Input.Changed):
+            search_input.value = event.query
+        search_input.cursor_position = len(event.query)
+        self.clear_suggestions()
+        self.query_one("#results", TrackList).focus()
+        self.search(event.query)
+
+    def _mark_interactive(self):
+        """Record when the first frame with content has been rendered"""
+        if self.interactive_at is None:
+            self.interactive_at = time.perf_counter()
+
+    def show_tracks(self, tracks):
+        """Replace the results list in one step"""
+        self.query_one("#results", TrackList).set_tracks(tracks)
+        self.highlight_current_track()
 
     def on_unmount(self):
+        self.frames.stop()
+        self.visualizer.detach()
+        self.queue.shutdown()
+        audio_cache.shutdown()
+        art_cache.shutdown()
         self.player.stop()
 
     async def on_input_submitted(self, event):
-        lv = self.query_one("#results", ListView)
-        lv.clear()
-        
         input_value = event.value.strip()
+        self.clear_suggestions()
         
         # Check for special commands
         if input_value.startswith(":save "):
             # Save current queue as playlist
             playlist_name = input_value[6:].strip()
-            if playlist_name and self.queue.tracks:
+            if playlist_name and len(self.queue):
                 if save_playlist(playlist_name, self.queue.tracks):
                     self.update_status(f"Playlist '{playlist_name}' saved", f"Volume: {self.player.volume}%")
                 else:
@@ -300,13 +618,12 @@ class CPlayer(App):
         elif input_value.startswith(":load "):
             # Load a saved playlist
             playlist_name = input_value[6:].strip()
-            tracks = load_playlist(playlist_name)
+            tracks = self.playable(load_playlist(playlist_name) or [])
             if tracks:
+                self.workers.cancel_group(self, "tracks")
+                self._new_results()
                 self.queue.load(tracks)
-                for t in tracks:
-                    item = ListItem(Label(f"{t['title']} — {t['artist']}"))
-                    item.track = t
-                    lv.append(item)
+                self.show_tracks(tracks)
                 self.update_status(f"Loaded '{playlist_name}'", f"{len(tracks)} songs")
             else:
                 self.update_status("Error", f"Playlist '{playlist_name}' not found")
@@ -323,126 +640,300 @@ class CPlayer(App):
         
         elif input_value == ":history":
             # Load playback history
-            tracks = get_recent_tracks(20)
+            tracks = self.playable(get_recent_tracks(20))
             if tracks:
+                self.workers.cancel_group(self, "tracks")
+                self._new_results()
                 self.queue.load(tracks)
-                for t in tracks:
-                    item = ListItem(Label(f"{t['title']} — {t['artist']}"))
-                    item.track = t
-                    lv.append(item)
+                self.show_tracks(tracks)
                 self.update_status("History loaded", f"{len(tracks)} tracks")
             else:
                 self.update_status("History", "No playback history")
             return
         
+        elif input_value.startswith(":prefetch"):
+            # Show (or set) how many upcoming tracks are resolved ahead of time
+            depth = input_value[9:].strip()
+            if depth.isdigit():
+                self.queue.set_prefetch_depth(int(depth))
+            # Attached, this shows the last report and the daemon's answer follows
+            self.show_prefetch(self.queue.prefetched())
+            return
+        
+        elif input_value.startswith(":offline"):
+            # Toggle offline mode: only cached audio, no network at all
+            arg = input_value[8:].strip()
+            audio_cache.set_offline(arg != "off" if arg else not audio_cache.offline)
+            if self.attached:
+                self.player.call_async("set_offline", audio_cache.offline)
+            self.workers.cancel_group(self, "tracks")
+            if audio_cache.offline:
+                self.show_offline_tracks()
+            else:
+                self.update_status("Online", f"Volume: {self.player.volume}%")
+            return
+
+        elif input_value.startswith(":stats"):
+            # Per-stage playback latency; ":stats dump [file]" writes it all to JSON
+            args = input_value[6:].split(maxsplit=1)
+            if args and args[0] == "clear":
+                tracer.clear()
+                self.update_status("Stats cleared")
+            else:
+                self.report_stats(args)
+            return
+
+        elif input_value.startswith(":radio"):
+            # Keep playing related tracks once the queue runs out
+            arg = input_value[6:].strip()
+            current = self.queue.radio_enabled if self.attached else self.queue.radio.enabled
+            enabled = self.queue.set_radio(arg != "off" if arg else not current)
+            self.update_status("Radio on" if enabled else "Radio off",
+                               "Related tracks follow the queue" if enabled else "Playback stops at the end of the queue")
+            return
+
+        elif input_value.startswith(":shuffle"):
+            # Play the queue in random order, each track once per round
+            arg = input_value[8:].strip()
+            enabled = self.queue.set_shuffle(arg != "off" if arg else not self.queue.shuffle)
+            self.update_status("Shuffle on" if enabled else "Shuffle off", f"Repeat: {self.queue.repeat}")
+            self.prefetch_art()
+            return
+
+        elif input_value.startswith(":repeat"):
+            # Repeat off, the whole queue ("all") or the current track ("one")
+            mode = input_value[7:].strip() or ("off" if self.queue.repeat != "off" else "all")
+            if mode not in REPEAT_MODES:
+                self.update_status("Error", f"Repeat must be one of {', '.join(REPEAT_MODES)}")
+                return
+            self.update_status(f"Repeat {self.queue.set_repeat(mode)}",
+                               f"Shuffle: {'on' if self.queue.shuffle else 'off'}")
+            return
+
+        elif input_value == ":cache":
+            # Show audio cache usage
+            stats = audio_cache.stats()
+            used = stats['bytes'] / (1024 * 1024)
+            limit = stats['max_bytes'] / (1024 * 1024)
+            self.update_status(f"Audio cache: {stats['files']} songs", f"{used:.0f} / {limit:.0f} MB")
+            return
+
+        self.search(input_value)
+
+    def search(self, query):
         # Add to search history
-        if input_value and (not self.search_history or self.search_history[-1] != input_value):
-            self.search_history.append(input_value)
+        if query and (not self.search_history or self.search_history[-1] != query):
+            self.search_history.append(query)
         self.history_index = len(self.search_history)
         
+        # Network lookups run on a worker; starting a new one cancels the previous
+        self.fetch_tracks(query, self._new_results())
+
+    def _new_results(self):
+        """Start a new set of results; refreshes for older ones are dropped"""
+        self.results_generation += 1
+        return self.results_generation
+
+    @work(thread=True, exclusive=True, group="tracks", exit_on_error=False)
+    def fetch_tracks(self, input_value, generation):
+        """Resolve a search query or URL into tracks without blocking the UI"""
+        worker = get_current_worker()
+
+        if audio_cache.offline:
+            # Search what is playable locally instead of YouTube Music
+            tracks = self.playable(library.find_tracks(input_value))
+            if not tracks:
+                self.call_from_thread(self._apply_results, worker, None, ("Offline", "No cached matches"))
+                return
+            self.call_from_thread(self._apply_results, worker, tracks, ("Offline", f"Found {len(tracks)} cached tracks"))
+            return
+        
         # Check if input is a playlist URL
         if "list=" in input_value or "playlist" in input_value:
-            self.update_status("Loading playlist...", "Please wait...")
-            tracks = get_playlist_songs(input_value)
-            if not tracks:
+            self.call_from_thread(self.update_status, "Loading playlist...", "Please wait...")
+            loaded = 0
+            try:
+                # Show the first page right away and append the rest as it arrives
+                for page in iter_playlist_pages(input_value):
+                    if worker.is_cancelled:
+                        return
+                    loaded += len(page)
+                    status = ("Loading playlist...", f"{loaded} songs so far")
+                    if loaded == len(page):
+                        self.call_from_thread(self._apply_results, worker, page, status)
+                    else:
+                        self.call_from_thread(self._append_results, worker, page, status)
+            except Exception:
+                pass
+            if not loaded:
                 # Provide more specific error messages
                 if "RDCLAK" in input_value or "mix" in input_value.lower():
-                    self.update_status("Error", "Mix playlists not supported")
+                    error = "Mix playlists not supported"
                 elif len(input_value) < 10:
-                    self.update_status("Error", "Invalid playlist ID")
+                    error = "Invalid playlist ID"
                 else:
-                    self.update_status("Error", "Failed to load playlist")
+                    error = "Failed to load playlist"
+                self.call_from_thread(self._apply_results, worker, None, ("Error", error))
                 return
-            self.update_status(f"Loaded {len(tracks)} songs", f"Volume: {self.player.volume}%")
+            status = (f"Loaded {loaded} songs", f"Volume: {self.player.volume}%")
+            self.call_from_thread(self._apply_results, worker, None, status)
+            return
         
         # Check if input is a watch URL (individual video)
         elif "watch?v=" in input_value or "youtu.be/" in input_value:
-            self.update_status("Loading video...", "Please wait...")
+            self.call_from_thread(self.update_status, "Loading video...", "Please wait...")
             song = get_watch_song(input_value)
             if not song:
-                self.update_status("Error", "Failed to load video")
+                self.call_from_thread(self._apply_results, worker, None, ("Error", "Failed to load video"))
                 return
-            
             # Create a single-item queue with this song
             tracks = [song]
-            self.queue.load(tracks)
-            
-            # Clear and populate the list view
-            lv = self.query_one("#results", ListView)
-            lv.clear()
-            item = ListItem(Label(f"{song['title']} — {song['artist']}"))
-            item.track = song
-            lv.append(item)
-            
-            self.update_status(f"Loaded: {song['title']}", f"Volume: {self.player.volume}%")
+            status = (f"Loaded: {song['title']}", f"Volume: {self.player.volume}%")
         else:
             # Regular search
-            self.update_status("Searching...", "Please wait...")
-            tracks = search_tracks(input_value)
+            self.call_from_thread(self.update_status, "Searching...", "Please wait...")
+            tracks = search_tracks(
+                input_value,
+                on_refresh=lambda fresh: self.call_from_thread(self._apply_refresh, worker, generation, fresh),
+            )
             if not tracks:
-                self.update_status("Search", "No results found")
+                self.call_from_thread(self._apply_results, worker, None, ("Search", "No results found"))
                 return
-            self.update_status("Ready", f"Found {len(tracks)} tracks")
-
-        self.queue.load(tracks)
-
-        for t in tracks:
-            item = ListItem(Label(f"{t['title']} — {t['artist']}"))
-            item.track = t
-            lv.append(item)
-
-    async def on_list_view_selected(self, event):
-        track = event.item.track
-        success = self.queue.play_single(track)
-        if success:
-            self.meta.update_track(track)
-            self.update_status("▶ Playing", track['title'][:30] + "..." if len(track['title']) > 30 else track['title'])
-            self.highlight_current_track()
-            add_to_history(track)  # Add to playback history
-        else:
+            status = ("Ready", f"Found {len(tracks)} tracks")
+        
+        self.call_from_thread(self._apply_results, worker, tracks, status)
+
+    def _apply_refresh(self, worker, generation, tracks):
+        """Swap in revalidated search results if the stale ones are still untouched"""
+        # The refresh outlives its worker, which is then never marked cancelled
+        if generation != self.results_generation or self.queue.index != -1:
+            return
+        if [t['videoId'] for t in tracks] == [t['videoId'] for t in self.queue.tracks]:
+            return
+        self._apply_results(worker, tracks, ("Ready", f"Refreshed {len(tracks)} tracks"))
+
+    def _append_results(self, worker, tracks, status):
+        """Add another page of a worker's results to the queue and list"""
+        if worker.is_cancelled:
+            return
+        self.queue.extend(tracks)
+        self.query_one("#results", TrackList).append_tracks(tracks)
+        self.update_status(*status)
+
+    def _apply_results(self, worker, tracks, status):
+        """Show a worker's results unless a newer query superseded it"""
+        if worker.is_cancelled:
+            return
+        if tracks:
+            self.queue.load(tracks)
+            self.show_tracks(tracks)
+        self.update_status(*status)
+
+    async def on_track_list_selected(self, event):
+        # The panels follow the player's "track" change
+        if not self.queue.play_single(event.track):
             self.update_status("Error", "Failed to load track")
+
+    def on_track_list_edited(self, event):
+        """Play a row next, remove it or move it, then show the edited queue"""
+        index = event.index
+        if event.action == "play_next":
+            done, cursor = self.queue.play_next(index), None
+        elif event.action == "remove":
+            done, cursor = self.queue.remove(index), None
+        else:
+            to = index - 1 if event.action == "move_up" else index + 1
+            done, cursor = 0 <= to < len(self.queue) and self.queue.move(index, to), to
+        if not done:
+            self.update_status("Queue", "The playing track stays in the queue" if event.action == "remove" else "Nothing to move")
+            return
+        event.track_list.update_tracks(self.queue.tracks, cursor)
+        self.highlight_current_track()
+        self.prefetch_art()
+        if event.action == "play_next":
+            self.update_status("Playing next", event.track['title'][:30])
+
+    def show_now_playing(self):
+        """Show the player's current track, whoever started it"""
+        track = self.player.track
+        if not track:
+            return
+        if self.attached:
+            # The daemon records the play; count it here too so jump-to ranks it
+            search_index.add(track, plays=1)
+        self.meta.update_track(track)
+        self.prefetch_art()
+        self.update_status("▶ Playing", track['title'][:30] + "..." if len(track['title']) > 30 else track['title'])
+        self.highlight_current_track()
+
+    def prefetch_art(self):
+        """Load the art of the next few tracks so it shows as soon as they play"""
+        if not art_available():
+            return
+        art_cache.prefetch(t.get('thumbnail') for t in self.queue.upcoming(ART_PREFETCH))
+
+    def show_daemon_queue(self):
+        """Show a queue that another client gave the daemon"""
+        self.workers.cancel_group(self, "tracks")
+        self._new_results()
+        self.show_tracks(self.queue.tracks)
     
     def highlight_current_track(self):
         """Highlight the currently playing track in the list"""
-        lv = self.query_one("#results", ListView)
-        
-        # Remove highlight from all items
-        for item in lv.children:
-            item.remove_class("--playing")
-        
-        # Add highlight to current track
-        if self.queue.current_track:
-            for item in lv.children:
-                if hasattr(item, 'track') and item.track.get('videoId') == self.queue.current_track.get('videoId'):
-                    item.add_class("--playing")
-                    break
+        track_list = self.query_one("#results", TrackList)
+        index = self.queue.index
+        if (
+            self.queue.current_track
+            and 0 <= index < len(track_list.tracks)
+            and track_list.tracks[index].get('videoId') == self.queue.current_track.get('videoId')
+        ):
+            track_list.set_playing(index)
+        else:
+            track_list.set_playing(-1)
 
     def update_progress(self):
-        pb = self.query_one("#progress", ProgressBar)
-        pb.total = int(self.player.duration)
-        pb.progress = int(self.player.time_pos)
-        
-        # Update time label
-        time_label = self.query_one("#time_label", Label)
-        current_time = format_time(self.player.time_pos)
-        total_time = format_time(self.player.duration)
-        time_label.update(f"{current_time} / {total_time}")
+        # mpv reports time-pos many times a second; only whole seconds are shown
+        shown = (int(self.player.time_pos), int(self.player.duration))
+        if shown == self._shown_progress:
+            return
+        self._shown_progress = shown
+        position, duration = shown
+        self.progress_bar.update(total=duration, progress=position)
+        self.time_label.update(f"{format_time(position)} / {format_time(duration)}")
+
+    def on_cplayer_track_ended(self, message):
+        self.on_track_end()
 
     def on_track_end(self):
         # Try to play the next song automatically
-        if self.queue.tracks and self.queue.index < len(self.queue.tracks) - 1:
-            success = self.queue.next()
-            if success:
-                track = self.queue.tracks[self.queue.index]
-                self.meta.update_track(track)
-                self.update_status("▶ Playing", track['title'][:30] + "..." if len(track['title']) > 30 else track['title'])
-                self.highlight_current_track()
-                add_to_history(track)  # Add to playback history
-            else:
-                self.update_status("Error", "Failed to load next track")
+        if self.queue.advance():
+            return
+        if not self.queue.dry:
+            self.update_status("Error", "Failed to load next track")
+        elif self.queue.radio.pending:
+            # Playback resumes as soon as the tracks arrive
+            self.update_status("Radio", "Finding related tracks…")
         else:
             self.update_status("Queue Ended", "No more tracks")
 
+    def on_cplayer_daemon_reply(self, message):
+        if message.command == "prefetched" and message.result is not None:
+            self.show_prefetch(message.result)
+        elif message.command in DAEMON_FAILURES and not message.result:
+            self.update_status("Error", DAEMON_FAILURES[message.command])
+
+    def show_prefetch(self, prefetched):
+        states = [p['state'] for p in prefetched]
+        ready = states.count("ready")
+        self.update_status(f"Prefetch depth {self.queue.prefetch_depth}", f"{ready}/{len(states)} ready")
+
+    def on_cplayer_radio_tracks(self, message):
+        if not self.queue.add_radio(message.tracks, message.generation):
+            return
+        self.query_one("#results", TrackList).append_tracks(message.tracks)
+        self.prefetch_art()
+        self.highlight_current_track()
+
     async def on_key(self, event: events.Key):
         # Handle search history navigation
         search_input = self.query_one(Input)
@@ -470,32 +961,18 @@ class CPlayer(App):
         if event.key == "space":
             self.player.toggle_pause()
         elif event.key == "n":
-            success = self.queue.next()
-            if success:
-                track = self.queue.tracks[self.queue.index]
-                self.meta.update_track(track)
-                self.update_status("▶ Playing", track['title'][:30] + "..." if len(track['title']) > 30 else track['title'])
-                self.highlight_current_track()
-                add_to_history(track)  # Add to playback history
-            else:
+            if not self.queue.next():
                 self.update_status("Error", "No next track")
         elif event.key == "p":
-            success = self.queue.previous()
-            if success:
-                track = self.queue.tracks[self.queue.index]
-                self.meta.update_track(track)
-                self.update_status("▶ Playing", track['title'][:30] + "..." if len(track['title']) > 30 else track['title'])
-                self.highlight_current_track()
-                add_to_history(track)  # Add to playback history
-            else:
+            if not self.queue.previous():
                 self.update_status("Error", "No previous track")
         elif event.key in ("+", "="):
+            # The display follows mpv's volume property change
             self.player.volume_up()
-            self.update_volume_display(self.player.volume)
         elif event.key == "-":
             self.player.volume_down()
-            self.update_volume_display(self.player.volume)
         elif event.key == "ctrl+q":
+            # Attached to the daemon, this only detaches and the music plays on
             self.player.stop()
             await self.action_quit()
     
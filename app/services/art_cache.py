@@ -0,0 +1,270 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from app.services.audio_cache import audio_cache
+from app.services.http import session
+from app.services.tracing import span
+
+Image = None  # Pillow, imported by the first fetch; without it there is no album art
+_pillow = None  # Whether Pillow imported, None until a fetch has tried
+
+ART_WIDTH = 20  # Cells; each cell shows two pixels stacked with a half block
+ART_HEIGHT = 10
+ART_CACHE_KB = int(os.environ.get("CPLAYER_ART_CACHE_KB", "2048"))  # 0 disables album art
+ART_DISK_FILES = 5000  # Renderings kept on disk, oldest removed first
+ART_WORKERS = 4
+FETCH_TIMEOUT = 10
+FAILURE_TTL = 60  # Seconds a thumbnail that failed to load is not requested again
+
+
+def _cache_dir():
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    if xdg:
+        return Path(xdg) / "cplayer" / "art"
+    return Path.home() / ".config" / "cplayer" / "art"
+
+ART_CACHE_DIR = _cache_dir()
+
+
+def _load_pillow():
+    global Image, _pillow
+    if _pillow is None:
+        try:
+            from PIL import Image as pil_image
+        except ImportError:
+            _pillow = False
+            return False
+        Image = pil_image
+        _pillow = True
+    return _pillow
+
+
+def available():
+    """Whether album art can be shown: needs a non-zero memory budget and Pillow.
+
+    Pillow is imported on an art worker by the first fetch, not here, so
+    this is cheap on the UI thread; it only turns False once that failed.
+    """
+    return ART_CACHE_KB > 0 and _pillow is not False
+
+
+def render(data, width=ART_WIDTH, height=ART_HEIGHT):
+    """Decode an image and downscale it to width x 2*height RGB pixels.
+
+    YouTube video thumbnails are 4:3 frames around 16:9 content, so their
+    letterbox bars are cut before the centre square is taken.
+    """
+    image = Image.open(io.BytesIO(data))
+    # JPEGs can be decoded at a fraction of their size, which is much faster
+    image.draft("RGB", (width * 4, height * 8))
+    image = image.convert("RGB")
+    w, h = image.size
+    if w * 3 == h * 4:
+        bar = (h - w * 9 // 16) // 2
+        image = image.crop((0, bar, w, h - bar))
+        w, h = image.size
+    side = min(w, h)
+    left, top = (w - side) // 2, (h - side) // 2
+    image = image.crop((left, top, left + side, top + side))
+    return image.resize((width, height * 2), Image.LANCZOS).tobytes()
+
+
+class ArtCache:
+    """Album art, downscaled to terminal cells, cached in memory and on disk.
+
+    load() fetches a thumbnail over the shared keep-alive HTTP session and
+    decodes and downscales it on a worker thread, so the UI only draws the
+    finished pixels. Renderings are kept in a byte-capped in-memory LRU and
+    as small files on disk, so a thumbnail is downloaded and decoded once.
+    A thumbnail that fails to load is not requested again for FAILURE_TTL
+    seconds, so tracks without art do not cost a request every time.
+    """
+
+    def __init__(self, directory=ART_CACHE_DIR, max_bytes=ART_CACHE_KB * 1024,
+                 width=ART_WIDTH, height=ART_HEIGHT, max_files=ART_DISK_FILES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.width = width
+        self.height = height
+        self.max_files = max_files
+        self.hits = 0
+        self.disk_hits = 0
+        self.fetches = 0
+        self.errors = 0
+        self.evictions = 0
+        self._memory = OrderedDict()  # url -> pixels
+        self._bytes = 0
+        self._loading = {}  # url -> Future
+        self._failed = {}  # url -> monotonic() time until which it is not fetched again
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=ART_WORKERS, thread_name_prefix="cplayer-art")
+
+    def _path(self, url):
+        digest = hashlib.sha1(url.encode()).hexdigest()
+        return self.directory / f"{digest}-{self.width}x{self.height}.rgb"
+
+    def cached(self, url):
+        """Pixels for url if they are in memory, else None; cheap enough for the UI thread"""
+        with self._lock:
+            pixels = self._memory.get(url)
+            if pixels is not None:
+                self._memory.move_to_end(url)
+                self.hits += 1
+            return pixels
+
+    def _remember(self, url, pixels):
+        """Add to the memory LRU, evicting down to the budget (caller holds the lock)"""
+        if url in self._memory:
+            return
+        self._memory[url] = pixels
+        self._bytes += len(pixels)
+        while self._bytes > self.max_bytes and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._bytes -= len(old)
+            self.evictions += 1
+
+    def load(self, url):
+        """Future for the pixels of url (None if it has no usable art)"""
+        with self._lock:
+            pixels = self._memory.get(url)
+            if pixels is not None:
+                self._memory.move_to_end(url)
+                self.hits += 1
+            future = self._loading.get(url)
+            if pixels is None and future is None and not self._recently_failed(url):
+                future = self._executor.submit(self._load, url)
+                self._loading[url] = future
+        if future is None:
+            future = Future()
+            future.set_result(pixels)
+        return future
+
+    def _recently_failed(self, url):
+        """Whether url failed to load within FAILURE_TTL (caller holds the lock)"""
+        until = self._failed.get(url)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        del self._failed[url]
+        return False
+
+    def prefetch(self, urls):
+        """Start loading art for tracks that are about to play"""
+        for url in urls:
+            if url and self.cached(url) is None:
+                self.load(url)
+
+    def _load(self, url):
+        try:
+            path = self._path(url)
+            pixels = self._read(path)
+            if pixels is not None:
+                with self._lock:
+                    self.disk_hits += 1
+            else:
+                pixels = self._fetch(url)
+                if pixels is not None:
+                    self._write(path, pixels)
+            if pixels is not None:
+                with self._lock:
+                    self._remember(url, pixels)
+            return pixels
+        finally:
+            with self._lock:
+                self._loading.pop(url, None)
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                pixels = f.read()
+        except OSError:
+            return None
+        if len(pixels) != self.width * self.height * 2 * 3:
+            return None
+        try:
+            os.utime(path)  # Recently used files are the last to go
+        except OSError:
+            pass
+        return pixels
+
+    def _fetch(self, url):
+        if not url.startswith("http") or audio_cache.offline or not _load_pillow():
+            return None
+        with self._lock:
+            self.fetches += 1
+        try:
+            with span("art.fetch"):
+                response = session().get(url, timeout=FETCH_TIMEOUT)
+                response.raise_for_status()
+                data = response.content
+            with span("art.decode"):
+                return render(data, self.width, self.height)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+                self._failed[url] = time.monotonic() + FAILURE_TTL
+            return None
+
+    def _write(self, path, pixels):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(pixels)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._writes += 1
+            trim = self._writes % 100 == 1
+        if trim:
+            self._trim()
+
+    def _trim(self):
+        """Delete the least recently used files beyond max_files"""
+        try:
+            files = sorted(self.directory.glob("*.rgb"), key=lambda p: p.stat().st_mtime)
+            for path in files[:max(0, len(files) - self.max_files)]:
+                path.unlink()
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._failed.clear()
+            self._bytes = 0
+        try:
+            for path in self.directory.glob("*.rgb"):
+                path.unlink()
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._memory),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'fetches': self.fetches,
+                'errors': self.errors,
+                'evictions': self.evictions,
+                'failed': len(self._failed),
+                'loading': len(self._loading),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+art_cache = ArtCache()
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+def _cache_dir():
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    if xdg:
+        return Path(xdg) / "cplayer" / "audio"
+    return Path.home() / ".config" / "cplayer" / "audio"
+
+AUDIO_CACHE_DIR = _cache_dir()
+AUDIO_CACHE_MB = int(os.environ.get("CPLAYER_AUDIO_CACHE_MB", "1024"))  # 0 disables caching
+OFFLINE = os.environ.get("CPLAYER_OFFLINE", "0") == "1"
+
+CHUNK_SIZE = 4 * 1024 * 1024  # googlevideo throttles large unranged requests
+DOWNLOAD_TIMEOUT = 20
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+_CONTENT_RANGE = re.compile(r"bytes \d+-\d+/(\d+)")
+
+
+def _extension(url):
+    mime = parse_qs(urlparse(url).query).get("mime", [""])[0]
+    return "webm" if "webm" in mime else "m4a"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """Size-capped on-disk cache of whole audio files, evicted least recently used.
+
+    Tracks are downloaded in the background after they start playing, in
+    ranged chunks to a .part file that is renamed into place once complete.
+    mpv keeps streaming the track it started, so a track's first play
+    fetches it twice; plays after that come from the local file.
+    The index records each file's size and SHA-256; the size is checked on
+    every lookup and the hash once per session, on the cache's own thread
+    so lookups never wait for it, and files that fail either check are
+    dropped. Recency updates stay in memory until the index is next saved.
+    """
+
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.index_path = directory / "index.json"
+        self.max_bytes = max_bytes
+        self.offline = OFFLINE
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # videoId -> {'file', 'size', 'sha256', 'used'}
+        self._verified = set()  # Hashed this session, or being hashed
+        self._dirty = False  # Recency changed since the index was saved
+        self._downloading = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cplayer-audio-cache")
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _load(self):
+        """Read the index on first use (caller holds the lock)"""
+        self._loaded = True
+        try:
+            if self.index_path.exists():
+                with open(self.index_path, 'r') as f:
+                    self._entries = json.load(f).get('entries', {})
+            # Leftovers of downloads interrupted by a crash
+            for part in self.directory.glob("*.part"):
+                part.unlink()
+        except Exception:
+            self._entries = {}
+
+    def _save(self):
+        """Write the index atomically (caller holds the lock)"""
+        self._dirty = False
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump({'entries': self._entries}, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception:
+            pass
+
+    def _drop(self, video_id):
+        """Remove an entry and its file (caller holds the lock)"""
+        entry = self._entries.pop(video_id, None)
+        self._verified.discard(video_id)
+        if entry:
+            try:
+                (self.directory / entry['file']).unlink()
+            except OSError:
+                pass
+
+    def has(self, video_id):
+        """Whether a complete file is cached; cheap, does not verify contents"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return video_id in self._entries
+
+    def path(self, video_id):
+        """Return the local file for video_id if it has the right size, or None"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(video_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            path = self.directory / entry['file']
+            try:
+                intact = path.stat().st_size == entry['size']
+            except OSError:
+                intact = False
+            if not intact:
+                self._drop(video_id)
+                self._save()
+                self.misses += 1
+                return None
+            if video_id not in self._verified:
+                # Hashing takes a while; a corrupt file is dropped before its next lookup
+                self._verified.add(video_id)
+                try:
+                    self._executor.submit(self._check, video_id, entry)
+                except RuntimeError:
+                    pass  # Shutting down
+            entry['used'] = time.time()
+            self._dirty = True
+            self.hits += 1
+            return str(path)
+
+    def _check(self, video_id, entry):
+        """Hash a cached file outside the lock and drop it if it does not match"""
+        try:
+            intact = _sha256(self.directory / entry['file']) == entry['sha256']
+        except OSError:
+            intact = False
+        if not intact:
+            with self._lock:
+                if self._entries.get(video_id) is entry:
+                    self._drop(video_id)
+                    self._save()
+        return intact
+
+    def verify(self, video_id):
+        """Re-hash a cached file, e.g. after mpv failed to play it; drops it if corrupt"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(video_id)
+            if entry is None:
+                return False
+            self._verified.add(video_id)
+        return self._check(video_id, entry)
+
+    def downloading(self, video_id):
+        """Whether video_id is being downloaded into the cache"""
+        with self._lock:
+            return video_id in self._downloading
+
+    def fetch(self, video_id, url):
+        """Download url into the cache in the background unless already there"""
+        if not self.enabled or self.offline or not url or not url.startswith("http"):
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if video_id in self._entries or video_id in self._downloading:
+                return
+            self._downloading.add(video_id)
+        try:
+            self._executor.submit(self._download, video_id, url)
+        except RuntimeError:
+            # Shutting down
+            with self._lock:
+                self._downloading.discard(video_id)
+
+    def _download(self, video_id, url):
+        part = self.directory / f"{video_id}.part"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            digest = hashlib.sha256()
+            size = 0
+            total = None
+            with open(part, 'wb') as f:
+                while total is None or size < total:
+                    request = urllib.request.Request(url, headers={
+                        "Range": f"bytes={size}-{size + CHUNK_SIZE - 1}",
+                        "User-Agent": USER_AGENT,
+                    })
+                    with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+                        if total is None:
+                            match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+                            total = int(match.group(1)) if match else int(response.headers["Content-Length"])
+                            if total > self.max_bytes:
+                                return
+                        data = response.read()
+                    if not data:
+                        return
+                    f.write(data)
+                    digest.update(data)
+                    size += len(data)
+            if size != total:
+                return
+
+            name = f"{video_id}.{_extension(url)}"
+            os.replace(part, self.directory / name)
+            with self._lock:
+                self._entries[video_id] = {
+                    'file': name,
+                    'size': size,
+                    'sha256': digest.hexdigest(),
+                    'used': time.time(),
+                }
+                self._verified.add(video_id)
+                self._evict(keep=video_id)
+                self._save()
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._downloading.discard(video_id)
+            try:
+                part.unlink()
+            except OSError:
+                pass
+
+    def _evict(self, keep=None):
+        """Delete least recently used files until within budget (caller holds the lock)"""
+        total = sum(e['size'] for e in self._entries.values())
+        for video_id, entry in sorted(self._entries.items(), key=lambda item: item[1]['used']):
+            if total <= self.max_bytes:
+                break
+            if video_id == keep:
+                continue
+            total -= entry['size']
+            self._drop(video_id)
+
+    def set_offline(self, offline):
+        self.offline = bool(offline)
+
+    def clear(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            for video_id in list(self._entries):
+                self._drop(video_id)
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            used = sum(e['size'] for e in self._entries.values())
+            return {
+                'files': len(self._entries),
+                'bytes': used,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'downloading': len(self._downloading),
+                'offline': self.offline,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+
+audio_cache = AudioCache()
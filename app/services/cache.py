@@ -0,0 +1,178 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+FLUSH_DELAY = 2.0  # Seconds writes are batched before the file is rewritten
+
+
+class PersistentLRU:
+    """Thread-safe LRU cache with per-entry expiry, mirrored to a JSON file.
+
+    Changes are written back at most every FLUSH_DELAY seconds and at exit,
+    so a burst of puts (a run of prefetch resolves) rewrites the file once.
+    """
+
+    def __init__(self, path, max_entries=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Taken before _lock; serializes file writes
+        self._loaded = False
+        self._dirty = False
+        self._timer = None
+        atexit.register(self.flush)
+
+    def _load(self):
+        """Load entries from disk on first use, dropping expired ones"""
+        self._loaded = True
+        try:
+            if not self.path.exists():
+                return
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            now = time.time()
+            for key, value, expires_at in data.get('entries', []):
+                if expires_at is None or expires_at > now:
+                    self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except Exception:
+            self._entries.clear()
+
+    def _save(self):
+        """Schedule a write of the entries (caller holds the lock)"""
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(FLUSH_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes to disk atomically"""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = [[k, v, e] for k, (v, e) in self._entries.items()]
+            # Serialized outside the lock so readers are not held up by the disk
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix('.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump({'entries': entries}, f)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                pass
+
+    def get(self, key, allow_stale=False):
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time() and not allow_stale:
+                # Dropped on disk too, or it would come back on the next load
+                del self._entries[key]
+                self._save()
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def lookup(self, key):
+        """Return (value, fresh), keeping expired entries for stale-while-revalidate"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            value, expires_at = entry
+            self._entries.move_to_end(key)
+            if expires_at is not None and expires_at <= time.time():
+                self.stale_hits += 1
+                return value, False
+            self.hits += 1
+            return value, True
+
+    def peek(self, key):
+        """Return a fresh cached value without touching LRU order or counters"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                return None
+            return value
+
+    def values(self):
+        """Every fresh value, without touching LRU order or counters"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            now = time.time()
+            return [v for v, e in self._entries.values() if e is None or e > now]
+
+    def put(self, key, value, expires_at=None):
+        """Store value under key, evicting the least recently used entries"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def invalidate(self, key):
+        """Drop a single entry"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def clear(self):
+        """Drop all entries and the file on disk"""
+        with self._write_lock, self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._dirty = False
+            try:
+                if self.path.exists():
+                    self.path.unlink()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
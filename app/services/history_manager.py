@@ -1,65 +1,58 @@
-import json
-from pathlib import Path
-from datetime import datetime
+import os
 
-HISTORY_FILE = Path.home() / ".config" / "cplayer" / "history.json"
-MAX_HISTORY_SIZE = 100
+from app.services.library import library
+from app.services.search_index import search_index
 
-def ensure_config_dir():
-    """Ensure the config directory exists"""
-    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+MAX_HISTORY_SIZE = int(os.environ.get("CPLAYER_HISTORY_SIZE", "10000"))
+PRUNE_EVERY = 500  # Plays between retention checks
+
+_plays_since_prune = 0
 
 def add_to_history(track):
     """Add a track to playback history"""
+    global _plays_since_prune
     try:
-        ensure_config_dir()
-        
-        # Load existing history
-        history = load_history()
-        
-        # Add new entry with timestamp
-        entry = {
-            'track': track,
-            'played_at': datetime.now().isoformat()
-        }
-        
-        # Add to beginning of list
-        history.insert(0, entry)
-        
-        # Limit history size
-        history = history[:MAX_HISTORY_SIZE]
-        
-        # Save back to file
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(history, f, indent=2)
-        
+        library.add_play(track)
+        search_index.add(track, plays=1)
+
+        _plays_since_prune += 1
+        if _plays_since_prune >= PRUNE_EVERY:
+            _plays_since_prune = 0
+            compact_history()
+
         return True
     except Exception:
         return False
 
-def load_history():
-    """Load playback history"""
+def compact_history():
+    """Drop plays beyond the retention limit"""
     try:
-        if not HISTORY_FILE.exists():
-            return []
-        
-        with open(HISTORY_FILE, 'r') as f:
-            history = json.load(f)
-        
-        return history
+        library.prune_plays(MAX_HISTORY_SIZE)
+        return True
+    except Exception:
+        return False
+
+def load_history(limit=MAX_HISTORY_SIZE):
+    """Load playback history, newest first"""
+    try:
+        return [
+            {'track': track, 'played_at': played_at}
+            for track, played_at in library.recent_plays(limit)
+        ]
     except Exception:
         return []
 
 def clear_history():
     """Clear all playback history"""
     try:
-        if HISTORY_FILE.exists():
-            HISTORY_FILE.unlink()
+        library.clear_plays()
         return True
     except Exception:
         return False
 
 def get_recent_tracks(limit=20):
     """Get recent tracks from history"""
-    history = load_history()
-    return [entry['track'] for entry in history[:limit]]
+    try:
+        return [track for track, _ in library.recent_plays(limit)]
+    except Exception:
+        return []
@@ -0,0 +1,80 @@
+import threading
+from contextlib import contextmanager
+
+POOL_SIZE = 8  # Keep-alive connections kept per host
+DEFAULT_TIMEOUT = 15  # Seconds, for requests made without a timeout
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+_session = None
+_adapter = None
+_session_lock = threading.Lock()
+_local = threading.local()
+
+
+@contextmanager
+def request_timeout(seconds):
+    """Timeout for requests this thread sends inside the block without one.
+
+    For libraries such as ytmusicapi that never pass a timeout themselves.
+    """
+    previous = getattr(_local, "timeout", None)
+    _local.timeout = seconds
+    try:
+        yield
+    finally:
+        _local.timeout = previous
+
+
+def _timeout_adapter():
+    from requests.adapters import HTTPAdapter
+
+    class TimeoutAdapter(HTTPAdapter):
+        def send(self, request, timeout=None, **kwargs):
+            if timeout is None:
+                timeout = getattr(_local, "timeout", None) or DEFAULT_TIMEOUT
+            return super().send(request, timeout=timeout, **kwargs)
+
+    return TimeoutAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+
+
+def session():
+    """The shared requests session, created on first use.
+
+    Requests to the same host reuse pooled keep-alive connections instead
+    of paying a TCP and TLS handshake each. requests is imported here so
+    the command line does not load it.
+    """
+    global _session, _adapter
+    with _session_lock:
+        if _session is None:
+            import requests
+
+            s = requests.Session()
+            _adapter = _timeout_adapter()
+            s.mount("http://", _adapter)
+            s.mount("https://", _adapter)
+            s.headers["User-Agent"] = USER_AGENT
+            _session = s
+        return _session
+
+
+def pool_stats():
+    """Per host: connections opened and requests sent over the shared session"""
+    with _session_lock:
+        adapter = _adapter
+    if adapter is None:
+        return {}
+    stats = {}
+    pools = adapter.poolmanager.pools
+    for key in pools.keys():
+        try:
+            pool = pools[key]
+        except KeyError:
+            continue  # Evicted meanwhile
+        host = stats.setdefault(pool.host, {'connections': 0, 'requests': 0})
+        host['connections'] += pool.num_connections
+        host['requests'] += pool.num_requests
+    for host in stats.values():
+        # Every request after the first on a connection reused it
+        host['reuse_rate'] = 1 - host['connections'] / host['requests'] if host['requests'] else 0.0
+    return stats
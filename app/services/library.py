@@ -0,0 +1,295 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+CONFIG_DIR = Path.home() / ".config" / "cplayer"
+LIBRARY_FILE = CONFIG_DIR / "library.db"
+PLAYLISTS_DIR = CONFIG_DIR / "playlists"
+HISTORY_LOG_FILE = CONFIG_DIR / "history.jsonl"
+LEGACY_HISTORY_FILE = CONFIG_DIR / "history.json"
+
+TRACK_FIELDS = ("videoId", "title", "artist", "thumbnail")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    video_id   TEXT PRIMARY KEY,
+    title      TEXT NOT NULL COLLATE NOCASE,
+    artist     TEXT NOT NULL COLLATE NOCASE,
+    thumbnail  TEXT NOT NULL DEFAULT '',
+    extra      TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tracks_title ON tracks (title);
+CREATE INDEX IF NOT EXISTS tracks_artist ON tracks (artist);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    id         INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL UNIQUE,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    playlist_id INTEGER NOT NULL REFERENCES playlists (id) ON DELETE CASCADE,
+    position    INTEGER NOT NULL,
+    video_id    TEXT NOT NULL REFERENCES tracks (video_id),
+    PRIMARY KEY (playlist_id, position)
+);
+CREATE INDEX IF NOT EXISTS playlist_tracks_video ON playlist_tracks (video_id);
+
+CREATE TABLE IF NOT EXISTS plays (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id  TEXT NOT NULL REFERENCES tracks (video_id),
+    played_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plays_video ON plays (video_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _track_row(track):
+    extra = {k: v for k, v in track.items() if k not in TRACK_FIELDS}
+    return (
+        track["videoId"],
+        track.get("title") or "Unknown",
+        track.get("artist") or "Unknown",
+        track.get("thumbnail") or "",
+        json.dumps(extra) if extra else None,
+        time.time(),
+    )
+
+
+def _row_track(row):
+    video_id, title, artist, thumbnail, extra = row
+    track = {"title": title, "artist": artist, "videoId": video_id, "thumbnail": thumbnail}
+    if extra:
+        track.update(json.loads(extra))
+    return track
+
+
+class Library:
+    """Indexed local store for tracks, playlists and plays"""
+
+    def __init__(self, path=LIBRARY_FILE):
+        self.path = path
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _db(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._migrate_json()
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _upsert_tracks(self, conn, tracks):
+        conn.executemany(
+            "INSERT INTO tracks (video_id, title, artist, thumbnail, extra, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (video_id) DO UPDATE SET title = excluded.title, "
+            "artist = excluded.artist, "
+            "thumbnail = CASE WHEN excluded.thumbnail != '' THEN excluded.thumbnail ELSE thumbnail END, "
+            "extra = COALESCE(excluded.extra, extra), updated_at = excluded.updated_at",
+            [_track_row(t) for t in tracks if t.get("videoId")],
+        )
+
+    def _migrate_json(self):
+        """One-time import of the JSON playlists and history files"""
+        conn = self._conn
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        with conn:
+            if PLAYLISTS_DIR.exists():
+                for file in sorted(PLAYLISTS_DIR.glob("*.json")):
+                    try:
+                        with open(file, "r") as f:
+                            data = json.load(f)
+                        self._save_playlist(conn, data.get("name") or file.stem, data.get("tracks", []))
+                    except Exception:
+                        continue
+
+            entries = []
+            try:
+                if HISTORY_LOG_FILE.exists():
+                    with open(HISTORY_LOG_FILE, "r") as f:
+                        for line in f:
+                            try:
+                                entries.append(json.loads(line))
+                            except ValueError:
+                                continue
+                elif LEGACY_HISTORY_FILE.exists():
+                    with open(LEGACY_HISTORY_FILE, "r") as f:
+                        entries = list(reversed(json.load(f)))
+            except Exception:
+                entries = []
+            for entry in entries:
+                track = entry.get("track") or {}
+                if track.get("videoId"):
+                    self._add_play(conn, track, entry.get("played_at"))
+
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+
+    # Playlists
+
+    def _save_playlist(self, conn, name, tracks):
+        tracks = [t for t in tracks if t.get("videoId")]
+        self._upsert_tracks(conn, tracks)
+        conn.execute(
+            "INSERT INTO playlists (name, updated_at) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET updated_at = excluded.updated_at",
+            (name, time.time()),
+        )
+        playlist_id = conn.execute("SELECT id FROM playlists WHERE name = ?", (name,)).fetchone()[0]
+        conn.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+        conn.executemany(
+            "INSERT INTO playlist_tracks (playlist_id, position, video_id) VALUES (?, ?, ?)",
+            [(playlist_id, i, t["videoId"]) for i, t in enumerate(tracks)],
+        )
+
+    def save_playlist(self, name, tracks):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                self._save_playlist(conn, name, tracks)
+
+    def load_playlist(self, name):
+        """Return the playlist's tracks in order, or None if it does not exist"""
+        with self._lock:
+            conn = self._db()
+            row = conn.execute("SELECT id FROM playlists WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            rows = conn.execute(
+                "SELECT t.video_id, t.title, t.artist, t.thumbnail, t.extra "
+                "FROM playlist_tracks p JOIN tracks t ON t.video_id = p.video_id "
+                "WHERE p.playlist_id = ? ORDER BY p.position",
+                (row[0],),
+            ).fetchall()
+            return [_row_track(r) for r in rows]
+
+    def list_playlists(self):
+        with self._lock:
+            rows = self._db().execute("SELECT name FROM playlists ORDER BY name").fetchall()
+            return [r[0] for r in rows]
+
+    def delete_playlist(self, name):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                return conn.execute("DELETE FROM playlists WHERE name = ?", (name,)).rowcount > 0
+
+    def playlists_with_track(self, video_id):
+        """Names of the playlists that contain video_id"""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT DISTINCT pl.name FROM playlist_tracks p "
+                "JOIN playlists pl ON pl.id = p.playlist_id "
+                "WHERE p.video_id = ? ORDER BY pl.name",
+                (video_id,),
+            ).fetchall()
+            return [r[0] for r in rows]
+
+    # Plays
+
+    def _add_play(self, conn, track, played_at=None):
+        self._upsert_tracks(conn, [track])
+        conn.execute(
+            "INSERT INTO plays (video_id, played_at) VALUES (?, ?)",
+            (track["videoId"], played_at or datetime.now().isoformat()),
+        )
+
+    def add_play(self, track, played_at=None):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                self._add_play(conn, track, played_at)
+
+    def recent_plays(self, limit=20):
+        """Newest-first (track, played_at) pairs"""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT t.video_id, t.title, t.artist, t.thumbnail, t.extra, p.played_at "
+                "FROM plays p JOIN tracks t ON t.video_id = p.video_id "
+                "ORDER BY p.id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+            return [(_row_track(r[:5]), r[5]) for r in rows]
+
+    def play_counts(self):
+        """videoId -> number of plays"""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT video_id, COUNT(*) FROM plays GROUP BY video_id"
+            ).fetchall()
+            return dict(rows)
+
+    def count_plays(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM plays").fetchone()[0]
+
+    def prune_plays(self, keep):
+        """Delete all but the newest keep plays"""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute(
+                    "DELETE FROM plays WHERE id <= "
+                    "(SELECT id FROM plays ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (keep,),
+                )
+
+    def clear_plays(self):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM plays")
+
+    # Tracks
+
+    def upsert_tracks(self, tracks):
+        with self._lock:
+            conn = self._db()
+            with conn:
+                self._upsert_tracks(conn, tracks)
+
+    def find_tracks(self, query, limit=50):
+        """Tracks whose title or artist starts with query (case-insensitive, indexed)"""
+        prefix = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT video_id, title, artist, thumbnail, extra FROM tracks "
+                "WHERE title LIKE ? ESCAPE '\\' "
+                "UNION "
+                "SELECT video_id, title, artist, thumbnail, extra FROM tracks "
+                "WHERE artist LIKE ? ESCAPE '\\' "
+                "LIMIT ?",
+                (prefix, prefix, limit),
+            ).fetchall()
+            return [_row_track(r) for r in rows]
+
+    def all_tracks(self):
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT video_id, title, artist, thumbnail, extra FROM tracks"
+            ).fetchall()
+            return [_row_track(r) for r in rows]
+
+
+library = Library()
@@ -1,66 +1,32 @@
-import json
-import os
-from pathlib import Path
-
-PLAYLISTS_DIR = Path.home() / ".config" / "cplayer" / "playlists"
-
-def ensure_playlists_dir():
-    """Ensure the playlists directory exists"""
-    PLAYLISTS_DIR.mkdir(parents=True, exist_ok=True)
+from app.services.library import library
+from app.services.search_index import search_index
 
 def save_playlist(name, tracks):
-    """Save a playlist to disk"""
+    """Save a playlist to the library"""
     try:
-        ensure_playlists_dir()
-        playlist_path = PLAYLISTS_DIR / f"{name}.json"
-        
-        with open(playlist_path, 'w') as f:
-            json.dump({
-                'name': name,
-                'tracks': tracks
-            }, f, indent=2)
-        
+        library.save_playlist(name, tracks)
+        search_index.add_many(tracks)
         return True
     except Exception:
         return False
 
 def load_playlist(name):
-    """Load a playlist from disk"""
+    """Load a playlist from the library"""
     try:
-        playlist_path = PLAYLISTS_DIR / f"{name}.json"
-        
-        if not playlist_path.exists():
-            return None
-        
-        with open(playlist_path, 'r') as f:
-            data = json.load(f)
-        
-        return data.get('tracks', [])
+        return library.load_playlist(name)
     except Exception:
         return None
 
 def list_playlists():
     """List all saved playlists"""
     try:
-        ensure_playlists_dir()
-        playlists = []
-        
-        for file in PLAYLISTS_DIR.glob("*.json"):
-            playlists.append(file.stem)
-        
-        return sorted(playlists)
+        return library.list_playlists()
     except Exception:
         return []
 
 def delete_playlist(name):
     """Delete a playlist"""
     try:
-        playlist_path = PLAYLISTS_DIR / f"{name}.json"
-        
-        if playlist_path.exists():
-            playlist_path.unlink()
-            return True
-        
-        return False
+        return library.delete_playlist(name)
     except Exception:
         return False
@@ -1,15 +1,166 @@
-import subprocess, json
+import subprocess, json, os, queue, threading, time
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
 
-def resolve_audio(video_id):
+from app.services.cache import PersistentLRU
+from app.services.audio_cache import audio_cache
+from app.services.tracing import span
+
+STREAM_CACHE_FILE = Path.home() / ".config" / "cplayer" / "stream_cache.json"
+STREAM_CACHE_SIZE = 256
+DEFAULT_STREAM_TTL = 3600  # Used when the URL carries no expire= parameter
+EXPIRY_MARGIN = 120  # Leave enough time to actually play the track
+
+# "subprocess" runs the yt-dlp CLI per track, "inprocess" reuses YoutubeDL instances
+RESOLVER_BACKEND = os.environ.get("CPLAYER_RESOLVER", "subprocess")
+YDL_POOL_SIZE = 2
+
+class _QuietLogger:
+    """Keep yt-dlp from writing errors over the TUI"""
+    def debug(self, msg):
+        pass
+    warning = error = debug
+
+YDL_OPTIONS = {
+    "format": "bestaudio",
+    "quiet": True,
+    "no_warnings": True,
+    "noplaylist": True,
+    "skip_download": True,
+    "check_formats": False,
+    "logger": _QuietLogger(),
+}
+
+stream_cache = PersistentLRU(STREAM_CACHE_FILE, STREAM_CACHE_SIZE)
+
+def stream_expiry(url):
+    """Return the unix time at which a stream URL should be considered expired"""
+    try:
+        expire = parse_qs(urlparse(url).query).get("expire")
+        if expire:
+            return int(expire[0]) - EXPIRY_MARGIN
+    except (ValueError, TypeError):
+        pass
+    return time.time() + DEFAULT_STREAM_TTL
+
+def watch_url(video_id):
+    return f"https://music.youtube.com/watch?v={video_id}"
+
+def _resolve_subprocess(video_id):
+    """Resolve with a fresh yt-dlp CLI process"""
     try:
         cmd = [
             "yt-dlp",
             "-f", "bestaudio",
             "-j",
             "--quiet",
-            f"https://music.youtube.com/watch?v={video_id}"
+            watch_url(video_id)
         ]
         data = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
         return json.loads(data).get("url")
     except Exception:
         return None
+
+class _YoutubeDLPool:
+    """A small pool of long-lived YoutubeDL instances, created on demand"""
+
+    def __init__(self, size):
+        self.size = size
+        self.created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self.created < self.size:
+                import yt_dlp  # Deferred: importing the extractors is expensive
+                ydl = yt_dlp.YoutubeDL(dict(YDL_OPTIONS))
+                # Counted only once it exists, or failed builds would use up the pool
+                self.created += 1
+                return ydl
+        return self._idle.get()
+
+    def release(self, ydl):
+        self._idle.put(ydl)
+
+_ydl_pool = _YoutubeDLPool(YDL_POOL_SIZE)
+
+def _resolve_inprocess(video_id):
+    """Resolve with a pooled in-process YoutubeDL instance"""
+    try:
+        ydl = _ydl_pool.acquire()
+    except Exception:
+        # yt_dlp is missing or could not be set up; the CLI may still work
+        return _resolve_subprocess(video_id)
+    try:
+        info = ydl.extract_info(watch_url(video_id), download=False)
+        if not info:
+            return None
+        url = info.get("url")
+        if not url:
+            # Fall back to the selected format when yt-dlp did not hoist it
+            formats = info.get("requested_formats") or []
+            url = formats[0].get("url") if formats else None
+        return url
+    except Exception:
+        return None
+    finally:
+        _ydl_pool.release(ydl)
+
+BACKENDS = {
+    "subprocess": _resolve_subprocess,
+    "inprocess": _resolve_inprocess,
+}
+
+def set_backend(name):
+    """Select the resolver backend used by resolve_audio"""
+    global RESOLVER_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown resolver backend: {name}")
+    RESOLVER_BACKEND = name
+
+def resolve_audio(video_id):
+    """Return something mpv can play: the cached local file, else a stream URL"""
+    with span("resolve", video_id=video_id) as attrs:
+        local = audio_cache.path(video_id)
+        if local:
+            attrs['source'] = "audio_cache"
+            return local
+        if audio_cache.offline:
+            attrs['source'] = "offline"
+            return None
+
+        url = stream_cache.get(video_id)
+        if url:
+            attrs['source'] = "url_cache"
+            return url
+
+        attrs['source'] = RESOLVER_BACKEND
+        url = BACKENDS.get(RESOLVER_BACKEND, _resolve_subprocess)(video_id)
+        if url:
+            stream_cache.put(video_id, url, stream_expiry(url))
+        else:
+            attrs['error'] = True
+        return url
+
+def is_resolved(video_id):
+    """Whether video_id can be played without waiting on yt-dlp"""
+    return audio_cache.has(video_id) or stream_cache.peek(video_id) is not None
+
+def cached_stream_url(video_id):
+    """The fresh stream URL for video_id if one is cached, without resolving"""
+    return stream_cache.peek(video_id)
+
+def invalidate_audio(video_id):
+    """Forget a cached stream URL, e.g. after mpv failed to open it"""
+    stream_cache.invalidate(video_id)
+    # The local copy may be the culprit; drop it if it no longer verifies
+    audio_cache.verify(video_id)
+
+def cache_stats():
+    """Return stream URL cache hit/miss counters"""
+    return stream_cache.stats()
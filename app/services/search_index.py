@@ -0,0 +1,209 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+MIN_QUERY_LENGTH = 2
+MIN_OVERLAP = 0.5  # Share of the query's trigrams a match must contain
+CANDIDATES = 256  # Most tracks fully scored per query
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = text.lower()
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def trigrams(text, open_end=False):
+    """Trigrams of each word padded as "  word ".
+
+    With open_end the last word gets no trailing pad, since the user may
+    still be typing it.
+    """
+    grams = set()
+    words = text.split()
+    for i, word in enumerate(words):
+        padded = "  " + word if open_end and i == len(words) - 1 else "  " + word + " "
+        for j in range(len(padded) - 2):
+            grams.add(padded[j:j + 3])
+    return grams
+
+
+class SearchIndex:
+    """In-memory fuzzy index over the titles and artists of local tracks.
+
+    Built on first use from the library (played and playlist tracks, with
+    play counts) and the search cache, then kept current by add() as plays,
+    playlist saves and searches happen. Each track gets an integer id and
+    every trigram of its title and artist lists the ids containing it. A
+    query counts, per id, how many of its own trigrams it shares; the best
+    overlaps are then ranked with bonuses for prefix and substring matches
+    and for tracks played often.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self._built = False
+        self._building = False
+        self._pending = []
+
+    def _reset(self):
+        self._postings = {}  # trigram -> ids of the tracks containing it
+        self._tracks = []  # id -> track dict, None once superseded
+        self._names = []  # id -> (normalized title, normalized artist)
+        self._plays = []  # id -> play count
+        self._ids = {}  # videoId -> current id
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def built(self):
+        return self._built
+
+    def build(self, sources=None):
+        """(Re)build from sources, an iterable of (track, plays) pairs.
+
+        Defaults to the library and the search cache. Tracks added while the
+        build runs are applied once it finishes.
+        """
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        try:
+            fresh = SearchIndex()
+            fresh._built = True
+            for track, plays in (sources if sources is not None else _local_tracks()):
+                fresh._add(track, plays)
+        finally:
+            with self._lock:
+                self._building = False
+        with self._lock:
+            self._postings, self._tracks, self._names = fresh._postings, fresh._tracks, fresh._names
+            self._plays, self._ids = fresh._plays, fresh._ids
+            self._built = True
+            pending, self._pending = self._pending, []
+            for tracks, plays in pending:
+                for track in tracks:
+                    self._add(track, plays)
+
+    def add(self, track, plays=0):
+        self.add_many([track], plays)
+
+    def add_many(self, tracks, plays=0):
+        """Index new tracks or count plays; does nothing until the index is built"""
+        with self._lock:
+            if self._building:
+                self._pending.append((list(tracks), plays))
+            elif self._built:
+                for track in tracks:
+                    self._add(track, plays)
+
+    def _add(self, track, plays):
+        """Index one track (caller holds the lock or owns the index)"""
+        video_id = track.get('videoId')
+        if not video_id:
+            return
+        names = (normalize(track.get('title') or ""), normalize(track.get('artist') or ""))
+        old = self._ids.get(video_id)
+        if old is not None:
+            self._plays[old] += plays
+            if self._names[old] == names:
+                self._tracks[old] = track
+                return
+            # Renamed: retire the old id, its postings are skipped from now on
+            self._tracks[old] = None
+            plays = self._plays[old]
+        track_id = len(self._tracks)
+        self._tracks.append(track)
+        self._names.append(names)
+        self._plays.append(plays)
+        self._ids[video_id] = track_id
+        postings = self._postings
+        for gram in trigrams(f"{names[0]} {names[1]}"):
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = [track_id]
+            else:
+                ids.append(track_id)
+
+    def search(self, query, limit=8):
+        """Best matching tracks for a partly typed query, best first"""
+        query = normalize(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        grams = trigrams(query, open_end=True)
+        with self._lock:
+            postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+            # Tracks containing every trigram, narrowed from the rarest one up
+            exact = set(postings[0])
+            for ids in postings[1:]:
+                if not exact:
+                    break
+                exact.intersection_update(ids)
+            if len(exact) >= limit:
+                # Short queries match thousands: only rank the most played of them
+                if len(exact) > CANDIDATES:
+                    exact = heapq.nlargest(CANDIDATES, exact, key=self._plays.__getitem__)
+                shared = dict.fromkeys(exact, len(grams))
+            else:
+                # Fuzzy: a track sharing `need` trigrams has at least one of the
+                # len(grams) - need + 1 rarest, so only those are candidates
+                need = max(1, math.ceil(len(grams) * MIN_OVERLAP))
+                rare = len(grams) - need + 1
+                counts = Counter()
+                for ids in postings[:rare]:
+                    counts.update(ids)
+                if len(counts) > CANDIDATES * 4:
+                    counts = dict(counts.most_common(CANDIDATES * 4))
+                for ids in postings[rare:]:
+                    for track_id in counts.keys() & set(ids):
+                        counts[track_id] += 1
+                shared = {track_id: n for track_id, n in counts.items() if n >= need}
+            scored = []
+            for track_id, n in shared.items():
+                track = self._tracks[track_id]
+                if track is None:
+                    continue
+                title, artist = self._names[track_id]
+                score = n / len(grams)
+                if title.startswith(query) or artist.startswith(query):
+                    score += 0.5
+                elif query in title or query in artist or query in f"{title} {artist}":
+                    score += 0.3
+                score += 0.05 * math.log1p(self._plays[track_id])
+                scored.append((score, -track_id, track))
+        return [track for _, _, track in heapq.nlargest(limit, scored)]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tracks': len(self._ids),
+                'trigrams': len(self._postings),
+                'postings': sum(len(ids) for ids in self._postings.values()),
+                'built': self._built,
+            }
+
+
+def _local_tracks():
+    """(track, plays) for every library track, then cached search results"""
+    from app.services.library import library
+    from app.services.ytmusic import search_cache
+
+    plays = library.play_counts()
+    for track in library.all_tracks():
+        yield track, plays.get(track['videoId'], 0)
+    for tracks in search_cache.values():
+        for track in tracks:
+            yield track, 0
+
+
+search_index = SearchIndex()
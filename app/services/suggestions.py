@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.services.ytmusic_client import ytmusic_client
+
+SUGGESTION_LIMIT = 7  # Most suggestions YouTube Music returns; fewer means the list is complete
+SUGGESTION_CACHE_SIZE = 512
+SUGGESTION_CACHE_TTL = 3600
+# Quiet time after a keystroke before suggestions are requested
+SUGGEST_DEBOUNCE = int(os.environ.get("CPLAYER_SUGGEST_DEBOUNCE_MS", "150")) / 1000
+SUGGEST_TIMEOUT = 3  # Seconds; a late suggestion is useless, so no retries either
+
+
+def suggestion_key(query):
+    return " ".join(query.lower().split())
+
+
+class SuggestionCache:
+    """In-memory cache of search suggestions that also answers from prefixes.
+
+    When "dua" returned fewer than SUGGESTION_LIMIT suggestions, every
+    completion of it is known, so "dua l" and "dua lip" are answered by
+    filtering that list without a request. A full list still gives
+    provisional suggestions to show while the narrower query is fetched.
+    Also counts keystrokes and requests, so the request rate of typing can
+    be measured.
+    """
+
+    def __init__(self, max_entries=SUGGESTION_CACHE_SIZE, ttl=SUGGESTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.keystrokes = 0
+        self.requests = 0
+        self.errors = 0
+        self.hits = 0
+        self.prefix_hits = 0
+        self.superseded = 0
+        self._entries = OrderedDict()  # key -> (suggestions, expires_at)
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        """Fresh entry for key (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def lookup(self, query):
+        """Return (suggestions, complete) for query.
+
+        complete means no request is needed: the query itself is cached, or
+        a cached prefix had every completion. suggestions is None when
+        nothing cached applies.
+        """
+        key = suggestion_key(query)
+        now = time.time()
+        with self._lock:
+            exact = self._get(key, now)
+            if exact is not None:
+                self.hits += 1
+                return exact, True
+            for end in range(len(key) - 1, 0, -1):
+                cached = self._get(key[:end], now)
+                if cached is None:
+                    continue
+                narrowed = [s for s in cached if suggestion_key(s).startswith(key)]
+                complete = len(cached) < SUGGESTION_LIMIT
+                if complete:
+                    self.prefix_hits += 1
+                return narrowed, complete
+        return None, False
+
+    def put(self, query, suggestions):
+        with self._lock:
+            self._entries[suggestion_key(query)] = (list(suggestions), time.time() + self.ttl)
+            self._entries.move_to_end(suggestion_key(query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def note_keystroke(self):
+        with self._lock:
+            self.keystrokes += 1
+
+    def note_superseded(self):
+        """A response arrived after the query it was for had changed"""
+        with self._lock:
+            self.superseded += 1
+
+    def fetch(self, query):
+        """Ask YouTube Music for suggestions and cache them; [] on failure"""
+        with self._lock:
+            self.requests += 1
+        try:
+            suggestions = ytmusic_client.call("get_search_suggestions", query, timeout=SUGGEST_TIMEOUT,
+                                              retries=0, span_name="ytmusic.suggest")
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            return []
+        suggestions = [s for s in suggestions if isinstance(s, str)]
+        self.put(query, suggestions)
+        return suggestions
+
+    def stats(self):
+        with self._lock:
+            return {
+                'keystrokes': self.keystrokes,
+                'requests': self.requests,
+                'requests_per_keystroke': self.requests / self.keystrokes if self.keystrokes else 0.0,
+                'hits': self.hits,
+                'prefix_hits': self.prefix_hits,
+                'superseded': self.superseded,
+                'errors': self.errors,
+                'size': len(self._entries),
+            }
+
+
+suggestion_cache = SuggestionCache()
@@ -0,0 +1,99 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_FILE = Path.home() / ".config" / "cplayer" / "trace.json"
+SPAN_BUFFER_SIZE = 2000  # Spans kept in memory across all stages
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+class Tracer:
+    """Records how long each stage of the playback pipeline took.
+
+    Spans go into a fixed-size ring buffer, so tracing stays on all the
+    time at the cost of a perf_counter() pair and a deque append.
+    """
+
+    def __init__(self, size=SPAN_BUFFER_SIZE):
+        self._spans = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, **attrs):
+        """Add a finished span, e.g. one measured across threads"""
+        with self._lock:
+            self._spans.append({
+                'stage': stage,
+                'at': time.time() - seconds,
+                'ms': round(seconds * 1000, 2),
+                **attrs,
+            })
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """Time the enclosed block; the yielded dict takes extra attributes"""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException:
+            attrs['error'] = True
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, **attrs)
+
+    def spans(self, stage=None):
+        with self._lock:
+            spans = list(self._spans)
+        if stage is None:
+            return spans
+        return [s for s in spans if s['stage'] == stage]
+
+    def summary(self):
+        """Per-stage count and latency percentiles in milliseconds"""
+        by_stage = {}
+        for span in self.spans():
+            by_stage.setdefault(span['stage'], []).append(span)
+        summary = {}
+        for stage, spans in by_stage.items():
+            ordered = sorted(s['ms'] for s in spans)
+            summary[stage] = {
+                'count': len(spans),
+                'errors': sum(1 for s in spans if s.get('error')),
+                'last_ms': spans[-1]['ms'],
+                'p50_ms': percentile(ordered, 0.5),
+                'p90_ms': percentile(ordered, 0.9),
+                'p99_ms': percentile(ordered, 0.99),
+                'max_ms': ordered[-1],
+            }
+        return summary
+
+    def dump(self, path=TRACE_FILE, extra=None):
+        """Write the summary and every buffered span to a JSON file"""
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'dumped_at': time.time(),
+                'summary': self.summary(),
+                **(extra or {}),
+                'spans': self.spans(),
+            }, f, indent=1)
+        os.replace(tmp_path, path)
+        return path
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+tracer = Tracer()
+span = tracer.span
@@ -1,11 +1,33 @@
-from ytmusicapi import YTMusic
+import json
+import os
 import re
+import threading
+import time
+from pathlib import Path
 
-ytmusic = YTMusic()
+from app.services.cache import PersistentLRU
+from app.services.search_index import search_index
+from app.services.ytmusic_client import ytmusic_client
 
-def search_tracks(query):
+SEARCH_CACHE_FILE = Path.home() / ".config" / "cplayer" / "search_cache.json"
+SEARCH_CACHE_SIZE = 200
+SEARCH_CACHE_TTL = 6 * 3600
+# Serve expired results immediately and refresh them in the background
+SEARCH_STALE_WHILE_REVALIDATE = os.environ.get("CPLAYER_SEARCH_SWR", "1") != "0"
+
+TRENDING_SNAPSHOT_FILE = Path.home() / ".config" / "cplayer" / "trending.json"
+
+search_cache = PersistentLRU(SEARCH_CACHE_FILE, SEARCH_CACHE_SIZE)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+def search_cache_key(query, filter):
+    """Normalize case and whitespace so equivalent queries share an entry"""
+    return f"{filter}:{' '.join(query.lower().split())}"
+
+def _fetch_search(query, filter):
     try:
-        results = ytmusic.search(query, filter="songs")
+        results = ytmusic_client.call("search", query, filter=filter)
         tracks = []
         for r in results[:20]:
             tracks.append({
@@ -18,11 +40,84 @@ def search_tracks(query):
     except Exception:
         return []
 
+def _store_search(key, tracks):
+    if tracks:
+        search_cache.put(key, tracks, time.time() + SEARCH_CACHE_TTL)
+        search_index.add_many(tracks)
+
+def _revalidate_search(key, query, filter, on_refresh):
+    try:
+        tracks = _fetch_search(query, filter)
+        _store_search(key, tracks)
+        if tracks and on_refresh:
+            on_refresh(tracks)
+    except Exception:
+        pass
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+def search_tracks(query, filter="songs", on_refresh=None):
+    """Search YouTube Music, answering from the local search cache when possible.
+
+    When a cached entry has expired and stale-while-revalidate is enabled, the
+    stale tracks are returned at once and on_refresh(tracks) is called from a
+    background thread once fresh results arrive.
+    """
+    key = search_cache_key(query, filter)
+    tracks, fresh = search_cache.lookup(key)
+    if tracks and fresh:
+        return tracks
+
+    if tracks and SEARCH_STALE_WHILE_REVALIDATE:
+        with _refreshing_lock:
+            already_refreshing = key in _refreshing
+            _refreshing.add(key)
+        if not already_refreshing:
+            threading.Thread(
+                target=_revalidate_search,
+                args=(key, query, filter, on_refresh),
+                daemon=True,
+            ).start()
+        return tracks
+
+    tracks = _fetch_search(query, filter)
+    _store_search(key, tracks)
+    return tracks
+
 def get_random_songs():
     """Get random songs from YouTube Music charts or trending"""
+    tracks = _fetch_random_songs()
+    if tracks:
+        save_trending_snapshot(tracks)
+    return tracks
+
+def save_trending_snapshot(tracks):
+    """Remember the last trending list so the next start can show it instantly"""
+    try:
+        TRENDING_SNAPSHOT_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = TRENDING_SNAPSHOT_FILE.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'saved_at': time.time(), 'tracks': tracks}, f)
+        os.replace(tmp_path, TRENDING_SNAPSHOT_FILE)
+        return True
+    except Exception:
+        return False
+
+def load_trending_snapshot():
+    """Load the trending list saved by the last successful get_random_songs"""
+    try:
+        if not TRENDING_SNAPSHOT_FILE.exists():
+            return []
+        with open(TRENDING_SNAPSHOT_FILE, 'r') as f:
+            return json.load(f).get('tracks', [])
+    except Exception:
+        return []
+
+def _fetch_random_songs():
     try:
         # Try to get songs from charts (this gives trending/popular songs)
-        charts = ytmusic.get_charts()
+        charts = ytmusic_client.call("get_charts")
         
         # Extract songs from the charts
         tracks = []
@@ -72,7 +167,7 @@ def get_watch_song(watch_url):
             return None
             
         # Get video details
-        watch_result = ytmusic.get_song(video_id)
+        watch_result = ytmusic_client.call("get_song", video_id)
         
         if watch_result and 'videoDetails' in watch_result:
             details = watch_result['videoDetails']
@@ -88,67 +183,119 @@ def get_watch_song(watch_url):
         print(f"Watch URL error: {e}")
         return None
 
+def get_radio_tracks(video_id, limit=25):
+    """Tracks YouTube Music's radio for video_id plays after it; [] on failure"""
+    try:
+        watch = ytmusic_client.call("get_watch_playlist", videoId=video_id, limit=limit, radio=True)
+    except Exception:
+        return []
+    # Watch playlist items name their thumbnails "thumbnail", playlist items "thumbnails"
+    items = [dict(t, thumbnails=t.get("thumbnail") or t.get("thumbnails")) for t in watch.get("tracks", [])]
+    return [t for t in _playlist_tracks(items) if t['videoId'] != video_id]
+
+def extract_playlist_id(playlist_url_or_id):
+    """Extract playlist ID from URL if needed"""
+    # Match various YouTube playlist URL formats
+    url_patterns = [
+        r'list=([a-zA-Z0-9_-]+)',  # Standard parameter
+        r'youtube\.com/playlist\?list=([a-zA-Z0-9_-]+)',
+        r'music\.youtube\.com/playlist\?list=([a-zA-Z0-9_-]+)'
+    ]
+    
+    for pattern in url_patterns:
+        match = re.search(pattern, playlist_url_or_id)
+        if match:
+            return match.group(1)
+    return playlist_url_or_id
+
+def _playlist_tracks(items):
+    """Convert raw playlist items into playable track dicts"""
+    tracks = []
+    for item in items:
+        # More robust checking for playable tracks
+        video_id = item.get('videoId')
+        if video_id and video_id != 'None' and video_id.strip():
+            # Additional validation
+            is_available = item.get('isAvailable', True)
+            if is_available or is_available is None:  # None often means available
+                tracks.append({
+                    "title": item.get("title", "Unknown"),
+                    "artist": (item.get("artists") or [{"name": "Unknown"}])[0].get("name", "Unknown"),
+                    "videoId": video_id,
+                    "thumbnail": (item.get("thumbnails") or [{}])[-1].get("url", "")
+                })
+    return tracks
+
+def _browse_playlist_pages(playlist_id):
+    """Yield raw playlist items one continuation page at a time.
+
+    ytmusicapi's get_playlist only returns once every continuation has been
+    followed, so this walks the same browse/continuation requests itself.
+    Relies on ytmusicapi internals, which is why requirements.txt pins its
+    version; callers fall back to get_playlist if the response layout is
+    not the one expected.
+    """
+    from ytmusicapi.continuations import CONTINUATION_ITEMS, get_continuation_token
+    from ytmusicapi.navigation import CONTENT, SECTION, TWO_COLUMN_RENDERER, nav
+    from ytmusicapi.parsers.playlists import parse_playlist_items
+
+    browse_id = playlist_id if playlist_id.startswith("VL") else "VL" + playlist_id
+    response = ytmusic_client.call("_send_request", "browse", {"browseId": browse_id}, span_name="ytmusic.browse")
+    section_list = nav(response, [*TWO_COLUMN_RENDERER, "secondaryContents", *SECTION])
+    shelf = nav(section_list, [*CONTENT, "musicPlaylistShelfRenderer"])
+    contents = shelf.get("contents", [])
+    yield parse_playlist_items(contents)
+
+    token = get_continuation_token(contents) if contents else None
+    while token:
+        response = ytmusic_client.call("_send_request", "browse", {"continuation": token}, span_name="ytmusic.browse")
+        contents = nav(response, CONTINUATION_ITEMS, True)
+        if not contents:
+            break
+        items = parse_playlist_items(contents)
+        if not items:
+            break
+        yield items
+        token = get_continuation_token(contents)
+
+def iter_playlist_pages(playlist_url_or_id):
+    """Yield a playlist's tracks page by page, one request per page"""
+    playlist_id = extract_playlist_id(playlist_url_or_id)
+    yielded = False
+    try:
+        for items in _browse_playlist_pages(playlist_id):
+            tracks = _playlist_tracks(items)
+            if tracks:
+                yielded = True
+                yield tracks
+        if yielded:
+            return
+        print(f"Playlist paging found no tracks for {playlist_id}; using get_playlist")
+    except Exception as e:
+        if yielded:
+            # Later pages failed; keep what was already delivered
+            return
+        print(f"Playlist paging error: {e}; using get_playlist")
+
+    # Unexpected layout (e.g. album audio playlists): let ytmusicapi walk it
+    # (transient failures are already retried by the client)
+    playlist = None
+    try:
+        playlist = ytmusic_client.call("get_playlist", playlist_id, limit=None)
+    except Exception:
+        pass
+
+    if playlist:
+        tracks = _playlist_tracks(playlist.get('tracks', []))
+        if tracks:
+            yield tracks
+
 def get_playlist_songs(playlist_url_or_id):
     """Get songs from a YouTube Music playlist URL or ID"""
     try:
-        # Extract playlist ID from URL if needed
-        playlist_id = playlist_url_or_id
-        
-        # Match various YouTube playlist URL formats
-        url_patterns = [
-            r'list=([a-zA-Z0-9_-]+)',  # Standard parameter
-            r'youtube\.com/playlist\?list=([a-zA-Z0-9_-]+)',
-            r'music\.youtube\.com/playlist\?list=([a-zA-Z0-9_-]+)'
-        ]
-        
-        for pattern in url_patterns:
-            match = re.search(pattern, playlist_url_or_id)
-            if match:
-                playlist_id = match.group(1)
-                break
-        
-        # Try different limit values to handle various playlist sizes
-        limits_to_try = [100, 200, 50, 300]
-        playlist = None
-        
-        for limit in limits_to_try:
-            try:
-                playlist = ytmusic.get_playlist(playlist_id, limit=limit)
-                if playlist and playlist.get('tracks'):
-                    # Check if we got meaningful data
-                    valid_tracks = [t for t in playlist['tracks'] if t.get('videoId')]
-                    if len(valid_tracks) > 0:
-                        break
-            except Exception:
-                continue
-        
-        # If we still don't have playlist data, try alternative approach
-        if not playlist or not playlist.get('tracks'):
-            # Try with authenticated session (if available)
-            try:
-                auth_ytmusic = YTMusic()  # Try default auth
-                playlist = auth_ytmusic.get_playlist(playlist_id, limit=100)
-            except Exception:
-                pass
-        
-        if not playlist:
-            return []
-        
         tracks = []
-        for item in playlist.get('tracks', []):
-            # More robust checking for playable tracks
-            video_id = item.get('videoId')
-            if video_id and video_id != 'None' and video_id.strip():
-                # Additional validation
-                is_available = item.get('isAvailable', True)
-                if is_available or is_available is None:  # None often means available
-                    tracks.append({
-                        "title": item.get("title", "Unknown"),
-                        "artist": item.get("artists", [{"name": "Unknown"}])[0].get("name", "Unknown"),
-                        "videoId": video_id,
-                        "thumbnail": item.get("thumbnails", [{}])[-1].get("url", "")
-                    })
-        
+        for page in iter_playlist_pages(playlist_url_or_id):
+            tracks.extend(page)
         return tracks
     except Exception as e:
         # Log the error for debugging (you might want to remove this in production)
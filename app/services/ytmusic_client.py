@@ -0,0 +1,142 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from app.services.http import pool_stats, request_timeout, session
+from app.services.tracing import span
+
+API_HOST = "music.youtube.com"
+MAX_CONCURRENT = int(os.environ.get("CPLAYER_YTMUSIC_CONCURRENCY", "4"))
+CALL_TIMEOUT = 10  # Seconds per HTTP request of a call
+RETRIES = 2  # Further attempts after a transient failure
+BACKOFF = 0.25  # Seconds before the first retry, doubled for each further one
+
+_HTTP_STATUS = re.compile(r"HTTP (\d{3})")
+
+
+def transient(error):
+    """Whether a failed call is worth retrying: network trouble, 429 or 5xx"""
+    import requests
+
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, json.JSONDecodeError):
+        return True  # An error page instead of JSON, e.g. from a proxy
+    match = _HTTP_STATUS.search(str(error))
+    if match and type(error).__name__ == "YTMusicServerError":
+        status = int(match.group(1))
+        return status == 429 or status >= 500
+    return False
+
+
+class YTMusicClient:
+    """The one way the app talks to YouTube Music.
+
+    Owns a single YTMusic instance on the shared keep-alive HTTP session,
+    so every call reuses pooled connections. call() bounds how many calls
+    run at once, handing free slots out first come, first served, applies
+    a per-request timeout (ytmusicapi sets none), and retries transient
+    failures with jittered exponential backoff. Each
+    attempt is traced as a "ytmusic.<method>" span; stats() adds counters
+    and the connection pool's reuse.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, timeout=CALL_TIMEOUT, retries=RETRIES, backoff=BACKOFF):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_concurrent = max_concurrent
+        self.api = None  # Built on first use: importing ytmusicapi alone takes ~100 ms
+        self.calls = 0
+        self.attempts = 0
+        self.retried = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()  # Only guards building api, so stats() never waits on it
+        self._slot_free = threading.Condition(self._lock)
+        self._waiting = deque()
+
+    def _api(self):
+        api = self.api
+        if api is not None:
+            return api
+        with self._init_lock:
+            if self.api is None:
+                from ytmusicapi import YTMusic
+                self.api = YTMusic(requests_session=session())
+            return self.api
+
+    def _acquire(self):
+        """Wait for a free slot; waiters are served in arrival order"""
+        ticket = object()
+        waited = time.perf_counter()
+        with self._lock:
+            self._waiting.append(ticket)
+            while self._waiting[0] is not ticket or self.in_flight >= self.max_concurrent:
+                self._slot_free.wait()
+            self._waiting.popleft()
+            self.wait_seconds += time.perf_counter() - waited
+            self.attempts += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self._slot_free.notify_all()  # The next in line may fit too
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._slot_free.notify_all()
+
+    def call(self, method, *args, timeout=None, retries=None, span_name=None, **kwargs):
+        """Run YTMusic.<method>(*args, **kwargs); raises the last error if every attempt fails"""
+        api = self._api()
+        retries = self.retries if retries is None else retries
+        name = span_name or f"ytmusic.{method}"
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                with span(name, attempt=attempt):
+                    with request_timeout(timeout or self.timeout):
+                        return getattr(api, method)(*args, **kwargs)
+            except Exception as e:
+                if attempt >= retries or not transient(e):
+                    with self._lock:
+                        self.failures += 1
+                    raise
+            finally:
+                self._release()
+            # Back off without holding a slot so other calls can use it
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            attempt += 1
+            with self._lock:
+                self.retried += 1
+            time.sleep(delay)
+
+    def stats(self):
+        pool = pool_stats().get(API_HOST, {})
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'attempts': self.attempts,
+                'retries': self.retried,
+                'failures': self.failures,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'max_concurrent': self.max_concurrent,
+                'wait_ms': round(self.wait_seconds * 1000, 1),
+                'connections': pool.get('connections', 0),
+                'requests': pool.get('requests', 0),
+                'reuse_rate': pool.get('reuse_rate', 0.0),
+            }
+
+
+ytmusic_client = YTMusicClient()
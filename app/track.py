@@ -0,0 +1,71 @@
+import sys
+from collections.abc import Mapping
+
+FIELDS = ("videoId", "title", "artist", "thumbnail")
+
+
+class Track(Mapping):
+    """One playable track, compact enough to hold tens of thousands of.
+
+    The rest of the app passes tracks around as dicts, so a Track reads
+    like one (track['title'], track.get('album'), dict(track) for JSON) but
+    keeps its four common fields in slots instead of a per-track hash
+    table. Artist names repeat across a queue and are interned. Any other
+    keys a source supplied (album, duration, ...) are kept in a small dict.
+    Tracks are immutable.
+    """
+
+    __slots__ = ("videoId", "title", "artist", "thumbnail", "_extra")
+
+    def __init__(self, videoId, title="Unknown", artist="Unknown", thumbnail="", extra=None):
+        set_slot = object.__setattr__
+        set_slot(self, "videoId", videoId)
+        set_slot(self, "title", title)
+        set_slot(self, "artist", sys.intern(artist) if type(artist) is str else artist)
+        set_slot(self, "thumbnail", thumbnail)
+        set_slot(self, "_extra", extra or None)
+
+    @classmethod
+    def of(cls, track):
+        """track as a Track; Tracks are returned as they are"""
+        if type(track) is cls:
+            return track
+        extra = {k: v for k, v in track.items() if k not in FIELDS}
+        return cls(
+            track["videoId"],
+            track.get("title", "Unknown"),
+            track.get("artist", "Unknown"),
+            track.get("thumbnail", ""),
+            extra,
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Track is immutable")
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __iter__(self):
+        yield from FIELDS
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return len(FIELDS) + (len(self._extra) if self._extra is not None else 0)
+
+    def __repr__(self):
+        return f"Track({self.videoId!r}, {self.title!r}, {self.artist!r})"
+
+    def __reduce__(self):
+        return (Track, (self.videoId, self.title, self.artist, self.thumbnail, self._extra))
@@ -0,0 +1,93 @@
+from rich.color import Color
+from rich.style import Style
+from rich.text import Text
+from textual.message import Message
+from textual.widgets import Static
+
+from app.services import art_cache as art
+
+
+def half_blocks(pixels, width):
+    """Draw RGB pixel rows as half-block cells: each cell is a top pixel over a bottom one"""
+    row_bytes = width * 3
+    styles = {}
+    text = Text(no_wrap=True, overflow="crop")
+    for top in range(0, len(pixels), row_bytes * 2):
+        if top:
+            text.append("\n")
+        for x in range(0, row_bytes, 3):
+            upper = pixels[top + x:top + x + 3]
+            lower = pixels[top + row_bytes + x:top + row_bytes + x + 3]
+            style = styles.get((upper, lower))
+            if style is None:
+                style = styles[(upper, lower)] = Style(
+                    color=Color.from_rgb(*upper), bgcolor=Color.from_rgb(*lower)
+                )
+            text.append("▀", style)
+    return text
+
+
+class AlbumArt(Static):
+    """Album art of the current track, drawn with half blocks.
+
+    Fetching and decoding happen on the art cache's threads; this widget
+    only turns finished pixels into cells. Hidden when there is no art to
+    show (no Pillow, art disabled, or the thumbnail failed to load).
+    """
+
+    DEFAULT_CSS = f"""
+    AlbumArt {{
+        width: {art.ART_WIDTH};
+        height: {art.ART_HEIGHT};
+        margin: 0 0 1 0;
+        display: none;
+    }}
+    AlbumArt.-loaded {{
+        display: block;
+    }}
+    """
+
+    class Loaded(Message):
+        """Art finished loading; posted from an art cache thread"""
+
+        def __init__(self, url, pixels):
+            super().__init__()
+            self.url = url
+            self.pixels = pixels
+
+    def __init__(self, *, id=None, classes=None):
+        super().__init__("", id=id, classes=classes)
+        self.url = None
+
+    def show_track(self, track):
+        url = (track or {}).get('thumbnail')
+        if url == self.url:
+            return
+        self.url = url
+        if not url or not art.available():
+            self._show(None)
+            return
+        pixels = art.art_cache.cached(url)
+        if pixels is not None:
+            self._show(pixels)
+            return
+        # Keep the previous art up until the new one is ready rather than flashing empty
+        art.art_cache.load(url).add_done_callback(lambda future: self._post_loaded(url, future))
+
+    def _post_loaded(self, url, future):
+        # post_message is thread-safe, and this may also run inline if the future is done
+        pixels = None if future.cancelled() or future.exception() else future.result()
+        self.post_message(self.Loaded(url, pixels))
+
+    def on_album_art_loaded(self, message):
+        message.stop()
+        if message.url == self.url:
+            self._show(message.pixels)
+
+    def _show(self, pixels):
+        if pixels is None:
+            self.set_class(False, "-loaded")
+            self.update("")
+            return
+        self.update(half_blocks(pixels, art.art_cache.width))
+        self.set_class(True, "-loaded")
@@ -1,6 +1,8 @@
 from textual.widgets import Static, ProgressBar, Label
 from textual.containers import Vertical
 
+from app.ui.art import AlbumArt
+
 def format_time(seconds):
     """Format seconds into MM:SS format"""
     minutes = int(seconds // 60)
@@ -10,6 +12,7 @@ def format_time(seconds):
 class MetadataPanel(Static):
     def compose(self):
         with Vertical():
+            yield AlbumArt(id="album_art")
             yield Label("", id="track_info")
             yield Label("00:00 / 00:00", id="time_label")
             yield ProgressBar(id="progress")
@@ -27,6 +30,7 @@ class MetadataPanel(Static):
         video_id = track.get('videoId', 'N/A')
         album = track.get('album', 'Unknown Album')
         duration = track.get('duration', 'N/A')
+        self.query_one(AlbumArt).show_track(track)
         
         track_info = self.query_one("#track_info", Label)
         track_info.update(
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+FRAME_RATE = 20  # Upper bound on UI repaints per second driven by playback state
+
+
+class FrameScheduler:
+    """Coalesces state changes into at most one UI update per frame.
+
+    Producers call mark() with the names of whatever changed, from any
+    thread (the player calls it from its IPC reader). The first mark after
+    a quiet period schedules a frame on the event loop; later marks only
+    add names until it runs. The frame then calls each affected callback
+    once. Nothing is scheduled while nothing changes, so a stopped or
+    paused player costs no CPU.
+    """
+
+    def __init__(self, fps=FRAME_RATE):
+        self.interval = 1 / fps
+        self.frames = 0
+        self.marks = 0
+        self._callbacks = {}
+        self._dirty = set()
+        self._pending = False
+        self._lock = threading.Lock()
+        self._loop = None
+        self._last_frame = 0.0
+
+    def start(self):
+        """Bind to the running event loop; call from the UI thread"""
+        self._loop = asyncio.get_running_loop()
+
+    def stop(self):
+        with self._lock:
+            self._loop = None
+            self._dirty.clear()
+
+    def register(self, name, callback):
+        """Run callback on the next frame after name is marked"""
+        self._callbacks.setdefault(name, []).append(callback)
+
+    def mark(self, *names):
+        """Record that names changed; safe to call from any thread"""
+        with self._lock:
+            self.marks += 1
+            self._dirty.update(names)
+            if self._pending or self._loop is None:
+                return
+            self._pending = True
+            loop = self._loop
+        try:
+            loop.call_soon_threadsafe(self._schedule)
+        except RuntimeError:
+            # The loop closed during shutdown
+            pass
+
+    def _schedule(self):
+        loop = self._loop
+        if loop is None:
+            return
+        delay = self._last_frame + self.interval - time.monotonic()
+        if delay > 0:
+            loop.call_later(delay, self._flush)
+        else:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            self._pending = False
+            if self._loop is None:
+                return
+        self._last_frame = time.monotonic()
+        self.frames += 1
+
+        # Several names can share a callback; run each one once per frame
+        callbacks = {}
+        for name in dirty:
+            for callback in self._callbacks.get(name, ()):
+                callbacks[callback] = None
+        for callback in callbacks:
+            callback()
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'marks': self.marks,
+            'coalesced': self.marks - self.frames,
+        }
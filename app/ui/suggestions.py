@@ -0,0 +1,103 @@
+from rich.text import Text
+from textual.binding import Binding
+from textual.message import Message
+from textual.widgets import OptionList
+
+MAX_ROWS = 12
+
+
+class Suggestions(OptionList):
+    """Jump-to matches and query suggestions shown under the search box.
+
+    Local tracks come first, then what YouTube Music suggests searching
+    for. Hidden while both are empty. Tab moves here from the search box,
+    Enter plays the highlighted track or searches the highlighted query,
+    and Escape goes back to typing.
+    """
+
+    BINDINGS = [
+        Binding("escape", "back", "Back to search", show=False),
+    ]
+
+    DEFAULT_CSS = f"""
+    Suggestions {{
+        display: none;
+        max-height: {MAX_ROWS + 2};
+        margin: 0 1 1 1;
+        border: solid #6366f1;
+        background: #1a1a2e;
+    }}
+    Suggestions.-visible {{
+        display: block;
+    }}
+    Suggestions:focus {{
+        border: solid #818cf8;
+    }}
+    """
+
+    class Chosen(Message):
+        """Posted when a match is picked; tracks are all the shown matches"""
+
+        def __init__(self, suggestions, index, tracks):
+            super().__init__()
+            self.suggestions = suggestions
+            self.index = index
+            self.tracks = tracks
+
+        @property
+        def control(self):
+            return self.suggestions
+
+    class QueryChosen(Message):
+        """Posted when a suggested query is picked"""
+
+        def __init__(self, suggestions, query):
+            super().__init__()
+            self.suggestions = suggestions
+            self.query = query
+
+        @property
+        def control(self):
+            return self.suggestions
+
+    def __init__(self, *, id=None, classes=None):
+        super().__init__(id=id, classes=classes)
+        self.tracks = []
+        self.queries = []
+
+    def show_tracks(self, tracks):
+        """Replace the local matches"""
+        if [t.get('videoId') for t in tracks] != [t.get('videoId') for t in self.tracks]:
+            self.tracks = list(tracks)
+            self._rebuild()
+
+    def show_queries(self, queries):
+        """Replace the suggested queries"""
+        if list(queries) != self.queries:
+            self.queries = list(queries)
+            self._rebuild()
+
+    def clear(self):
+        self.show_tracks([])
+        self.show_queries([])
+
+    def _rebuild(self):
+        self.clear_options()
+        self.add_options(
+            Text.assemble(t.get('title') or "Unknown", (f" - {t.get('artist') or ''}", "dim"))
+            for t in self.tracks
+        )
+        self.add_options(Text.assemble(("search ", "dim"), query) for query in self.queries)
+        self.highlighted = 0 if self.option_count else None
+        self.set_class(bool(self.option_count), "-visible")
+
+    def on_option_list_option_selected(self, event):
+        event.stop()
+        index = event.option_index
+        if index < len(self.tracks):
+            self.post_message(self.Chosen(self, index, self.tracks))
+        else:
+            self.post_message(self.QueryChosen(self, self.queries[index - len(self.tracks)]))
+
+    def action_back(self):
+        self.app.query_one("Input").focus()
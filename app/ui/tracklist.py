@@ -0,0 +1,179 @@
+from rich.segment import Segment
+from textual.binding import Binding
+from textual.geometry import Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+
+class TrackList(ScrollView, can_focus=True):
+    """Track list that only renders the rows inside the viewport.
+
+    Rows are drawn on demand with the line API instead of being mounted as
+    widgets, so memory and layout cost stay flat however long the queue is.
+    """
+
+    BINDINGS = [
+        Binding("enter", "select_cursor", "Play", show=False),
+        Binding("up", "cursor_up", "Up", show=False),
+        Binding("down", "cursor_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home", "first", "First", show=False),
+        Binding("end", "last", "Last", show=False),
+        Binding("a", "edit('play_next')", "Play next", show=False),
+        Binding("delete", "edit('remove')", "Remove", show=False),
+        Binding("shift+up", "edit('move_up')", "Move up", show=False),
+        Binding("shift+down", "edit('move_down')", "Move down", show=False),
+    ]
+
+    COMPONENT_CLASSES = {
+        "tracklist--cursor",
+        "tracklist--playing",
+    }
+
+    cursor = reactive(0, always_update=True)
+
+    class Selected(Message):
+        """Posted when a row is chosen with Enter or a click"""
+
+        def __init__(self, track_list, index, track):
+            super().__init__()
+            self.track_list = track_list
+            self.index = index
+            self.track = track
+
+        @property
+        def control(self):
+            return self.track_list
+
+    class Edited(Message):
+        """Posted to play a row next, remove it or move it ("play_next", "remove", "move_up", "move_down")"""
+
+        def __init__(self, track_list, action, index, track):
+            super().__init__()
+            self.track_list = track_list
+            self.action = action
+            self.index = index
+            self.track = track
+
+        @property
+        def control(self):
+            return self.track_list
+
+    def __init__(self, *, id=None, classes=None):
+        super().__init__(id=id, classes=classes)
+        self.tracks = []
+        self.playing_index = -1
+
+    def set_tracks(self, tracks):
+        """Replace the whole list in one step"""
+        self.tracks = list(tracks)
+        self.playing_index = -1
+        self._update_virtual_size()
+        self.scroll_to(y=0, animate=False)
+        self.cursor = 0
+        self.refresh()
+
+    def append_tracks(self, tracks):
+        """Add rows to the end without touching the existing ones"""
+        start = len(self.tracks)
+        self.tracks.extend(tracks)
+        self._update_virtual_size()
+        self.refresh_lines(start, len(tracks))
+
+    def update_tracks(self, tracks, cursor=None):
+        """Show an edited queue, keeping the scroll position and (or moving) the cursor"""
+        self.tracks = list(tracks)
+        self.playing_index = -1
+        self._update_virtual_size()
+        self.cursor = self.cursor if cursor is None else cursor
+        self.refresh()
+
+    def set_playing(self, index):
+        """Mark the row at index as playing (-1 for none)"""
+        previous, self.playing_index = self.playing_index, index
+        if previous >= 0:
+            self.refresh_line(previous)
+        if index >= 0:
+            self.refresh_line(index)
+
+    def _update_virtual_size(self):
+        self.virtual_size = Size(self.scrollable_content_region.width, len(self.tracks))
+
+    def on_resize(self):
+        self._update_virtual_size()
+
+    def watch_cursor(self, old, new):
+        if not self.tracks:
+            return
+        clamped = max(0, min(new, len(self.tracks) - 1))
+        if clamped != new:
+            self.cursor = clamped
+            return
+        self.refresh_line(old)
+        self.refresh_line(new)
+        top = self.scroll_offset.y
+        height = self.scrollable_content_region.height
+        if new < top:
+            self.scroll_to(y=new, animate=False)
+        elif height and new >= top + height:
+            self.scroll_to(y=new - height + 1, animate=False)
+
+    def render_line(self, y):
+        index = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        if index >= len(self.tracks):
+            return Strip.blank(width, self.rich_style)
+
+        track = self.tracks[index]
+        style = self.rich_style
+        if index == self.playing_index:
+            style += self.get_component_rich_style("tracklist--playing")
+        if index == self.cursor and self.has_focus:
+            style += self.get_component_rich_style("tracklist--cursor")
+        marker = "▶ " if index == self.playing_index else "  "
+        text = f"{marker}{track['title']} — {track['artist']}"
+        return Strip([Segment(text, style)]).adjust_cell_length(width, style)
+
+    def on_focus(self):
+        self.refresh_line(self.cursor)
+
+    def on_blur(self):
+        self.refresh_line(self.cursor)
+
+    def on_click(self, event):
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        index = self.scroll_offset.y + offset.y
+        if 0 <= index < len(self.tracks):
+            self.cursor = index
+            self.action_select_cursor()
+
+    def action_select_cursor(self):
+        if 0 <= self.cursor < len(self.tracks):
+            self.post_message(self.Selected(self, self.cursor, self.tracks[self.cursor]))
+
+    def action_edit(self, action):
+        if 0 <= self.cursor < len(self.tracks):
+            self.post_message(self.Edited(self, action, self.cursor, self.tracks[self.cursor]))
+
+    def action_cursor_up(self):
+        self.cursor -= 1
+
+    def action_cursor_down(self):
+        self.cursor += 1
+
+    def action_page_up(self):
+        self.cursor -= max(1, self.scrollable_content_region.height - 1)
+
+    def action_page_down(self):
+        self.cursor += max(1, self.scrollable_content_region.height - 1)
+
+    def action_first(self):
+        self.cursor = 0
+
+    def action_last(self):
+        self.cursor = len(self.tracks) - 1
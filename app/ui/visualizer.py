@@ -1,19 +1,87 @@
-import random
+from textual import work
 from textual.widgets import Static
 
+from app.controller.spectrum import SpectrumTap, BAR_COUNT, FRAME_RATE, probe
+
+IDLE_BARS = "▁" * BAR_COUNT
+BLOCKS = " ▁▂▃▄▅▆▇█"
+
 class Visualizer(Static):
+    """Spectrum bars of the playing audio.
+
+    Levels come from a SpectrumTap that analyzes the stream on its own
+    thread; this widget only draws the latest levels at FRAME_RATE. Without
+    a tap (no ffmpeg or NumPy) it keeps the flat idle bars.
+    """
+
     def __init__(self):
-        super().__init__()
+        super().__init__(IDLE_BARS)
         self.player = None
+        self.spectrum = None
+        self.active = False
+        self._timer = None
+        self._shown = IDLE_BARS
         self.styles.width = 24
         self.styles.height = 6
 
     def attach_player(self, player):
         self.player = player
-        self.set_interval(0.15, self.tick)
+        self.spectrum = SpectrumTap(position=lambda: player.time_pos)
+        # Only ticks while audio is playing; see set_active()
+        self._timer = self.set_interval(1 / FRAME_RATE, self.tick, pause=True)
+        self.probe_spectrum()
 
-    def tick(self):
-        if not self.player or not self.player.running:
-            self.update("▁" * 22)
+    @work(thread=True, exit_on_error=False)
+    def probe_spectrum(self):
+        """Look for ffmpeg and NumPy now, so the first track does not wait on it"""
+        probe()
+
+    def set_active(self, active):
+        """Follow the current track while playing; go flat and idle otherwise"""
+        if self._timer is None:
             return
-        self.update("".join(random.choice("▁▂▃▄▅▆▇█") for _ in range(22)))
+        if active and self.player.track:
+            self.spectrum.follow(self.player.track["videoId"])
+        elif self.player.running and self.player.track:
+            active = False
+            # Paused: keep ffmpeg and its place for when playback resumes
+            self.spectrum.pause()
+        else:
+            active = False
+            self.spectrum.stop()
+        if active == self.active:
+            return
+        self.active = active
+        if active:
+            self._timer.resume()
+        else:
+            self._timer.pause()
+            self._show(IDLE_BARS)
+
+    def detach(self):
+        if self.spectrum is not None:
+            self.spectrum.stop()
+
+    def tick(self):
+        levels = self.spectrum.levels() if self.spectrum else None
+        self._show(self.render_bars(levels) if levels else IDLE_BARS)
+
+    def render_bars(self, levels):
+        """Draw levels (0..1) as bars filling the widget's content height"""
+        rows = max(1, self.content_size.height)
+        steps = len(BLOCKS) - 1
+        heights = [round(level * rows * steps) for level in levels]
+        lines = []
+        for row in reversed(range(rows)):
+            base = row * steps
+            lines.append("".join(
+                # The bottom row always shows at least a sliver, like the idle bars
+                BLOCKS[min(steps, max(h - base, 1 if row == 0 else 0))]
+                for h in heights
+            ))
+        return "\n".join(lines)
+
+    def _show(self, text):
+        if text != self._shown:
+            self._shown = text
+            self.update(text)
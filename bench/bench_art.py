@@ -0,0 +1,188 @@
+"""Album art pipeline against a local HTTP server.
+
+Usage: python -m bench.bench_art [--images N] [--delay S]
+
+Serves generated JPEG thumbnails from a local HTTP/1.1 server with a
+configurable delay and drives ArtCache the way the app does. It measures:
+cold fetch and decode latency, memory and disk hit latency, how many TCP
+connections the fetches needed (pooling should keep this at one or two),
+whether the memory budget holds, whether prefetched art is ready when its
+track starts, and the UI-thread cost of turning pixels into half blocks.
+Needs Pillow; no network. Prints one JSON object and exits non-zero if a
+check fails.
+"""
+import argparse
+import io
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from app.services import art_cache as art
+from app.services.art_cache import ArtCache
+
+
+def make_thumbnails(count):
+    """JPEG 4:3 frames with a letterboxed, differently coloured picture each"""
+    images = []
+    for i in range(count):
+        frame = art.Image.new("RGB", (480, 360))
+        picture = art.Image.new("RGB", (480, 270), ((i * 37) % 256, (i * 91) % 256, (i * 53) % 256))
+        frame.paste(picture, (0, 45))
+        data = io.BytesIO()
+        frame.save(data, "JPEG", quality=85)
+        images.append(data.getvalue())
+    return images
+
+
+class ThumbnailServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, images, delay):
+        self.images = images
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        super().__init__(("127.0.0.1", 0), ThumbnailHandler)
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+    def url(self, i):
+        return f"http://127.0.0.1:{self.server_address[1]}/vi/{i}/hqdefault.jpg"
+
+
+class ThumbnailHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like i.ytimg.com
+    disable_nagle_algorithm = True  # Else headers and body wait on delayed ACKs
+
+    def do_GET(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        try:
+            data = self.server.images[int(self.path.split("/")[2])]
+        except (IndexError, ValueError):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def timed_loads(cache, urls):
+    samples = []
+    for url in urls:
+        start = time.perf_counter()
+        pixels = cache.load(url).result()
+        samples.append(time.perf_counter() - start)
+        if pixels is None:
+            return None
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=60)
+    parser.add_argument("--delay", type=float, default=0.03, help="Server response delay in seconds")
+    parser.add_argument("--play-seconds", type=float, default=0.1, help="How long each prefetch test track plays")
+    args = parser.parse_args()
+
+    if not art._load_pillow():
+        sys.exit("bench_art needs Pillow")
+    from app.ui.art import half_blocks
+
+    server = ThumbnailServer(make_thumbnails(args.images), args.delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [server.url(i) for i in range(args.images)]
+    failures = []
+
+    with tempfile.TemporaryDirectory(prefix="cplayer-bench-art-") as tmp:
+        directory = Path(tmp)
+        cache = ArtCache(directory=directory, max_bytes=1024 * 1024)
+
+        cold = timed_loads(cache, urls)
+        if cold is None:
+            sys.exit("bench_art: a thumbnail failed to load")
+        connections = server.connections
+
+        start = time.perf_counter()
+        for url in urls:
+            cache.cached(url)
+        memory_hit_us = (time.perf_counter() - start) * 1e6 / len(urls)
+
+        # A new process: memory is empty, the renderings on disk are reused
+        restarted = ArtCache(directory=directory, max_bytes=1024 * 1024)
+        requests_before = server.requests
+        disk = timed_loads(restarted, urls)
+        if server.requests != requests_before:
+            failures.append("disk cache missed")
+
+        # A budget of ten renderings over all images
+        pixel_bytes = cache.width * cache.height * 2 * 3
+        small = ArtCache(directory=directory, max_bytes=pixel_bytes * 10)
+        timed_loads(small, urls)
+        small_stats = small.stats()
+        if small_stats['bytes'] > small.max_bytes:
+            failures.append("memory budget exceeded")
+
+        # Playing a queue: while each track plays, the next three are prefetched
+        fresh = ArtCache(directory=directory / "prefetch", max_bytes=1024 * 1024)
+        ready = 0
+        for i, url in enumerate(urls[:20]):
+            ready += fresh.cached(url) is not None
+            fresh.load(url)
+            fresh.prefetch(urls[i + 1:i + 4])
+            time.sleep(args.play_seconds)
+        # The first track cannot have been prefetched
+        ready_rate = ready / (min(20, len(urls)) - 1)
+
+        pixels = cache.cached(urls[0])
+        start = time.perf_counter()
+        for _ in range(50):
+            half_blocks(pixels, cache.width)
+        draw_ms = (time.perf_counter() - start) * 1000 / 50
+
+        for c in (cache, restarted, small, fresh):
+            c.shutdown()
+    server.shutdown()
+
+    if connections > 2:
+        failures.append("connections were not reused")
+    if ready_rate < 1.0:
+        failures.append("prefetched art was not ready")
+    print(json.dumps({
+        "benchmark": "art",
+        "images": args.images,
+        "server_delay_ms": ms(args.delay),
+        "cold_p50_ms": ms(statistics.median(cold)),
+        "cold_max_ms": ms(max(cold)),
+        "connections": connections,
+        "memory_hit_us": round(memory_hit_us, 2),
+        "disk_p50_ms": ms(statistics.median(disk)),
+        "capped_bytes": small_stats['bytes'],
+        "capped_max_bytes": small.max_bytes,
+        "capped_evictions": small_stats['evictions'],
+        "prefetch_ready_rate": round(ready_rate, 3),
+        "draw_ms": round(draw_ms, 3),
+        "failures": failures,
+    }, indent=1))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
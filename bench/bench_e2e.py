@@ -0,0 +1,352 @@
+"""End-to-end scenarios that drive the real app against local fakes.
+
+Usage: python -m bench.bench_e2e SCENARIO [--count N]
+
+Scenarios: startup, search, suggest, ttfa, switch, session, radio. Meant to be launched by
+bench.suite, which gives each run a throwaway HOME and puts the fake mpv
+and yt-dlp from bench/fakes/bin first on PATH. Prints one JSON object.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import threading
+import time
+
+from bench.bench_ipc import open_fds
+from bench.bench_resolver import rss_kb
+
+
+def ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def summary(prefix, samples):
+    """p50/p90/max of samples (seconds) as millisecond fields"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        f"{prefix}_p50_ms": ms(statistics.median(ordered)),
+        f"{prefix}_p90_ms": ms(ordered[math.ceil(len(ordered) * 0.9) - 1]),
+        f"{prefix}_max_ms": ms(ordered[-1]),
+    }
+
+
+def load_app():
+    """Import the app with YouTube Music replaced by the recorded fake"""
+    start = time.perf_counter()
+    from bench.fakes.fake_ytmusic import FakeYTMusic, install
+    from app.main import CPlayer
+    import_ms = ms(time.perf_counter() - start)
+    install(FakeYTMusic(delay=float(os.environ.get("FAKE_YTMUSIC_DELAY", "0.15"))))
+    return CPlayer, import_ms
+
+
+async def wait_for(pilot, predicate, timeout=15.0):
+    """Poll predicate on the UI loop; returns seconds waited or None on timeout"""
+    start = time.perf_counter()
+    while not predicate():
+        if time.perf_counter() - start > timeout:
+            return None
+        await pilot.pause(0.001)
+    return time.perf_counter() - start
+
+
+async def search(app, pilot, query):
+    """Submit query in the input box and wait until its results are rendered"""
+    from textual.widgets import Input
+    from app.ui.tracklist import TrackList
+
+    track_list = app.query_one("#results", TrackList)
+    before = track_list.tracks[0]["videoId"] if track_list.tracks else None
+    search_input = app.query_one(Input)
+    search_input.focus()
+    search_input.value = query
+    start = time.perf_counter()
+    await pilot.press("enter")
+    waited = await wait_for(pilot, lambda: track_list.tracks and track_list.tracks[0]["videoId"] != before)
+    if waited is None:
+        return None
+    await pilot.pause()  # Let the frame with the new rows render
+    return time.perf_counter() - start
+
+
+async def play_index(app, pilot, index):
+    """Select row index in the track list; returns seconds until first audio"""
+    from app.ui.tracklist import TrackList
+
+    track_list = app.query_one("#results", TrackList)
+    track_list.focus()
+    track_list.cursor = index
+    played = app.player.first_audio_count
+    start = time.perf_counter()
+    await pilot.press("enter")
+    if await wait_for(pilot, lambda: app.player.first_audio_count > played) is None:
+        return None
+    return time.perf_counter() - start
+
+
+async def next_track(app, pilot):
+    """Press n; returns seconds until the next track's first audio"""
+    played = app.player.first_audio_count
+    start = time.perf_counter()
+    await pilot.press("n")
+    if await wait_for(pilot, lambda: app.player.first_audio_count > played) is None:
+        return None
+    return time.perf_counter() - start
+
+
+async def prefetch_settled(app, pilot):
+    await wait_for(pilot, lambda: all(p["state"] == "ready" for p in app.queue.prefetched()[:1]), timeout=5.0)
+
+
+async def startup(count):
+    CPlayer, import_ms = load_app()
+    result = {"import_ms": import_ms}
+    # The first run has no trending snapshot yet; later ones start from it
+    for label in ["cold"] + ["warm"] * max(1, count - 1):
+        start = time.perf_counter()
+        app = CPlayer()
+        async with app.run_test() as pilot:
+            waited = await wait_for(pilot, lambda: app.interactive_at is not None)
+            first_frame = app.interactive_at - start if waited is not None else None
+            await wait_for(pilot, lambda: len(app.queue.tracks) > 0, timeout=5.0)
+            tracks_ready = time.perf_counter() - start
+            app.workers.cancel_all()
+        result.setdefault(f"{label}_first_frame_ms", ms(first_frame) if first_frame else None)
+        result.setdefault(f"{label}_tracks_ms", ms(tracks_ready))
+    return result
+
+
+async def search_scenario(count):
+    CPlayer, _ = load_app()
+    app = CPlayer()
+    cold, warm = [], []
+    async with app.run_test() as pilot:
+        await wait_for(pilot, lambda: app.interactive_at is not None)
+        app.workers.cancel_all()
+        queries = [f"bench query {i}" for i in range(count)]
+        for query in queries:
+            cold.append(await search(app, pilot, query))
+        # Same queries again, now answered from the search cache
+        for query in queries:
+            warm.append(await search(app, pilot, query))
+    return {
+        "searches": count,
+        "timeouts": (cold + warm).count(None),
+        **summary("cold", [s for s in cold if s is not None]),
+        **summary("warm", [s for s in warm if s is not None]),
+    }
+
+
+KEY_DELAY = 0.08  # Seconds between keystrokes: a quick typist
+PHRASES = ["dua lipa houdini", "daft punk get lucky", "lofi hip hop", "top hits this week"]
+
+
+async def type_query(app, pilot, text):
+    """Type text key by key; returns seconds from the last key until suggestions match it"""
+    from textual.widgets import Input
+    from app.services.suggestions import suggestion_key
+    from app.ui.suggestions import Suggestions
+
+    search_input = app.query_one(Input)
+    search_input.focus()
+    search_input.value = ""
+    for char in text:
+        await pilot.press("space" if char == " " else char)
+        await pilot.pause(KEY_DELAY)
+    suggestions = app.query_one(Suggestions)
+    key = suggestion_key(text)
+    # The typing pause above already counts towards the wait
+    waited = await wait_for(pilot, lambda: suggestions.queries and suggestion_key(suggestions.queries[0]).startswith(key))
+    return None if waited is None else waited + KEY_DELAY
+
+
+async def suggest_scenario(count):
+    """Type queries at typing speed and count the suggestion requests they cost"""
+    from app.services.suggestions import suggestion_cache
+
+    CPlayer, _ = load_app()
+    app = CPlayer()
+    phrases = (PHRASES + [f"bench phrase {i}" for i in range(count)])[:count]
+    async with app.run_test() as pilot:
+        await wait_for(pilot, lambda: app.interactive_at is not None)
+        app.workers.cancel_all()
+        settled = [await type_query(app, pilot, phrase) for phrase in phrases]
+        first = suggestion_cache.stats()
+        # Typing the same queries again is answered from the cache
+        for phrase in phrases:
+            await type_query(app, pilot, phrase)
+        again = suggestion_cache.stats()
+    return {
+        "queries": count,
+        "timeouts": settled.count(None),
+        "keystrokes": first["keystrokes"],
+        "requests": first["requests"],
+        "requests_per_keystroke": round(first["requests_per_keystroke"], 3),
+        "prefix_hits": first["prefix_hits"],
+        "superseded": first["superseded"],
+        "retype_requests": again["requests"] - first["requests"],
+        **summary("settle", [s for s in settled if s is not None]),
+    }
+
+
+async def ttfa_scenario(count):
+    CPlayer, _ = load_app()
+    app = CPlayer()
+    samples = []
+    async with app.run_test() as pilot:
+        await wait_for(pilot, lambda: app.interactive_at is not None)
+        app.workers.cancel_all()
+        for i in range(count):
+            # Fresh results each time, so the stream URL is never prefetched
+            await search(app, pilot, f"ttfa {i}")
+            samples.append(await play_index(app, pilot, 0))
+        app.player.stop()
+    return {
+        "mode": app.player.mode,
+        "plays": count,
+        "timeouts": samples.count(None),
+        **summary("ttfa", [s for s in samples if s is not None]),
+        "spawns": app.player.spawn_count,
+    }
+
+
+async def switch_scenario(count):
+    CPlayer, _ = load_app()
+    app = CPlayer()
+    samples = []
+    async with app.run_test() as pilot:
+        await wait_for(pilot, lambda: app.interactive_at is not None)
+        app.workers.cancel_all()
+        await search(app, pilot, "switch tracks")
+        await play_index(app, pilot, 0)
+        for _ in range(count):
+            # A listener skips after prefetch has had a moment to run
+            await prefetch_settled(app, pilot)
+            samples.append(await next_track(app, pilot))
+        app.player.stop()
+    return {
+        "mode": app.player.mode,
+        "switches": count,
+        "timeouts": samples.count(None),
+        **summary("switch", [s for s in samples if s is not None]),
+        "spawns": app.player.spawn_count,
+    }
+
+
+RADIO_TRACK_SECONDS = 1.0  # How long the fake mpv plays each track in the radio scenario
+
+
+async def radio_scenario(count):
+    """Let tracks play out from near the end of a queue with radio on"""
+    from textual.widgets import Input
+
+    # Inherited by the fake mpv, which the app starts on the first play
+    os.environ["FAKE_MPV_DURATION"] = str(RADIO_TRACK_SECONDS)
+    CPlayer, _ = load_app()
+    app = CPlayer()
+    starts, ran_dry, timeouts = [], 0, 0
+    async with app.run_test() as pilot:
+        await wait_for(pilot, lambda: app.interactive_at is not None)
+        app.workers.cancel_all()
+        search_input = app.query_one(Input)
+        search_input.value = ":radio on"
+        search_input.focus()
+        await pilot.press("enter")
+        await search(app, pilot, "radio seed")
+        await play_index(app, pilot, len(app.queue.tracks) - 2)
+        playing = app.player.track["videoId"]
+        starts.append(time.perf_counter())
+        while len(starts) <= count:
+            changed = lambda: app.player.track["videoId"] != playing or app.queue.dry
+            if await wait_for(pilot, changed, timeout=RADIO_TRACK_SECONDS * 5) is None:
+                timeouts += 1
+                break
+            if app.queue.dry:
+                # Playback stopped before radio tracks arrived
+                ran_dry += 1
+                if await wait_for(pilot, lambda: not app.queue.dry, timeout=10.0) is None:
+                    timeouts += 1
+                    break
+                continue
+            playing = app.player.track["videoId"]
+            starts.append(time.perf_counter())
+        radio = app.queue.radio.stats()
+        app.player.stop()
+    # Time between tracks beyond the track itself: the gap a listener hears
+    gaps = [max(0.0, b - a - RADIO_TRACK_SECONDS) for a, b in zip(starts, starts[1:])]
+    return {
+        "mode": app.player.mode,
+        "tracks": len(gaps),
+        "timeouts": timeouts,
+        "ran_dry": ran_dry,
+        "radio_added": radio["added"],
+        "radio_duplicates": radio["duplicates"],
+        **summary("gap", gaps),
+    }
+
+
+async def session_scenario(count):
+    CPlayer, _ = load_app()
+    app = CPlayer()
+    async with app.run_test() as pilot:
+        await wait_for(pilot, lambda: app.interactive_at is not None)
+        app.workers.cancel_all()
+        await search(app, pilot, "session 0")
+        await play_index(app, pilot, 0)
+
+        warmup = max(10, count // 10)
+        timeouts = 0
+        for i in range(count):
+            if i == warmup:
+                rss_start, threads_start, fds_start = rss_kb(), threading.active_count(), open_fds()
+            if i and i % 25 == 0:
+                await search(app, pilot, f"session {i // 25}")
+                await play_index(app, pilot, 0)
+            if await next_track(app, pilot) is None:
+                timeouts += 1
+        await pilot.pause(0.5)
+        rss_end = rss_kb()
+        result = {
+            "mode": app.player.mode,
+            "switches": count,
+            "timeouts": timeouts,
+            "rss_start_kb": rss_start,
+            "rss_end_kb": rss_end,
+            "rss_growth_kb_per_100": round((rss_end - rss_start) * 100 / (count - warmup), 1),
+            "threads_delta": threading.active_count() - threads_start,
+            "fds_delta": open_fds() - fds_start,
+            "spawns": app.player.spawn_count,
+        }
+        app.player.stop()
+    return result
+
+
+SCENARIOS = {
+    "startup": (startup, 3),
+    "search": (search_scenario, 20),
+    "suggest": (suggest_scenario, 8),
+    "ttfa": (ttfa_scenario, 10),
+    "switch": (switch_scenario, 20),
+    "session": (session_scenario, 300),
+    "radio": (radio_scenario, 12),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--count", type=int, help="Runs, searches, plays or switches")
+    args = parser.parse_args()
+
+    run, default_count = SCENARIOS[args.scenario]
+    result = asyncio.run(run(args.count or default_count))
+    print(json.dumps({"benchmark": args.scenario, **result}))
+
+
+if __name__ == "__main__":
+    main()
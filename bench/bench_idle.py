@@ -0,0 +1,66 @@
+"""Measure UI CPU use while stopped, playing and paused.
+
+Usage: python -m bench.bench_idle [--seconds N]
+
+Runs the app headless with the fake mpv from bench/fakes and samples this
+process's CPU time over each phase. Prints one JSON object per phase with
+the CPU share and the number of UI frames the scheduler ran.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+FAKE_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+
+TRACK = {"videoId": "benchtrack01", "title": "Bench", "artist": "bench"}
+
+
+async def sample(app, phase, seconds):
+    frames = app.frames.frames
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(seconds)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return {
+        "phase": phase,
+        "cpu_percent": round(cpu / wall * 100, 2),
+        "frames": app.frames.frames - frames,
+    }
+
+
+async def run(seconds):
+    os.environ["PATH"] = FAKE_BIN + os.pathsep + os.environ.get("PATH", "")
+    from app.controller import player as player_module
+    from app.main import CPlayer
+
+    player_module.resolve_audio = lambda video_id: f"fake://{video_id}"
+    app = CPlayer()
+    results = []
+    async with app.run_test() as pilot:
+        app.workers.cancel_all()
+        # Let start-up work (trending refresh, first layout) finish
+        await pilot.pause(1.0)
+        results.append(await sample(app, "stopped", seconds))
+
+        app.player.play(TRACK)
+        await pilot.pause(0.5)
+        results.append(await sample(app, "playing", seconds))
+
+        app.player.toggle_pause()
+        await pilot.pause(0.5)
+        results.append(await sample(app, "paused", seconds))
+        app.player.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    for result in asyncio.run(run(args.seconds)):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Import-time budget for the command line.
+
+Usage: python -m bench.bench_import [--runs N] [--scale X]
+
+Runs CLI commands under `python -X importtime` with a throwaway HOME and
+runtime directory, and adds up the imports made after interpreter start-up
+(everything after `site`). Prints one JSON object, and exits non-zero if a
+command goes over its budget or imports a module it should never need.
+--scale multiplies every budget, for slower machines.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the TUI, the daemon and uncached searches may load these
+HEAVY = ("textual", "pyfiglet", "ytmusicapi", "requests", "yt_dlp", "numpy", "app.main", "app.daemon")
+
+# name, arguments, import budget in ms, modules that must not be imported
+CASES = [
+    ("status", ["status"], 40, HEAVY),
+    ("next", ["next"], 40, HEAVY),
+    ("search_cached", ["search", "--json", "cached query"], 80, HEAVY),
+]
+
+SEED_SEARCH = """
+import time
+from app.services.ytmusic import search_cache, search_cache_key
+track = {"title": "Cached", "artist": "Artist", "videoId": "cached00001", "thumbnail": ""}
+search_cache.put(search_cache_key("cached query", "songs"), [track], time.time() + 3600)
+"""
+
+
+def parse_importtime(stderr):
+    """Total ms of imports after interpreter start-up, and every module imported"""
+    total_us = 0
+    modules = []
+    after_site = False
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append(name.strip())
+        if name.startswith("  "):
+            continue  # Counted in its parent's cumulative time
+        if after_site:
+            total_us += int(cumulative)
+        elif name.strip() == "site":
+            after_site = True
+    return total_us / 1000, modules
+
+
+def run_case(args, env):
+    command = ["-c", "pass"] if args is None else ["-m", "app", *args]
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    import_ms, modules = parse_importtime(proc.stderr)
+    return import_ms, wall_ms, modules
+
+
+def make_env(home):
+    """Environment for the CLI under a throwaway HOME, with one search cached"""
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("CPLAYER_", "XDG_"))}
+    env.update(HOME=home, XDG_RUNTIME_DIR=os.path.join(home, "run"), PYTHONPATH=ROOT)
+    os.makedirs(env["XDG_RUNTIME_DIR"])
+    subprocess.run([sys.executable, "-c", SEED_SEARCH], cwd=ROOT, env=env, check=True)
+    return env
+
+
+def check_case(case, env, runs, scale=1.0):
+    """Median import and wall time of one of CASES, and whether it is within budget"""
+    name, case_args, budget_ms, forbidden = case
+    measured = [run_case(case_args, env) for _ in range(runs)]
+    import_ms = statistics.median(r[0] for r in measured)
+    wall_ms = statistics.median(r[1] for r in measured)
+    loaded = sorted({
+        m for m in measured[0][2]
+        if any(m == f or m.startswith(f + ".") for f in forbidden)
+    })
+    budget = budget_ms * scale
+    return {
+        "command": name,
+        "import_ms": round(import_ms, 1),
+        "budget_ms": round(budget, 1),
+        "wall_ms": round(wall_ms, 1),
+        "forbidden_imports": loaded,
+        "ok": import_ms <= budget and not loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="cplayer-bench-") as home:
+        env = make_env(home)
+        # Start-up of a bare interpreter, for reading wall_ms
+        interpreter_ms = statistics.median(
+            run_case(None, env)[1] for _ in range(args.runs)
+        )
+        results = [check_case(case, env, args.runs, args.scale) for case in CASES]
+    failed = not all(r["ok"] for r in results)
+
+    print(json.dumps({
+        "benchmark": "import",
+        "runs": args.runs,
+        "interpreter_ms": round(interpreter_ms, 1),
+        "results": results,
+    }, indent=1))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
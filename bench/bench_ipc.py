@@ -0,0 +1,117 @@
+"""Stress the mpv IPC client and check that nothing leaks.
+
+Usage: python -m bench.bench_ipc [--switches N] [--reconnects N]
+
+Runs against the fake mpv in bench/fakes, so neither mpv nor the network
+is needed. Two phases are measured:
+
+  reconnect  open, query and close an MpvIPC client N times
+  switch     drive a persistent-mode Player through N track switches
+
+Each phase prints one JSON object with the command round-trip latency and
+the number of threads and open file descriptors before and after. The
+no-leak and single-spawn checks themselves are tests/test_ipc.py.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from app.controller import player as player_module
+from app.controller.ipc import MpvIPC
+from bench.fakes.fake_mpv import FakeMpvServer
+
+FAKE_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes", "bin")
+
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+def settle():
+    """Give exiting reader threads a moment before counting"""
+    time.sleep(0.2)
+
+
+def summarize(phase, latencies, threads_before, fds_before, **extra):
+    settle()
+    latencies.sort()
+    return {
+        "phase": phase,
+        **extra,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "threads_delta": threading.active_count() - threads_before,
+        "fds_delta": open_fds() - fds_before,
+    }
+
+
+def bench_reconnect(rounds):
+    path = os.path.join(tempfile.mkdtemp(prefix="cplayer-bench-"), "mpv.sock")
+    threads_before, fds_before = threading.active_count(), open_fds()
+    server = FakeMpvServer(path, fragment=True).start()
+    latencies = []
+    try:
+        for _ in range(rounds):
+            ipc = MpvIPC()
+            ipc.open(path)
+            if not ipc.wait_connected():
+                raise RuntimeError("could not connect to the fake mpv")
+            start = time.perf_counter()
+            ipc.get_property("volume").result(timeout=2)
+            latencies.append(time.perf_counter() - start)
+            ipc.close()
+    finally:
+        server.stop()
+    return summarize("reconnect", latencies, threads_before, fds_before, rounds=rounds)
+
+
+def bench_switch(switches):
+    os.environ["PATH"] = FAKE_BIN + os.pathsep + os.environ.get("PATH", "")
+    # Every track "resolves" instantly to a fake URL
+    player_module.resolve_audio = lambda video_id: f"fake://{video_id}"
+    player_module.is_resolved = lambda video_id: True
+
+    ended = []
+    player = player_module.Player(lambda: ended.append(1), mode="persistent")
+    tracks = [{"videoId": f"track{i:05d}", "title": str(i), "artist": "bench"} for i in range(switches)]
+
+    # Start mpv before taking the baseline so only per-switch growth counts
+    player.play(tracks[0])
+    player.preload(tracks[1])
+    settle()
+    threads_before, fds_before = threading.active_count(), open_fds()
+    latencies = []
+    try:
+        for i in range(1, switches):
+            start = time.perf_counter()
+            player.play(tracks[i])
+            if i + 1 < switches:
+                player.preload(tracks[i + 1])
+            # Wait for mpv to acknowledge so the switches do not just pile up in the socket
+            player.ipc.get_property("playlist-pos").result(timeout=2)
+            latencies.append(time.perf_counter() - start)
+        result = summarize(
+            "switch", latencies, threads_before, fds_before,
+            switches=switches, spawns=player.spawn_count,
+        )
+    finally:
+        player.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=1000)
+    parser.add_argument("--reconnects", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(bench_reconnect(args.reconnects)))
+    print(json.dumps(bench_switch(args.switches)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Saved playlists at scale: listing and loading from the library.
+
+Usage: python -m bench.bench_library [--playlists N] [--tracks T] [--loads K] [--seed S]
+
+Seeds a throwaway library with N playlists (5000 by default) of T tracks
+each, drawn from a shared pool of synthetic tracks so playlists overlap
+the way real ones do. It then times listing every playlist name, loading
+K random playlists, saving over an existing one and finding the playlists
+that hold a track. The same playlists kept as one JSON file each, the way
+they used to be stored, are listed and loaded alongside for comparison.
+Prints one JSON object and exits non-zero if the p99 list or load takes
+longer than BUDGET_MS.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services import library as library_module
+from app.services.library import Library
+from bench.bench_search_index import make_tracks
+
+BUDGET_MS = 50  # p99 allowed for listing the playlists or loading one
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def latencies(ops, run):
+    """Seconds each run(op) took, sorted"""
+    taken = []
+    for op in ops:
+        start = time.perf_counter()
+        run(op)
+        taken.append(time.perf_counter() - start)
+    return sorted(taken)
+
+
+def percentiles(taken):
+    return {
+        "p50_ms": ms(statistics.median(taken)),
+        "p90_ms": ms(taken[int(len(taken) * 0.9)]),
+        "p99_ms": ms(taken[int(len(taken) * 0.99)]),
+    }
+
+
+def json_store(directory, playlists):
+    """The old store: one JSON file per playlist, listed by globbing the directory"""
+    directory.mkdir()
+    for name, tracks in playlists.items():
+        with open(directory / f"{name}.json", "w") as f:
+            json.dump({"name": name, "tracks": tracks}, f, indent=2)
+
+    def list_playlists(_):
+        return sorted(file.stem for file in directory.glob("*.json"))
+
+    def load_playlist(name):
+        with open(directory / f"{name}.json", "r") as f:
+            return json.load(f).get("tracks", [])
+
+    return list_playlists, load_playlist
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--playlists", type=int, default=5000)
+    parser.add_argument("--tracks", type=int, default=30, help="Tracks per playlist")
+    parser.add_argument("--loads", type=int, default=500, help="Playlists loaded at random")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = make_tracks(max(args.tracks, args.playlists * args.tracks // 4), rng)
+    playlists = {f"Playlist {i:05d}": rng.sample(pool, args.tracks) for i in range(args.playlists)}
+    names = list(playlists)
+    loads = [rng.choice(names) for _ in range(args.loads)]
+
+    with tempfile.TemporaryDirectory(prefix="cplayer-bench-library-") as tmp:
+        directory = Path(tmp)
+        # Nothing to migrate: keep the first open away from ~/.config/cplayer
+        library_module.PLAYLISTS_DIR = directory / "legacy-playlists"
+        library_module.HISTORY_LOG_FILE = directory / "history.jsonl"
+        library_module.LEGACY_HISTORY_FILE = directory / "history.json"
+        library = Library(path=directory / "library.db")
+
+        start = time.perf_counter()
+        for name, tracks in playlists.items():
+            library.save_playlist(name, tracks)
+        seed_s = time.perf_counter() - start
+
+        listed = library.list_playlists()
+        if len(listed) != args.playlists:
+            sys.exit(f"bench_library: listed {len(listed)} of {args.playlists} playlists")
+        if library.load_playlist(loads[0]) != playlists[loads[0]]:
+            sys.exit("bench_library: a loaded playlist differs from the one saved")
+
+        list_taken = latencies(range(50), lambda _: library.list_playlists())
+        load_taken = latencies(loads, library.load_playlist)
+        save_taken = latencies(loads[:50], lambda name: library.save_playlist(name, playlists[name]))
+        containing = latencies(
+            [t["videoId"] for t in rng.sample(pool, 50)], library.playlists_with_track
+        )
+        library.close()
+
+        json_list, json_load = json_store(directory / "playlists", playlists)
+        json_list_taken = latencies(range(5), json_list)
+        json_load_taken = latencies(loads, json_load)
+
+    over = []
+    if list_taken[int(len(list_taken) * 0.99)] * 1000 > BUDGET_MS:
+        over.append("list")
+    if load_taken[int(len(load_taken) * 0.99)] * 1000 > BUDGET_MS:
+        over.append("load")
+    print(json.dumps({
+        "benchmark": "library",
+        "playlists": args.playlists,
+        "tracks_per_playlist": args.tracks,
+        "seed_s": round(seed_s, 2),
+        "list": percentiles(list_taken),
+        "load": percentiles(load_taken),
+        "save": percentiles(save_taken),
+        "with_track": percentiles(containing),
+        "json_list": percentiles(json_list_taken),
+        "json_load": percentiles(json_load_taken),
+        "budget_ms": BUDGET_MS,
+        "over_budget": over,
+    }, indent=1))
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Memory and operation cost of the play queue on very long queues.
+
+Usage: python -m bench.bench_queue [--tracks N] [--ops K] [--seed S]
+
+Loads N synthetic tracks (50k by default) into a Queue, measures how much
+memory a Track and its place in the queue take next to the dict it came
+from, then times K random operations of each kind: jumping to a track by
+videoId, play-next, remove, move, stepping through a shuffled queue and
+reading the current position. The same edits on a plain list of dicts,
+the way the queue used to be kept, are timed alongside for comparison.
+Every operation is timed again on a queue a tenth the size, so a cost
+that grows with the queue shows up as a growth factor well above 1.
+Prints one JSON object and exits non-zero if any operation takes longer
+than OP_BUDGET_US on average.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from app.controller.queue import Queue
+from app.track import Track
+from bench.bench_search_index import make_tracks
+
+OP_BUDGET_US = 200  # Mean cost allowed per queue operation
+
+
+class NullPlayer:
+    """Refuses every track, so the queue does no resolving, history or preloading"""
+
+    def play(self, track):
+        return False
+
+    def preload(self, track):
+        pass
+
+
+def timed(ops, run):
+    """Mean microseconds of run(op) over ops"""
+    start = time.perf_counter()
+    for op in ops:
+        run(op)
+    return (time.perf_counter() - start) * 1e6 / len(ops)
+
+
+def queue_costs(tracks, count, rng):
+    queue = Queue(NullPlayer(), prefetch_depth=0)
+    start = time.perf_counter()
+    queue.load(tracks)
+    load_ms = (time.perf_counter() - start) * 1000
+    n = len(tracks)
+    # Keep the current track in the middle, where list edits cost the most
+    queue.play_single(tracks[n // 2])
+    costs = {
+        "find": timed(rng.sample(tracks, count), queue.play_single),
+        "play_next": timed([rng.randrange(n) for _ in range(count)], queue.play_next),
+        "remove": timed([rng.randrange(n - count) for _ in range(count)], queue.remove),
+        "move": timed([(rng.randrange(n - count), rng.randrange(n - count)) for _ in range(count)],
+                      lambda op: queue.move(*op)),
+        "index": timed(range(count), lambda _: queue.index),
+    }
+    queue.set_shuffle(True)
+    costs["shuffle_next"] = timed(range(count), lambda _: queue.next())
+    queue.shutdown()
+    return load_ms, costs
+
+
+def list_costs(tracks, count, rng):
+    """The old queue: a list of dicts searched front to back"""
+    queue = list(tracks)
+    n = len(queue)
+    current = n // 2
+
+    def find(track):
+        for i, t in enumerate(queue):
+            if t.get('videoId') == track.get('videoId'):
+                return i
+
+    def move(op):
+        queue.insert(op[1], queue.pop(op[0]))
+
+    return {
+        "find": timed(rng.sample(tracks, count), find),
+        "play_next": timed([rng.randrange(n) for _ in range(count)], lambda i: move((i, current + 1))),
+        "remove": timed([rng.randrange(n - count) for _ in range(count)], queue.pop),
+        "move": timed([(rng.randrange(n - count), rng.randrange(n - count)) for _ in range(count)], move),
+    }
+
+
+def bytes_per(build, count):
+    tracemalloc.start()
+    held = build()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=50_000)
+    parser.add_argument("--ops", type=int, default=2000, help="Operations timed per kind")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tracks = make_tracks(args.tracks, rng)
+    small = tracks[:max(args.ops * 2, args.tracks // 10)]
+
+    # Strings are shared with the source dicts, so both sides count only their containers
+    dict_bytes = bytes_per(lambda: [dict(t) for t in tracks], len(tracks))
+    track_bytes = bytes_per(lambda: [Track.of(t) for t in tracks], len(tracks))
+    probe = Queue(NullPlayer(), prefetch_depth=0)
+    queued_bytes = bytes_per(lambda: probe.load(tracks), len(tracks))
+    probe.shutdown()
+
+    load_ms, costs = queue_costs(tracks, args.ops, random.Random(args.seed))
+    _, small_costs = queue_costs(small, args.ops, random.Random(args.seed))
+    baseline = list_costs(tracks, args.ops, random.Random(args.seed))
+
+    slow = {op: us for op, us in costs.items() if us > OP_BUDGET_US}
+    print(json.dumps({
+        "benchmark": "queue",
+        "tracks": args.tracks,
+        "load_ms": round(load_ms, 1),
+        "bytes_per_track": {
+            "dict": round(dict_bytes),
+            "track": round(track_bytes),
+            "queued": round(queued_bytes),
+        },
+        "op_us": {op: round(us, 2) for op, us in costs.items()},
+        "list_op_us": {op: round(us, 2) for op, us in baseline.items()},
+        "growth_10x": {op: round(us / max(small_costs[op], 0.01), 2) for op, us in costs.items()},
+        "budget_us": OP_BUDGET_US,
+        "over_budget": sorted(slow),
+    }, indent=1))
+    if slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
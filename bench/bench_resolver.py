@@ -0,0 +1,69 @@
+"""Compare per-resolve latency and memory of the resolver backends.
+
+Usage: python -m bench.bench_resolver [--rounds N] [videoId ...]
+
+The stream URL cache is bypassed so every round pays the full resolution.
+Prints one JSON object per backend.
+"""
+import argparse
+import json
+import resource
+import statistics
+import time
+
+from app.services import resolver
+
+DEFAULT_VIDEO_IDS = ["dQw4w9WgXcQ", "kJQP7kiw5Fk", "JGwWNGJdvx8"]
+
+
+def rss_kb():
+    """Current resident set size of this process in KiB"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def bench_backend(name, video_ids, rounds):
+    resolve = resolver.BACKENDS[name]
+    rss_before = rss_kb()
+    latencies = []
+    failures = 0
+    for _ in range(rounds):
+        for video_id in video_ids:
+            start = time.perf_counter()
+            url = resolve(video_id)
+            latencies.append(time.perf_counter() - start)
+            if not url:
+                failures += 1
+    first = latencies[0]
+    latencies.sort()
+    return {
+        "backend": name,
+        "resolves": len(latencies),
+        "failures": failures,
+        # Includes process start-up or, in-process, the one-off yt_dlp import
+        "first_ms": round(first * 1000, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p90_ms": round(latencies[int(len(latencies) * 0.9) - 1] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "rss_delta_kb": rss_kb() - rss_before,
+        # Peak RSS of the largest yt-dlp child process seen so far
+        "children_maxrss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video_ids", nargs="*", default=DEFAULT_VIDEO_IDS)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--backend", choices=sorted(resolver.BACKENDS), action="append")
+    args = parser.parse_args()
+
+    for name in args.backend or ["subprocess", "inprocess"]:
+        print(json.dumps(bench_backend(name, args.video_ids, args.rounds)))
+
+
+if __name__ == "__main__":
+    main()
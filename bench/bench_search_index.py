@@ -0,0 +1,156 @@
+"""Build and query cost of the jump-to search index.
+
+Usage: python -m bench.bench_search_index [--tracks N] [--seed S]
+
+Indexes N synthetic tracks (100k by default) with made-up titles and
+artists, then replays queries the way they arrive while typing: every
+prefix of a title, of an artist, of "artist title", and of misspelled
+titles. Prints one JSON object with the build time, the memory the index
+holds, query latency percentiles, how often the wanted track is in the top
+8, and the cost of an incremental add. Exits non-zero if the p99 query
+does not fit in one UI frame.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from app.services.search_index import SearchIndex
+from app.ui.scheduler import FRAME_RATE
+
+CONSONANTS = "bcdfghjklmnprstvwyz"
+VOWELS = "aeiou"
+# Common words repeat across titles the way they do in real catalogues
+WORDS = ["love", "night", "the", "fire", "heart", "blue", "dance", "river", "gold", "moon",
+         "song", "rain", "city", "dream", "light", "road", "home", "wild", "summer", "echo"]
+
+
+def make_word(rng):
+    """A pronounceable made-up word"""
+    letters = []
+    for _ in range(rng.randint(1, 4)):
+        letters.append(rng.choice(CONSONANTS))
+        letters.append(rng.choice(VOWELS))
+    if rng.random() < 0.5:
+        letters.append(rng.choice(CONSONANTS))
+    return "".join(letters)
+
+
+def make_tracks(n, rng):
+    artists = [
+        " ".join(make_word(rng).capitalize() for _ in range(rng.randint(1, 2)))
+        for _ in range(max(1, n // 12))
+    ]
+    tracks = []
+    for i in range(n):
+        words = [rng.choice(WORDS) if rng.random() < 0.4 else make_word(rng) for _ in range(rng.randint(1, 4))]
+        tracks.append({
+            "title": " ".join(words).title(),
+            "artist": rng.choice(artists),
+            "videoId": f"v{i:010d}",
+            "thumbnail": "",
+        })
+    return tracks
+
+
+def typo(text, rng):
+    """Swap two neighbouring letters somewhere after the first two"""
+    if len(text) < 5:
+        return text
+    i = rng.randint(2, len(text) - 2)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def typed(text):
+    """What the search box holds after each keystroke"""
+    return [text[:i] for i in range(2, len(text) + 1)]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--targets", type=int, default=100, help="Tracks whose names get typed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tracks = make_tracks(args.tracks, rng)
+    plays = {t["videoId"]: int(rng.expovariate(0.5)) for t in rng.sample(tracks, len(tracks) // 10)}
+
+    sources = [(t, plays.get(t["videoId"], 0)) for t in tracks]
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.build(sources)
+    build_ms = (time.perf_counter() - start) * 1000
+    # Measured on a second build, since tracing slows the first one down
+    tracemalloc.start()
+    probe = SearchIndex()
+    probe.build(sources)
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del probe
+
+    timings = []
+    found = {"title": [], "artist_title": [], "typo": []}
+    for track in rng.sample(tracks, args.targets):
+        queries = {
+            "title": track["title"],
+            "artist_title": f"{track['artist']} {track['title']}",
+            "typo": typo(track["title"], rng),
+        }
+        for kind, text in queries.items():
+            results = []
+            for query in typed(text):
+                start = time.perf_counter()
+                results = index.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            # Titles can repeat in synthetic data, so any track with the same title counts
+            found[kind].append(any(t["title"] == track["title"] for t in results))
+        for query in typed(track["artist"]):
+            start = time.perf_counter()
+            index.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    added = make_tracks(1000, random.Random(args.seed + 1))
+    for i, track in enumerate(added):
+        track["videoId"] = f"new{i:07d}"
+    added[-1]["title"] = "Zyxwv Last Added"
+    start = time.perf_counter()
+    for track in added:
+        index.add(track, plays=1)
+    add_us = (time.perf_counter() - start) * 1e6 / len(added)
+    newest = index.search(added[-1]["title"])
+
+    frame_ms = 1000 / FRAME_RATE
+    p99 = percentile(timings, 0.99)
+    stats = index.stats()
+    print(json.dumps({
+        "benchmark": "search_index",
+        "tracks": args.tracks,
+        "trigrams": stats["trigrams"],
+        "postings": stats["postings"],
+        "build_ms": round(build_ms, 1),
+        "index_mb": round(index_bytes / (1024 * 1024), 1),
+        "queries": len(timings),
+        "query_ms_p50": round(statistics.median(timings), 3),
+        "query_ms_p99": round(p99, 3),
+        "query_ms_max": round(max(timings), 3),
+        "frame_ms": round(frame_ms, 1),
+        "top8_rate": {kind: round(sum(hits) / len(hits), 3) for kind, hits in found.items()},
+        "add_us": round(add_us, 1),
+        "added_track_found": any(t["videoId"] == added[-1]["videoId"] for t in newest),
+    }, indent=1))
+    if p99 > frame_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure time-to-first-interactive-frame of the TUI.
+
+Usage: python -m bench.bench_startup [--runs N]
+
+Runs the app headless and reports, as JSON, how long the imports took and
+how long it took from constructing CPlayer until the first frame with the
+track list was rendered. Live chart refreshes keep running in the
+background and are not waited for.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+
+async def measure_once(app_cls):
+    start = time.perf_counter()
+    app = app_cls()
+    async with app.run_test() as pilot:
+        while app.interactive_at is None:
+            await pilot.pause(0.005)
+        result = {
+            "first_frame_ms": (app.interactive_at - start) * 1000,
+            "tracks_on_first_frame": len(app.queue.tracks),
+        }
+        app.workers.cancel_all()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    from app.main import CPlayer
+    import_ms = (time.perf_counter() - start) * 1000
+
+    runs = [asyncio.run(measure_once(CPlayer)) for _ in range(args.runs)]
+    frames = [r["first_frame_ms"] for r in runs]
+    print(json.dumps({
+        "benchmark": "startup",
+        "import_ms": round(import_ms, 1),
+        "first_frame_ms_median": round(statistics.median(frames), 1),
+        "first_frame_ms_max": round(max(frames), 1),
+        "tracks_on_first_frame": runs[-1]["tracks_on_first_frame"],
+        "runs": args.runs,
+    }))
+
+
+if __name__ == "__main__":
+    main()
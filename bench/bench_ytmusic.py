@@ -0,0 +1,176 @@
+"""YouTube Music client against a local HTTP server.
+
+Usage: python -m bench.bench_ytmusic [--calls N] [--threads N] [--delay S]
+
+Drives YTMusicClient the way the app does, with an API object that posts
+JSON to a local HTTP/1.1 server over the shared session instead of to
+music.youtube.com. It measures: call latency under concurrent load, the
+most requests the server saw at once (must not exceed the client's
+limit), how many TCP connections all calls needed, that a 503 is retried
+and succeeds, and that a stalled response fails after the timeout rather
+than hanging. No network. Prints one JSON object and exits non-zero if a
+check fails.
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.http import session
+from app.services.ytmusic_client import YTMusicClient
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self.failed_once = set()
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), ApiHandler)
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like music.youtube.com
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.peak_active = max(server.peak_active, server.active)
+        try:
+            kind, _, key = self.path.strip("/").partition("/")
+            if kind == "stall":
+                time.sleep(5)
+            time.sleep(server.delay)
+            if kind == "flaky":
+                with server.lock:
+                    first = key not in server.failed_once
+                    server.failed_once.add(key)
+                if first:
+                    self.reply(503, b"unavailable")
+                    return
+            self.reply(200, json.dumps({"contents": {"key": key}}).encode())
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalApi:
+    """Stands in for YTMusic: posts like its _send_request and raises like it"""
+
+    def __init__(self, server):
+        self.server = server
+
+    def browse(self, path):
+        response = session().post(self.server.url(path), json={"context": {}})
+        if response.status_code >= 400:
+            from ytmusicapi.exceptions import YTMusicServerError
+            raise YTMusicServerError(f"Server returned HTTP {response.status_code}: {response.reason}.")
+        return response.json()
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16, help="Callers at once, more than the client allows")
+    parser.add_argument("--delay", type=float, default=0.02, help="Server response delay in seconds")
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    args = parser.parse_args()
+
+    server = ApiServer(args.delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = YTMusicClient(max_concurrent=args.max_concurrent, backoff=0.05)
+    client.api = LocalApi(server)
+    failures = []
+
+    def timed(i):
+        start = time.perf_counter()
+        client.call("browse", f"/ok/{i}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        latencies = list(pool.map(timed, range(args.calls)))
+    wall = time.perf_counter() - start
+    connections = server.connections
+    peak = server.peak_active
+    if peak > args.max_concurrent:
+        failures.append("more calls in flight than allowed")
+    if connections > args.max_concurrent:
+        failures.append("connections were not reused")
+
+    retries_before = client.retried
+    try:
+        client.call("browse", "/flaky/a")
+    except Exception:
+        failures.append("a 503 was not retried")
+    retried = client.retried - retries_before
+
+    start = time.perf_counter()
+    try:
+        client.call("browse", "/stall/b", timeout=0.2, retries=0)
+        failures.append("a stalled call did not time out")
+    except Exception:
+        pass
+    timeout_ms = ms(time.perf_counter() - start)
+    if timeout_ms > 1000:
+        failures.append("timeout took too long")
+
+    stats = client.stats()
+    server.shutdown()
+    print(json.dumps({
+        "benchmark": "ytmusic",
+        "calls": args.calls,
+        "threads": args.threads,
+        "max_concurrent": args.max_concurrent,
+        "server_delay_ms": ms(args.delay),
+        "p50_ms": ms(statistics.median(latencies)),
+        "p99_ms": ms(sorted(latencies)[int(len(latencies) * 0.99) - 1]),
+        "calls_per_s": round(args.calls / wall, 1),
+        "server_peak_concurrent": peak,
+        "connections": connections,
+        "reuse_rate": round(1 - connections / args.calls, 3),
+        "wait_ms": stats['wait_ms'],
+        "retries_for_503": retried,
+        "timeout_ms": timeout_ms,
+        "failures": failures,
+    }, indent=1))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""A stand-in for mpv that speaks its JSON IPC protocol on a Unix socket.
+
+It does not decode audio: "playing" a file just advances time-pos on a
+clock until the configured duration, then emits end-file like mpv does.
+Use FakeMpvServer in-process, or run this module as an ``mpv`` executable
+(see bench/fakes/bin/mpv) with the same arguments the Player passes.
+
+Environment for the executable form:
+    FAKE_MPV_DURATION    seconds each file lasts (default 180)
+    FAKE_MPV_LOAD_DELAY  seconds from loadfile to playback-restart (default 0.05)
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+TICK = 0.1
+
+
+class FakeMpvServer:
+    def __init__(self, path, duration=180.0, load_delay=0.05, idle=True, fragment=False, files=()):
+        self.path = path
+        self.duration = duration
+        self.load_delay = load_delay
+        self.idle = idle
+        self.fragment = fragment  # Split every message in two writes to exercise framing
+        self.commands = []
+        # Files from the command line; they start once the first client connects
+        self.pending_files = list(files)
+        self.playlist = []
+        self.pos = -1
+        self.properties = {
+            "time-pos": None,
+            "duration": None,
+            "volume": 100,
+            "pause": False,
+            "playlist-pos": -1,
+        }
+        self.exited = threading.Event()
+        self._observers = {}  # property name -> connections observing it
+        self._conns = []
+        self._lock = threading.RLock()
+        self._server = None
+        self._loaded_at = None
+        self._restart_sent = True
+        self._generation = 0
+
+    # Lifecycle
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = socket.socket(socket.AF_UNIX)
+        self._server.bind(self.path)
+        self._server.listen(8)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._clock, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.exited.set()
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+            except OSError:
+                pass
+        if self._server is not None:
+            try:
+                # Wakes the accept() call, which close() alone does not
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _accept_loop(self):
+        while not self.exited.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._conns.append(conn)
+                if self.pending_files:
+                    # Files from the command line start once someone listens
+                    self.playlist, self.pending_files = self.pending_files, []
+                    self._load(0)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        buffer = b""
+        try:
+            while not self.exited.is_set():
+                data = conn.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if line.strip():
+                        self._handle(conn, json.loads(line))
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                if conn in self._conns:
+                    self._conns.remove(conn)
+                for observers in self._observers.values():
+                    observers.discard(conn)
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    # Protocol
+
+    def _send(self, conn, msg):
+        data = (json.dumps(msg) + "\n").encode()
+        try:
+            if self.fragment and len(data) > 2:
+                half = len(data) // 2
+                conn.sendall(data[:half])
+                time.sleep(0.0005)
+                conn.sendall(data[half:])
+            else:
+                conn.sendall(data)
+        except OSError:
+            pass
+
+    def _broadcast(self, msg):
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            self._send(conn, msg)
+
+    def _set(self, name, value):
+        self.properties[name] = value
+        with self._lock:
+            observers = list(self._observers.get(name, ()))
+        for conn in observers:
+            self._send(conn, {"event": "property-change", "name": name, "data": value})
+
+    def _handle(self, conn, msg):
+        cmd = msg.get("command") or []
+        request_id = msg.get("request_id", 0)
+        self.commands.append(cmd)
+        error, data = "success", None
+        initial = None
+        with self._lock:
+            name = cmd[0] if cmd else None
+            if name == "observe_property":
+                self._observers.setdefault(cmd[2], set()).add(conn)
+                # mpv reports the current value right after subscribing
+                initial = {"event": "property-change", "name": cmd[2], "data": self.properties.get(cmd[2])}
+            elif name == "get_property":
+                if cmd[1] in self.properties:
+                    data = self.properties[cmd[1]]
+                else:
+                    error = "property not found"
+            elif name == "set_property":
+                self._set(cmd[1], cmd[2])
+            elif name == "cycle":
+                self._set(cmd[1], not self.properties.get(cmd[1]))
+            elif name == "add":
+                self._set(cmd[1], (self.properties.get(cmd[1]) or 0) + cmd[2])
+            elif name == "loadfile":
+                mode = cmd[2] if len(cmd) > 2 else "replace"
+                if mode == "append":
+                    self.playlist.append(cmd[1])
+                    if self.pos < 0:
+                        self._load(len(self.playlist) - 1)
+                else:
+                    self.playlist = [cmd[1]]
+                    self._load(0, reason="stop")
+            elif name in ("playlist-next", "playlist-prev"):
+                target = self.pos + (1 if name == "playlist-next" else -1)
+                if 0 <= target < len(self.playlist):
+                    self._load(target, reason="stop")
+                else:
+                    error = "error running command"
+            elif name == "playlist-remove":
+                index = cmd[1]
+                if 0 <= index < len(self.playlist) and index != self.pos:
+                    self.playlist.pop(index)
+                    if index < self.pos:
+                        self.pos -= 1
+                        self._set("playlist-pos", self.pos)
+                else:
+                    error = "error running command"
+            elif name == "playlist-clear":
+                if self.pos >= 0:
+                    self.playlist = [self.playlist[self.pos]]
+                    self.pos = 0
+                    self._set("playlist-pos", 0)
+                else:
+                    self.playlist = []
+            elif name in ("stop", "quit"):
+                self._end_current("stop" if name == "stop" else "quit")
+                self.pos = -1
+                if name == "quit":
+                    self.exited.set()
+            else:
+                error = "invalid parameter"
+        self._send(conn, {"request_id": request_id, "error": error, "data": data})
+        if initial is not None:
+            self._send(conn, initial)
+
+    # Playback simulation
+
+    def _end_current(self, reason):
+        if self.pos >= 0 and self._loaded_at is not None:
+            self._loaded_at = None
+            self._broadcast({"event": "end-file", "reason": reason})
+
+    def _load(self, index, reason=None):
+        if reason:
+            self._end_current(reason)
+        self.pos = index
+        self._broadcast({"event": "start-file", "playlist_entry_id": index + 1})
+        self._set("playlist-pos", index)
+        self._set("duration", self.duration)
+        self._set("time-pos", 0.0)
+        self._loaded_at = time.monotonic()
+        self._restart_sent = False
+        self._generation += 1
+        # Timed precisely rather than on the clock tick so TTFA can be measured
+        timer = threading.Timer(self.load_delay, self._restart, args=(self._generation,))
+        timer.daemon = True
+        timer.start()
+
+    def _restart(self, generation):
+        with self._lock:
+            if generation != self._generation or self._restart_sent or self._loaded_at is None:
+                return
+            self._restart_sent = True
+            self._loaded_at = time.monotonic()
+            self._broadcast({"event": "playback-restart"})
+
+    def _clock(self):
+        while not self.exited.wait(TICK):
+            with self._lock:
+                if self._loaded_at is None:
+                    continue
+                if self.properties["pause"] or not self._restart_sent:
+                    continue
+                position = (self.properties["time-pos"] or 0.0) + TICK
+                if position < self.duration:
+                    self._set("time-pos", position)
+                    continue
+                self._end_current("eof")
+                if self.pos + 1 < len(self.playlist):
+                    self._load(self.pos + 1)
+                else:
+                    self.pos = -1
+                    self._set("playlist-pos", -1)
+                    if not self.idle:
+                        self.exited.set()
+
+
+def main(argv):
+    path = None
+    idle = False
+    files = []
+    for arg in argv:
+        if arg.startswith("--input-ipc-server="):
+            path = arg.split("=", 1)[1]
+        elif arg.startswith("--idle"):
+            idle = not arg.endswith("=no")
+        elif not arg.startswith("--"):
+            files.append(arg)
+    if not path:
+        sys.exit("fake mpv: --input-ipc-server is required")
+
+    server = FakeMpvServer(
+        path,
+        duration=float(os.environ.get("FAKE_MPV_DURATION", "180")),
+        load_delay=float(os.environ.get("FAKE_MPV_LOAD_DELAY", "0.05")),
+        idle=idle,
+        # A real stream takes longer to open than the IPC client takes to
+        # connect, so hold playback until then rather than race it
+        files=files,
+    ).start()
+    try:
+        server.exited.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
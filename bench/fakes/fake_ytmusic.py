@@ -0,0 +1,151 @@
+"""A stand-in for ytmusicapi.YTMusic that answers from recorded responses.
+
+Responses live in bench/fakes/recordings/ytmusic.json in the shape
+ytmusicapi returns them. Queries, songs and playlists that were not
+recorded get deterministic synthetic answers, so benchmarks can issue any
+number of distinct requests. Every call sleeps for ``delay`` seconds to
+stand in for the network round trip.
+
+Refresh the recording from the live service with:
+    python -m bench.fakes.fake_ytmusic record "query" [...] [--playlist ID ...]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+RECORDING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "ytmusic.json")
+
+# Completions for search suggestions; other queries get synthetic ones
+SUGGESTIONS = [
+    "dua lipa", "dua lipa houdini", "dua lipa levitating", "dua lipa new rules",
+    "dua lipa dance the night", "dua lipa training season", "dua lipa physical",
+    "dua lipa don't start now", "dua lipa one kiss", "dua lipa illusion",
+    "daft punk", "daft punk get lucky", "daft punk one more time", "daft punk around the world",
+    "lofi", "lofi hip hop", "lofi girl", "lofi beats to study", "lofi jazz",
+    "top hits", "top hits 2024", "top hits this week",
+]
+
+
+def _video_id(seed):
+    """An 11-character id, stable for a given seed"""
+    return hashlib.sha1(seed.encode()).hexdigest()[:11]
+
+
+def _song(seed, index):
+    video_id = _video_id(f"{seed}:{index}")
+    return {
+        "resultType": "song",
+        "title": f"{seed.title()} {index + 1}",
+        "artists": [{"name": f"Artist {index % 7 + 1}", "id": None}],
+        "videoId": video_id,
+        "duration": "3:30",
+        "duration_seconds": 210,
+        "thumbnails": [{"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg", "width": 480, "height": 360}],
+        "isAvailable": True,
+    }
+
+
+class FakeYTMusic:
+    def __init__(self, recording=RECORDING_FILE, delay=0.0, playlist_size=300):
+        self.delay = delay
+        self.playlist_size = playlist_size
+        self.calls = {}
+        self._lock = threading.Lock()
+        try:
+            with open(recording, "r") as f:
+                self.recorded = json.load(f)
+        except (OSError, ValueError):
+            self.recorded = {}
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def search(self, query, filter=None, limit=20, **kwargs):
+        self._call("search")
+        key = " ".join(query.lower().split())
+        recorded = self.recorded.get("search", {}).get(key)
+        if recorded is not None:
+            return recorded
+        return [_song(key, i) for i in range(limit)]
+
+    def get_search_suggestions(self, search, detailed_runs=False):
+        self._call("get_search_suggestions")
+        key = " ".join(search.lower().split())
+        known = [s for s in SUGGESTIONS if s.startswith(key)]
+        if known:
+            return known[:7]
+        return [f"{key} {suffix}".strip() for suffix in ("", "lyrics", "remix", "live", "acoustic", "cover", "slowed")]
+
+    def get_charts(self, country="ZZ"):
+        self._call("get_charts")
+        charts = self.recorded.get("charts")
+        if charts is not None:
+            return charts
+        chart = [{**_song("chart", i), "type": "SONG"} for i in range(20)]
+        return {"countries": {"results": [{"chart": chart}]}}
+
+    def get_song(self, videoId, **kwargs):
+        self._call("get_song")
+        recorded = self.recorded.get("songs", {}).get(videoId)
+        if recorded is not None:
+            return recorded
+        return {"videoDetails": {"videoId": videoId, "title": f"Song {videoId}", "author": "Artist 1"}}
+
+    def get_playlist(self, playlistId, limit=100, **kwargs):
+        self._call("get_playlist")
+        recorded = self.recorded.get("playlists", {}).get(playlistId)
+        if recorded is not None:
+            return recorded
+        count = self.playlist_size if limit is None else min(limit, self.playlist_size)
+        return {"id": playlistId, "title": f"Playlist {playlistId}", "tracks": [_song(playlistId, i) for i in range(count)]}
+
+    def get_watch_playlist(self, videoId=None, playlistId=None, limit=25, radio=False, **kwargs):
+        self._call("get_watch_playlist")
+        seed = f"radio:{videoId or playlistId}"
+        return {"tracks": [_song(seed, i) for i in range(limit)], "playlistId": f"RDAMVM{videoId}"}
+
+    def _send_request(self, endpoint, body, *args, **kwargs):
+        # Raw browse requests are not recorded; callers fall back to get_playlist
+        raise NotImplementedError(endpoint)
+
+
+def install(fake):
+    """Make the app's YouTube Music client talk to fake instead"""
+    from app.services.ytmusic_client import ytmusic_client
+    ytmusic_client.api = fake
+    return fake
+
+
+def record(queries, playlists, path=RECORDING_FILE):
+    """Capture live responses into the recording file"""
+    from ytmusicapi import YTMusic
+
+    live = YTMusic()
+    data = {
+        "recorded_at": time.strftime("%Y-%m-%d"),
+        "search": {" ".join(q.lower().split()): live.search(q, filter="songs") for q in queries},
+        "charts": live.get_charts(),
+        "playlists": {p: live.get_playlist(p, limit=None) for p in playlists},
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record YouTube Music responses for FakeYTMusic")
+    parser.add_argument("command", choices=["record"])
+    parser.add_argument("queries", nargs="*", default=["lofi", "top hits"])
+    parser.add_argument("--playlist", action="append", default=[])
+    args = parser.parse_args()
+    record(args.queries, args.playlist)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Run the offline end-to-end benchmarks and compare them with a baseline.
+
+Usage: python -m bench.suite [--output FILE] [--baseline FILE] [--tolerance 0.25] [--quick]
+
+Every scenario in bench.bench_e2e runs in its own process with a fresh
+temporary HOME, the fake mpv and yt-dlp from bench/fakes/bin first on PATH
+and YouTube Music replaced by the recorded fake, so no network, mpv or
+yt-dlp is needed and nothing touches ~/.config/cplayer. The combined
+report is JSON. The exit status is 1 if a scenario fails or any of its
+plays times out. With --baseline, any *_ms or *_kb metric that grew by
+more than the tolerance is listed on stderr and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_BIN = os.path.join(ROOT, "bench", "fakes", "bin")
+
+# (scenario, player mode, count for --quick)
+RUNS = [
+    ("startup", None, 2),
+    ("search", None, 5),
+    ("suggest", None, 4),
+    ("ttfa", "spawn", 3),
+    ("ttfa", "persistent", 3),
+    ("switch", "spawn", 5),
+    ("switch", "persistent", 5),
+    ("session", "persistent", 60),
+    ("radio", "persistent", 6),
+]
+
+FAKE_ENV = {
+    "FAKE_YTDLP_DELAY": "0.3",
+    "FAKE_YTMUSIC_DELAY": "0.15",
+    "FAKE_MPV_LOAD_DELAY": "0.05",
+    "FAKE_MPV_DURATION": "600",
+    "CPLAYER_RESOLVER": "subprocess",
+    "CPLAYER_AUDIO_CACHE_MB": "0",
+    "CPLAYER_ART_CACHE_KB": "0",  # Album art has its own bench against a local server
+}
+
+
+def run_scenario(scenario, mode, count):
+    with tempfile.TemporaryDirectory(prefix="cplayer-bench-") as home:
+        env = {k: v for k, v in os.environ.items() if not k.startswith(("CPLAYER_", "XDG_"))}
+        env.update(FAKE_ENV)
+        env["HOME"] = home
+        env["PATH"] = FAKE_BIN + os.pathsep + env.get("PATH", "")
+        env["PYTHONPATH"] = ROOT
+        if mode:
+            env["CPLAYER_MPV_MODE"] = mode
+        cmd = [sys.executable, "-m", "bench.bench_e2e", scenario]
+        if count:
+            cmd += ["--count", str(count)]
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"benchmark": scenario, "mode": mode, "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def result_key(result):
+    return f"{result['benchmark']}:{result.get('mode') or '-'}"
+
+
+def regressions(results, baseline, tolerance):
+    """Metrics (lower is better) that got worse than baseline by more than tolerance"""
+    previous = {result_key(r): r for r in baseline.get("results", [])}
+    found = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if not before:
+            continue
+        for name, value in result.items():
+            old = before.get(name)
+            if not name.endswith(("_ms", "_kb", "_per_100", "_per_keystroke")) or not isinstance(value, (int, float)):
+                continue
+            if isinstance(old, (int, float)) and old > 0 and value > old * (1 + tolerance):
+                found.append(f"{result_key(result)} {name}: {old} -> {value}")
+    return found
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations per scenario")
+    parser.add_argument("--only", action="append", help="Run just these scenarios")
+    args = parser.parse_args()
+
+    results = []
+    for scenario, mode, quick_count in RUNS:
+        if args.only and scenario not in args.only:
+            continue
+        results.append(run_scenario(scenario, mode, quick_count if args.quick else None))
+
+    report = {
+        "suite": "e2e",
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "fakes": FAKE_ENV,
+        "results": results,
+    }
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = [result_key(r) for r in results if "error" in r]
+    for key in failed:
+        print(f"failed: {key}", file=sys.stderr)
+    timed_out = [r for r in results if r.get("timeouts")]
+    for result in timed_out:
+        print(f"timed out: {result_key(result)} ({result['timeouts']} plays)", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"regression: {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+    if failed or timed_out:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 export PYTHONPATH=$(pwd)
 source venv/bin/activate
-python3 -m app.main
+python3 -m app "$@"
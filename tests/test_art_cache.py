@@ -0,0 +1,85 @@
+"""ArtCache against a local HTTP server: hits, the memory budget and failed fetches."""
+import threading
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from app.services import art_cache as art
+from app.services.art_cache import ArtCache
+from bench.bench_art import ThumbnailServer, make_thumbnails
+
+
+@pytest.fixture(scope="module")
+def server():
+    art._load_pillow()
+    server = ThumbnailServer(make_thumbnails(4), delay=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(max_bytes=1024 * 1024, name="art"):
+        cache = ArtCache(directory=tmp_path / name, max_bytes=max_bytes)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.shutdown()
+
+
+RENDERING_BYTES = art.ART_WIDTH * art.ART_HEIGHT * 2 * 3
+
+
+def test_memory_and_disk_hits(server, make_cache):
+    cache = make_cache()
+    url = server.url(0)
+    requests = server.requests
+    pixels = cache.load(url).result(timeout=5)
+    assert len(pixels) == RENDERING_BYTES
+    assert server.requests == requests + 1
+
+    assert cache.cached(url) == pixels
+    assert cache.load(url).result(timeout=5) == pixels
+    assert cache.stats()['hits'] == 2
+
+    # A new cache on the same directory reads the rendering from disk
+    restarted = make_cache()
+    assert restarted.load(url).result(timeout=5) == pixels
+    assert restarted.stats()['disk_hits'] == 1
+    assert server.requests == requests + 1
+
+
+def test_memory_budget_evicts_least_recently_used(server, make_cache):
+    cache = make_cache(max_bytes=RENDERING_BYTES * 2)
+    first, second, third = (server.url(i) for i in range(3))
+    cache.load(first).result(timeout=5)
+    cache.load(second).result(timeout=5)
+    cache.cached(first)  # Now the most recently used
+    cache.load(third).result(timeout=5)
+
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= cache.max_bytes
+    assert cache.cached(first) is not None
+    assert cache.cached(second) is None
+
+
+def test_failed_fetch_is_not_retried_at_once(server, make_cache):
+    cache = make_cache()
+    missing = server.url(99)  # The server answers 404
+    requests = server.requests
+    assert cache.load(missing).result(timeout=5) is None
+    assert cache.load(missing).result(timeout=5) is None
+    assert server.requests == requests + 1
+    assert cache.stats()['errors'] == 1
+
+    # Once FAILURE_TTL has passed it is tried again
+    cache._failed[missing] = 0
+    assert cache.load(missing).result(timeout=5) is None
+    assert server.requests == requests + 2
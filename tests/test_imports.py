@@ -0,0 +1,29 @@
+"""Client commands must start fast and never load the TUI or network stacks.
+
+Uses the cases and budgets of bench.bench_import; IMPORT_BUDGET_SCALE
+loosens the budgets on slow machines.
+"""
+import os
+
+import pytest
+
+from bench.bench_import import CASES, check_case, make_env, run_case
+
+RUNS = 5
+SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", "1.0"))
+
+
+@pytest.fixture(scope="module")
+def env(tmp_path_factory):
+    env = make_env(str(tmp_path_factory.mktemp("home")))
+    # Warm the OS file cache, so the first case measured is not the slow one
+    for _, args, _, _ in CASES:
+        run_case(args, env)
+    return env
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case[0] for case in CASES])
+def test_client_imports(case, env):
+    result = check_case(case, env, RUNS, SCALE)
+    assert result["forbidden_imports"] == []
+    assert result["import_ms"] <= result["budget_ms"]
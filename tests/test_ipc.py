@@ -0,0 +1,101 @@
+"""The mpv IPC client must not leak threads, sockets or mpv processes.
+
+Runs against the fake mpv in bench/fakes; bench.bench_ipc times the same
+paths.
+"""
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from app.controller import player as player_module
+from app.controller.ipc import MpvIPC
+from bench.fakes.fake_mpv import FakeMpvServer
+
+FAKE_BIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fakes", "bin")
+SWITCHES = 1000
+RECONNECTS = 200
+
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+def counts():
+    """Threads and open file descriptors, once exiting reader threads are gone"""
+    deadline = time.monotonic() + 2.0
+    while True:
+        time.sleep(0.05)
+        threads = threading.active_count()
+        if time.monotonic() >= deadline or threads == threading.active_count():
+            return threads, open_fds()
+
+
+@pytest.fixture
+def player(monkeypatch):
+    monkeypatch.setenv("PATH", FAKE_BIN + os.pathsep + os.environ.get("PATH", ""))
+    # Every track "resolves" instantly to a fake URL; nothing is downloaded
+    monkeypatch.setattr(player_module, "resolve_audio", lambda video_id: f"fake://{video_id}")
+    monkeypatch.setattr(player_module, "is_resolved", lambda video_id: True)
+    monkeypatch.setattr(player_module.audio_cache, "fetch", lambda video_id, url: None)
+    player = player_module.Player(lambda: None, mode="persistent")
+    yield player
+    player.stop()
+
+
+def test_switches_reuse_one_mpv_without_leaking(player):
+    tracks = [{"videoId": f"track{i:05d}", "title": str(i), "artist": "test"} for i in range(SWITCHES)]
+    # Start mpv before the baseline so only per-switch growth counts
+    assert player.play(tracks[0])
+    player.preload(tracks[1])
+    threads_before, fds_before = counts()
+
+    for i in range(1, SWITCHES):
+        assert player.play(tracks[i])
+        if i + 1 < SWITCHES:
+            player.preload(tracks[i + 1])
+        # Wait for mpv to acknowledge so the switches do not just pile up in the socket
+        player.ipc.get_property("playlist-pos").result(timeout=2)
+
+    threads_after, fds_after = counts()
+    assert player.spawn_count == 1
+    assert threads_after - threads_before == 0
+    assert fds_after - fds_before == 0
+
+
+def test_reconnects_do_not_leak():
+    path = os.path.join(tempfile.mkdtemp(prefix="cplayer-test-"), "mpv.sock")
+    threads_before, fds_before = counts()
+    server = FakeMpvServer(path, fragment=True).start()
+    try:
+        for _ in range(RECONNECTS):
+            ipc = MpvIPC()
+            ipc.open(path)
+            assert ipc.wait_connected()
+            assert ipc.get_property("volume").result(timeout=2) == 100
+            ipc.close()
+    finally:
+        server.stop()
+
+    threads_after, fds_after = counts()
+    assert threads_after - threads_before == 0
+    assert fds_after - fds_before == 0
+
+
+def test_player_reconnects_after_mpv_dies(player):
+    tracks = [{"videoId": f"track{i:05d}", "title": str(i), "artist": "test"} for i in range(20)]
+    assert player.play(tracks[0])
+    threads_before, fds_before = counts()
+
+    for i in range(1, len(tracks)):
+        player.proc.kill()
+        player.proc.wait()
+        assert player.play(tracks[i])
+        assert player.ipc.get_property("playlist-pos").result(timeout=2) == 0
+
+    threads_after, fds_after = counts()
+    assert player.spawn_count == len(tracks)
+    assert threads_after - threads_before == 0
+    assert fds_after - fds_before == 0